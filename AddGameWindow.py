@@ -4,9 +4,16 @@ from PySide6.QtCore import * # type: ignore
 from PySide6.QtGui import * # type: ignore
 
 from add_game_screens.ManualAddGameScreen import ManualAddGameScreen
+from add_game_screens.SteamAddGameScreen import SteamAddGameScreen
+from add_game_screens.HeroicAddGameScreen import HeroicAddGameScreen
 from storage import Config, Library
 
 class AddGameWindow(QMainWindow):
+    '''
+    Window for adding games, with a screen for each place games can be added from.
+    Each screen is only built the first time it is selected.
+    '''
+
     def __init__(
         self,
         library: Library,
@@ -25,10 +32,18 @@ class AddGameWindow(QMainWindow):
         self.listWidget.addItem(listItemManual)
         self.listWidget.addItem(listItemSteam)
         self.listWidget.addItem(listItemHeroic)
+
+        self.screenFactories: list[Callable[[], QWidget]] = [
+            lambda: ManualAddGameScreen(library, config, refreshCallback),
+            lambda: SteamAddGameScreen(library, config, refreshCallback),
+            lambda: HeroicAddGameScreen(library, config, refreshCallback),
+        ]
+        'Builds the screen for each item in listWidget'
+        self.screens: list[Optional[QWidget]] = [None] * len(self.screenFactories)
         
         self.stackedWidget = QStackedWidget(self)
-        self.manualAddGameWidget = ManualAddGameScreen(library, config, refreshCallback)
-        self.stackedWidget.addWidget(self.manualAddGameWidget)
+        self.listWidget.currentRowChanged.connect(self.showScreen)
+        self.listWidget.setCurrentRow(0)
         
         self.mainLayout = QHBoxLayout()
         self.mainLayout.addWidget(self.listWidget)
@@ -36,4 +51,18 @@ class AddGameWindow(QMainWindow):
         
         self.centralWidget_ = QWidget()
         self.centralWidget_.setLayout(self.mainLayout)
-        self.setCentralWidget(self.centralWidget_)
\ No newline at end of file
+        self.setCentralWidget(self.centralWidget_)
+
+
+    def screenAt(self, index: int) -> QWidget:
+        'Returns the screen for an item in listWidget, building it if it hasn\'t been selected yet'
+        screen = self.screens[index]
+        if screen is None:
+            screen = self.screens[index] = self.screenFactories[index]()
+            self.stackedWidget.addWidget(screen)
+        return screen
+
+    def showScreen(self, index: int) -> None:
+        if index < 0:
+            return
+        self.stackedWidget.setCurrentWidget(self.screenAt(index))
@@ -0,0 +1,375 @@
+import time
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Optional
+from PySide6.QtWidgets import *
+from PySide6.QtCore import * # type: ignore
+from PySide6.QtGui import * # type: ignore
+
+import storage
+from storage import LibraryGame
+from GameTile import GameTile, TileImages
+from ImageLoader import ImageLoader
+from FrameMonitor import FrameMonitor
+from startup_profile import startupProfiler
+
+
+class Carousel(QWidget):
+    '''
+    Horizontal row of game tiles that only creates tiles for the games that are on screen.
+
+    The carousel is meant to be the widget of a QScrollArea. It keeps a model of how wide every
+    tile is, and only the tiles that are visible (plus `overscan` tiles on each side) exist as
+    widgets. Tiles that scroll out of view are put back in a pool and reused for other games.
+
+    Tiles are positioned manually instead of with a layout, so the tiles that exist don't have to
+    be next to each other (the selected tile is kept alive even when it is scrolled out of view,
+    so its animations always have a target).
+    '''
+
+    tileClicked = Signal(int)
+
+    frameMonitor: Optional[FrameMonitor] = None
+    'If set, painting and creating tiles as the carousel scrolls are timed'
+
+    def __init__(
+        self,
+        scrollArea: QScrollArea,
+        imageLoader: ImageLoader,
+        placeholderImage: TileImages,
+        imageHeight: int,
+        expandedImageHeight: int,
+        padding: int = 0,
+        spacing: int = 0,
+        overscan: int = 3,
+        parent: Optional[QWidget] = None,
+    ) -> None:
+        '''
+        Initialise Carousel
+
+        Args:
+            scrollArea (QScrollArea): Scroll area the carousel will be placed in
+            imageLoader (ImageLoader): Loads the artwork for tiles in the background
+            placeholderImage (TileImages): Images shown until a tile's artwork has loaded
+            imageHeight (int): Height of an unselected tile's image
+            expandedImageHeight (int): Height of the selected tile's image
+            padding (int): Padding on the left, right and bottom. Defaults to 0
+            spacing (int): Space between tiles. Defaults to 0
+            overscan (int): Number of extra tiles to keep on each side of the view. Defaults to 3
+            parent (Optional[QWidget]): Parent widget. Defaults to None
+        '''
+        super().__init__(parent)
+
+        self.scrollArea = scrollArea
+        self.imageLoader = imageLoader
+        self.placeholderImage = placeholderImage
+        self.imageHeight = imageHeight
+        self.expandedImageHeight = expandedImageHeight
+        self.padding = padding
+        self.spacing = spacing
+        self.overscan = overscan
+
+        # Tiles are 600x900 until we know otherwise.
+        # The extra 2 pixels are because GameTile is slightly bigger than its image
+        self.defaultBaseWidth = int(imageHeight * 2 / 3 - 2) + 2
+        self.defaultExpandedWidth = int(expandedImageHeight * 2 / 3 - 2) + 2
+
+        self.games: list[LibraryGame] = []
+        self.ids: list[int] = []
+        'Id of each game in self.games'
+        self.baseWidths: list[int] = []
+        'Width of each tile when it is not selected'
+        self.offsets: list[int] = [0]
+        'offsets[i] is the x position of tile i if every tile before it has its base width'
+        self.extraWidths: dict[int, int] = {}
+        'How much wider than its base width each tile is. Only contains tiles that are not at their base width'
+        self.knownWidths: dict[int, tuple[int, int]] = {}
+        'Base and expanded widths of tiles we have already loaded an image for, by game id'
+
+        self.activeTiles: dict[int, GameTile] = {}
+        'Tiles that currently exist, by index'
+        self.pool: list[GameTile] = []
+        'Tiles that are not being used'
+        self.selectedIndex: Optional[int] = None
+        self.pinned: set[int] = set()
+        'Indexes that must keep their tile even if they are scrolled out of view'
+
+        self._updatingTiles = False
+
+        scrollBar = self.scrollArea.horizontalScrollBar()
+        scrollBar.valueChanged.connect(self.updateVisibleTiles)
+        scrollBar.rangeChanged.connect(self.updateVisibleTiles)
+        self.imageLoader.imageLoaded.connect(self.handleImageLoaded)
+
+
+    def count(self) -> int:
+        return len(self.games)
+
+    def game(self, index: int) -> LibraryGame:
+        return self.games[index]
+
+    def setGames(self, games: list[LibraryGame], ids: Optional[list[int]] = None) -> None:
+        '''
+        Show a new list of games. Every tile is reset to its base width.
+
+        Tiles for games that are still in the list are kept and moved to their new position,
+        so only the tiles for new games have to be created.
+
+        Args:
+            games (list[LibraryGame]): Games to show
+            ids (Optional[list[int]]): The id of each game, if the caller already has them
+                (e.g. from Library.gameIDs). Saves looking at every game. Defaults to None
+        '''
+        if ids is None:
+            ids = [game['id'] for game in games]
+        newIndexes = dict(zip(ids, range(len(ids))))
+
+        oldTiles = self.activeTiles
+        self.activeTiles = {}
+        for index, tile in oldTiles.items():
+            id = self.ids[index]
+            newIndex = newIndexes.get(id)
+            if newIndex is None:
+                self.poolTile(tile, id)
+            else:
+                tile.index = newIndex
+                self.activeTiles[newIndex] = tile
+
+        self.games = list(games)
+        self.ids = list(ids)
+        # Most games usually haven't had their image loaded yet, so start with the default width
+        # and only look up the ones we know
+        self.baseWidths = [self.defaultBaseWidth] * len(self.ids)
+        if len(self.knownWidths) < len(self.ids):
+            for id, (baseWidth, _expandedWidth) in self.knownWidths.items():
+                newIndex = newIndexes.get(id)
+                if newIndex is not None:
+                    self.baseWidths[newIndex] = baseWidth
+        else:
+            for index, id in enumerate(self.ids):
+                if id in self.knownWidths:
+                    self.baseWidths[index] = self.knownWidths[id][0]
+        self.extraWidths = {}
+        self.selectedIndex = None
+        self.pinned = set()
+        self.calculateOffsets()
+
+        for tile in self.activeTiles.values():
+            self.resetTileWidth(tile)
+
+        self.updateVisibleTiles()
+
+
+    def tileAt(self, index: int) -> Optional[GameTile]:
+        'Returns the tile at index if it currently exists'
+        return self.activeTiles.get(index)
+
+    def tile(self, index: int) -> GameTile:
+        'Returns the tile at index, creating it if it does not exist'
+        if index not in self.activeTiles:
+            self.createTile(index)
+            self.layoutTiles()
+
+        return self.activeTiles[index]
+
+    def setSelectedIndex(self, index: Optional[int]) -> None:
+        '''
+        Mark a tile as selected.
+
+        This doesn't change the width of tiles that exist (MainWindow animates those),
+        it only updates the width of the tiles that aren't currently on screen.
+        '''
+        oldIndex = self.selectedIndex
+        self.selectedIndex = index
+
+        if oldIndex is not None and oldIndex not in self.activeTiles:
+            self.extraWidths.pop(oldIndex, None)
+        if index is not None and index not in self.activeTiles:
+            baseWidth, expandedWidth = self.knownWidths.get(
+                self.ids[index], (self.defaultBaseWidth, self.defaultExpandedWidth)
+            )
+            self.extraWidths[index] = expandedWidth - baseWidth
+
+        # Keep the previously selected tile too, so it can finish shrinking
+        self.pinned = {i for i in (oldIndex, index) if i is not None}
+        self.layoutTiles()
+
+
+    def calculateOffsets(self) -> None:
+        self.offsets = list(accumulate(map(self.spacing.__add__, self.baseWidths), initial=0))
+
+    def tileX(self, index: int) -> int:
+        'x position of the tile at index'
+        extra = sum(width for i, width in self.extraWidths.items() if i < index)
+        return self.padding + self.offsets[index] + extra
+
+    def contentWidth(self) -> int:
+        if len(self.games) == 0:
+            return 2 * self.padding
+        return 2 * self.padding + self.offsets[-1] - self.spacing + sum(self.extraWidths.values())
+
+
+    def updateVisibleTiles(self) -> None:
+        'Create the tiles that have scrolled into view and recycle the ones that have scrolled out of view'
+        if self._updatingTiles:
+            return
+        self._updatingTiles = True
+        start = time.perf_counter()
+
+        if len(self.games) > 0:
+            left = self.scrollArea.horizontalScrollBar().value() - self.padding
+            right = left + self.scrollArea.viewport().width()
+            # Ignoring extraWidths here is fine, since there's only ever a couple of expanded tiles
+            # and the overscan covers the difference
+            first = max(bisect_right(self.offsets, left) - 1 - self.overscan, 0)
+            last = min(bisect_left(self.offsets, right) + self.overscan, len(self.games) - 1)
+            wanted = set(range(first, last + 1)) | self.pinned
+
+            for index in list(self.activeTiles.keys()):
+                if index not in wanted:
+                    self.recycleTile(index)
+
+            for index in wanted:
+                if index not in self.activeTiles:
+                    self.createTile(index)
+
+        self.layoutTiles()
+        self._updatingTiles = False
+        if self.frameMonitor is not None:
+            self.frameMonitor.recordTileUpdate(time.perf_counter() - start)
+
+
+    def createTile(self, index: int) -> None:
+        start = time.perf_counter()
+        id = self.ids[index]
+
+        images = self.imageLoader.cached(id)
+
+        created = len(self.pool) == 0
+        if not created:
+            tile = self.pool.pop()
+            tile.setImage(images or self.placeholderImage)
+        else:
+            tile = GameTile(images or self.placeholderImage, self.imageHeight, self.expandedImageHeight, self)
+            tile.clicked.connect(lambda tile=tile: self.handleTileClicked(tile))
+            tile.imageWidthChanged.connect(lambda _value, tile=tile: self.handleImageWidthChanged(tile))
+
+        tile.index = index
+        self.activeTiles[index] = tile
+
+        if images is not None:
+            self.updateKnownWidths(index, tile)
+        else:
+            self.imageLoader.load(id)
+        self.resetTileWidth(tile)
+        tile.show()
+        startupProfiler.recordTile(id, time.perf_counter() - start, created, images is not None)
+
+    def resetTileWidth(self, tile: GameTile) -> None:
+        'Set the tile to its base or expanded width, and update the width model to match'
+        assert tile.index is not None
+
+        tile.blockSignals(True)
+        if tile.index == self.selectedIndex:
+            tile.imageWidth = tile.expandedImageWidth # type: ignore
+        else:
+            tile.imageWidth = tile.baseImageWidth # type: ignore
+        tile.blockSignals(False)
+        self.updateExtraWidth(tile)
+
+    def recycleTile(self, index: int) -> None:
+        tile = self.activeTiles.pop(index)
+        self.poolTile(tile, self.ids[index])
+
+    def poolTile(self, tile: GameTile, id: int) -> None:
+        'Put a tile that is no longer showing the game with this id back in the pool'
+        self.imageLoader.cancel(id)
+        tile.hide()
+        tile.releaseImage()
+        self.pool.append(tile)
+
+
+    def updateExtraWidth(self, tile: GameTile) -> None:
+        assert tile.index is not None
+        extra = tile.imageWidth - tile.baseImageWidth
+        if extra == 0:
+            self.extraWidths.pop(tile.index, None)
+        else:
+            self.extraWidths[tile.index] = extra
+
+    def layoutTiles(self) -> None:
+        'Move the tiles that exist to their positions'
+        height = self.height() - self.padding
+        for index, tile in self.activeTiles.items():
+            tile.setGeometry(self.tileX(index), 0, tile.sizeHint().width(), height)
+
+        width = self.contentWidth()
+        if self.minimumWidth() != width:
+            self.setMinimumWidth(width)
+
+
+    def reloadImage(self, id: int) -> None:
+        'Load a game\'s artwork again after it has changed. Call ImageLoader.invalidate first.'
+        self.knownWidths.pop(id, None)
+        for index, tile in self.activeTiles.items():
+            if self.ids[index] == id:
+                break
+        else:
+            # It will be loaded when its tile is created
+            return
+
+        if storage.getLibraryImagePath(id) is None:
+            # The artwork was deleted, so imageLoaded won't be emitted
+            tile.setImage(self.placeholderImage)
+            self.baseWidths[index] = self.defaultBaseWidth
+            self.calculateOffsets()
+            self.resetTileWidth(tile)
+            self.layoutTiles()
+        else:
+            self.imageLoader.load(id)
+
+    def handleImageLoaded(self, id: int, baseImage: QPixmap, expandedImage: QPixmap) -> None:
+        for index, tile in self.activeTiles.items():
+            if self.ids[index] == id:
+                break
+        else:
+            # The tile was recycled before its image finished loading
+            return
+
+        tile.setImage(TileImages(baseImage, expandedImage))
+        self.updateKnownWidths(index, tile)
+        self.resetTileWidth(tile)
+        self.layoutTiles()
+
+    def updateKnownWidths(self, index: int, tile: GameTile) -> None:
+        'Now that we know the real size of the image, update our estimate. The tile must be at its base width.'
+        frameWidth = tile.sizeHint().width() - tile.imageWidth
+        baseWidth = tile.baseImageWidth + frameWidth
+        expandedWidth = tile.expandedImageWidth + frameWidth
+        self.knownWidths[self.ids[index]] = (baseWidth, expandedWidth)
+        if self.baseWidths[index] != baseWidth:
+            self.baseWidths[index] = baseWidth
+            self.calculateOffsets()
+
+    def handleTileClicked(self, tile: GameTile) -> None:
+        if tile.index is not None:
+            self.tileClicked.emit(tile.index)
+
+    def handleImageWidthChanged(self, tile: GameTile) -> None:
+        if tile.index is None:
+            return
+        self.updateExtraWidth(tile)
+        self.layoutTiles()
+
+    def paintEvent(self, e: QPaintEvent) -> None:
+        if self.frameMonitor is None:
+            super().paintEvent(e)
+            return
+
+        start = time.perf_counter()
+        super().paintEvent(e)
+        self.frameMonitor.recordScrollAreaPaint(time.perf_counter() - start)
+
+    def resizeEvent(self, e: QResizeEvent) -> None:
+        super().resizeEvent(e)
+        self.layoutTiles()
@@ -0,0 +1,296 @@
+import json, time
+from collections import deque
+from typing import Optional, NamedTuple, Callable, Any, IO
+from PySide6.QtWidgets import *
+from PySide6.QtCore import * # type: ignore
+from PySide6.QtGui import * # type: ignore
+
+from storage import rotateLog
+
+
+class FrameRecord(NamedTuple):
+    'Timings for one repaint of the main window. Times are in milliseconds.'
+    time: float
+    'When the frame started, in seconds since the monitor was created'
+    frame: float
+    'How long the whole repaint took'
+    tiles: float
+    'Time spent in GameTile.paintEvent'
+    tileCount: int
+    'Number of tiles that were painted'
+    scrollArea: float
+    'Time spent painting AnimatedScrollArea\'s viewport and the carousel behind the tiles'
+    tileUpdates: float
+    'Time the carousel spent creating and recycling tiles as it scrolled'
+    interval: Optional[float]
+    'Time since the previous frame, if both were during an animation'
+    dropped: int
+    'Frames that should have been painted during the interval, but weren\'t'
+    queueDepth: int
+    'Selection animations that were queued or running'
+    keyLatencies: list[float]
+    'Time from each key press since the previous frame until this frame finished'
+
+
+def percentile(values: list[float], fraction: float) -> Optional[float]:
+    if len(values) == 0:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class FrameMonitor(QObject):
+    '''
+    Measures how smoothly the launcher animates, for tuning it on slow hardware.
+
+    MainWindow reports the time each repaint takes, GameTile, Carousel and AnimatedScrollArea report how long
+    their paint events take, and Carousel reports how long it takes to create the tiles that scroll into view.
+    While an animation is running, the time between frames shows how many frames were dropped.
+    Key presses are timed until the next frame finishes (i.e. until they could be seen).
+
+    Every frame is appended to a log as a line of JSON (see FrameRecord). The most recent frames are
+    kept in memory for summary, which FrameOverlay shows on screen.
+    '''
+
+    summaryChanged = Signal()
+    'Emitted every updateInterval ms if there were new frames'
+
+    def __init__(
+        self,
+        queueDepth: Callable[[], int],
+        isAnimating: Callable[[], bool],
+        refreshRate: float = 60.0,
+        logPath: Optional[str] = None,
+        historySize: int = 600,
+        updateInterval: int = 500,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        '''
+        Initialise FrameMonitor
+
+        Args:
+            queueDepth (Callable[[], int]): Returns the number of selection animations queued or running
+            isAnimating (Callable[[], bool]): Returns whether an animation is running, so frames are expected
+            refreshRate (float): Refresh rate of the screen, in Hz. Defaults to 60.0
+            logPath (Optional[str]): File to append every frame to. Defaults to None (no log)
+            historySize (int): Number of frames to keep for summary. Defaults to 600
+            updateInterval (int): Milliseconds between summaryChanged signals, and between writes to the log.
+                Defaults to 500
+            parent (Optional[QObject]): Parent object. Defaults to None
+        '''
+        super().__init__(parent)
+
+        self.queueDepth = queueDepth
+        self.isAnimating = isAnimating
+        self.framePeriod = 1000 / refreshRate
+        'Milliseconds between frames at the screen\'s refresh rate'
+        self.origin = time.perf_counter()
+
+        self.frames: deque[FrameRecord] = deque(maxlen=historySize)
+        self.keyLatencies: deque[float] = deque(maxlen=historySize)
+        self.droppedFrames = 0
+        'Total since the monitor was created'
+        self.ignoredKeys = 0
+        'Key presses that were ignored because too many animations were queued'
+        self.maxQueueDepth = 0
+
+        self._tilePaint = 0.0
+        self._tileCount = 0
+        self._scrollAreaPaint = 0.0
+        self._tileUpdates = 0.0
+        self._pendingKeys: list[float] = []
+        'When each key press since the last frame happened'
+        self._lastFrameStart: Optional[float] = None
+        'When the previous frame started, if an animation was running'
+        self._newFrames = False
+
+        self.logFile: Optional[IO[str]] = None
+        if logPath is not None:
+            rotateLog(logPath, 16 * 1024 * 1024, 1)
+            self.logFile = open(logPath, 'a')
+
+        self.updateTimer = QTimer(self)
+        self.updateTimer.setInterval(updateInterval)
+        self.updateTimer.timeout.connect(self.update)
+        self.updateTimer.start()
+
+
+    def recordTilePaint(self, seconds: float) -> None:
+        self._tilePaint += seconds
+        self._tileCount += 1
+
+    def recordScrollAreaPaint(self, seconds: float) -> None:
+        self._scrollAreaPaint += seconds
+
+    def recordTileUpdate(self, seconds: float) -> None:
+        self._tileUpdates += seconds
+
+    def recordFrame(self, start: float, end: float) -> None:
+        '''
+        Called by MainWindow after the window has been repainted.
+
+        Args:
+            start (float): time.perf_counter() when the repaint started
+            end (float): time.perf_counter() when the repaint finished
+        '''
+        animating = self.isAnimating()
+        if (
+            not animating and self._tileCount == 0 and self._scrollAreaPaint == 0 and self._tileUpdates == 0
+            and len(self._pendingKeys) == 0
+        ):
+            # e.g. a button's hover effect, or the overlay updating. Not worth recording,
+            # and the overlay would keep updating itself forever
+            self._lastFrameStart = None
+            return
+
+        interval: Optional[float] = None
+        dropped = 0
+        if animating and self._lastFrameStart is not None:
+            interval = (start - self._lastFrameStart) * 1000
+            dropped = max(round(interval / self.framePeriod) - 1, 0)
+            self.droppedFrames += dropped
+        self._lastFrameStart = start if animating else None
+
+        queueDepth = self.queueDepth()
+        self.maxQueueDepth = max(self.maxQueueDepth, queueDepth)
+
+        keyLatencies = [(end - pressed) * 1000 for pressed in self._pendingKeys]
+        self.keyLatencies.extend(keyLatencies)
+
+        record = FrameRecord(
+            time = start - self.origin,
+            frame = (end - start) * 1000,
+            tiles = self._tilePaint * 1000,
+            tileCount = self._tileCount,
+            scrollArea = self._scrollAreaPaint * 1000,
+            tileUpdates = self._tileUpdates * 1000,
+            interval = interval,
+            dropped = dropped,
+            queueDepth = queueDepth,
+            keyLatencies = keyLatencies,
+        )
+        self.frames.append(record)
+        if self.logFile is not None:
+            self.logFile.write(json.dumps(record._asdict()) + '\n')
+
+        self._tilePaint = 0.0
+        self._tileCount = 0
+        self._scrollAreaPaint = 0.0
+        self._tileUpdates = 0.0
+        self._pendingKeys = []
+        self._newFrames = True
+
+    def keyPressed(self) -> None:
+        'Called when a key that changes the selection is pressed'
+        self._pendingKeys.append(time.perf_counter())
+
+    def keyIgnored(self) -> None:
+        'Called when the last key press was ignored, so it won\'t be shown by the next frame'
+        if len(self._pendingKeys) > 0:
+            self._pendingKeys.pop()
+        self.ignoredKeys += 1
+
+
+    def summary(self) -> dict[str, Any]:
+        'Statistics for the frames in history. Times are in milliseconds, and are None if there weren\'t any frames.'
+        frameTimes = [frame.frame for frame in self.frames]
+        tileTimes = [frame.tiles / frame.tileCount for frame in self.frames if frame.tileCount > 0]
+        intervals = [frame.interval for frame in self.frames if frame.interval is not None]
+        latencies = list(self.keyLatencies)
+        return {
+            'frames': len(frameTimes),
+            'frameMean': sum(frameTimes) / len(frameTimes) if len(frameTimes) > 0 else None,
+            'frameP95': percentile(frameTimes, 0.95),
+            'frameMax': max(frameTimes, default=None),
+            'tileMean': sum(tileTimes) / len(tileTimes) if len(tileTimes) > 0 else None,
+            'tileMax': max(tileTimes, default=None),
+            'scrollAreaMax': max((frame.scrollArea for frame in self.frames), default=None),
+            'tileUpdatesMax': max((frame.tileUpdates for frame in self.frames), default=None),
+            'animationFps': 1000 * len(intervals) / sum(intervals) if len(intervals) > 0 and sum(intervals) > 0 else None,
+            'intervalP95': percentile(intervals, 0.95),
+            'droppedFrames': self.droppedFrames,
+            'queueDepth': self.queueDepth(),
+            'maxQueueDepth': self.maxQueueDepth,
+            'keyLatencyMean': sum(latencies) / len(latencies) if len(latencies) > 0 else None,
+            'keyLatencyP95': percentile(latencies, 0.95),
+            'ignoredKeys': self.ignoredKeys,
+        }
+
+    def update(self) -> None:
+        if not self._newFrames:
+            return
+        self._newFrames = False
+        if self.logFile is not None:
+            self.logFile.flush()
+        self.summaryChanged.emit()
+
+    def close(self) -> None:
+        self.updateTimer.stop()
+        if self.logFile is not None:
+            self.logFile.close()
+            self.logFile = None
+
+
+
+class FrameOverlay(QLabel):
+    '''
+    Shows FrameMonitor's summary in the corner of its parent, and the image cache's counts if imageCacheStats
+    (e.g. PixmapCache.stats) is given.
+    Doesn't take mouse clicks or focus, so it can be left on top of the launcher.
+    '''
+
+    def __init__(
+        self,
+        monitor: FrameMonitor,
+        parent: QWidget,
+        imageCacheStats: Optional[Callable[[], dict[str, Any]]] = None
+    ) -> None:
+        super().__init__(parent)
+
+        self.monitor = monitor
+        self.imageCacheStats = imageCacheStats
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.setStyleSheet('background-color: #c0000000; color: white; padding: 6px; border-radius: 4px;')
+        self.setText('Waiting for frames')
+        self.adjustSize()
+
+        monitor.summaryChanged.connect(self.updateText)
+        parent.installEventFilter(self)
+        self.move(8, 8)
+        self.raise_()
+
+
+    def updateText(self) -> None:
+        summary = self.monitor.summary()
+
+        def ms(key: str) -> str:
+            value = summary[key]
+            return f'{value:6.2f}' if value is not None else '     -'
+
+        fps = summary['animationFps']
+        lines = [
+            f'frame      mean {ms("frameMean")}  p95 {ms("frameP95")}  max {ms("frameMax")} ms',
+            f'tile       mean {ms("tileMean")}  max {ms("tileMax")} ms',
+            f'scroll     paint max {ms("scrollAreaMax")}  tile updates max {ms("tileUpdatesMax")} ms',
+            f'animation  {fps:5.1f} fps' if fps is not None else 'animation      - fps',
+            f'           interval p95 {ms("intervalP95")} ms, {summary["droppedFrames"]} dropped',
+            f'queue      {summary["queueDepth"]} (max {summary["maxQueueDepth"]})',
+            f'key        mean {ms("keyLatencyMean")}  p95 {ms("keyLatencyP95")} ms, {summary["ignoredKeys"]} ignored',
+        ]
+        if self.imageCacheStats is not None:
+            cache = self.imageCacheStats()
+            lines.append(
+                f'images     {cache["hitRate"] * 100:5.1f}% hits, {cache["evictions"]} evicted, '
+                f'{cache["bytes"] / 2**20:.0f}/{cache["maxBytes"] / 2**20:.0f} MiB'
+            )
+        self.setText('\n'.join(lines))
+        self.adjustSize()
+        self.raise_()
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        # Stay on top when the parent's children change
+        if event.type() == QEvent.Type.ChildAdded:
+            self.raise_()
+        return False
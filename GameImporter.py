@@ -0,0 +1,100 @@
+from typing import Any, Callable, Optional
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class GameImporter(QObject):
+    '''
+    Runs the slow parts of importing games (scanning folders, copying artwork) on a thread pool.
+
+    At most maxThreads jobs run at once, so slow or network mounted drives aren't flooded with requests.
+    Results are delivered on the GUI thread through jobFinished, and progress is reported as jobs finish.
+    '''
+
+    jobFinished = Signal(object)
+    'Emitted with the return value of each job that ran'
+    jobFailed = Signal(object)
+    'Emitted with the exception raised by each job that failed'
+    progress = Signal(int, int)
+    'Emitted with the number of jobs that are done and the total number of jobs'
+    finished = Signal(bool)
+    'Emitted when every job is done. The argument is whether the import was cancelled.'
+
+    def __init__(self, maxThreads: int = 4, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+
+        self.threadPool = QThreadPool(self)
+        self.threadPool.setMaxThreadCount(maxThreads)
+
+        self.total = 0
+        self.done = 0
+        self.cancelled = False
+
+        self._signals = _JobSignals(self)
+        self._signals.finished.connect(self.handleJobFinished)
+
+
+    def start(self, jobs: list[Callable[[], Any]]) -> None:
+        if self.isRunning():
+            raise RuntimeError('Import already running')
+
+        self.total = len(jobs)
+        self.done = 0
+        self.cancelled = False
+        self.progress.emit(0, self.total)
+
+        if self.total == 0:
+            self.finished.emit(False)
+            return
+
+        for job in jobs:
+            self.threadPool.start(_Job(job, self, self._signals))
+
+    def cancel(self) -> None:
+        'Skip the jobs that haven\'t started yet. Jobs that are already running still finish.'
+        self.cancelled = True
+
+    def isRunning(self) -> bool:
+        return self.done < self.total
+
+    def wait(self) -> None:
+        self.threadPool.waitForDone()
+
+
+    def handleJobFinished(self, ran: bool, result: Any, error: Optional[Exception]) -> None:
+        self.done += 1
+        if error is not None:
+            self.jobFailed.emit(error)
+        elif ran:
+            self.jobFinished.emit(result)
+        self.progress.emit(self.done, self.total)
+
+        if self.done == self.total:
+            self.finished.emit(self.cancelled)
+
+
+
+class _JobSignals(QObject):
+    finished = Signal(bool, object, object)
+
+
+class _Job(QRunnable):
+    def __init__(self, function: Callable[[], Any], importer: GameImporter, signals: _JobSignals) -> None:
+        super().__init__()
+
+        self.function = function
+        self.importer = importer
+        self.signals = signals
+
+    def run(self) -> None:
+        if self.importer.cancelled:
+            self.signals.finished.emit(False, None, None)
+            return
+
+        try:
+            result = self.function()
+        except Exception as error:
+            # Still report the job as finished, otherwise the importer would wait for it forever
+            self.signals.finished.emit(True, None, error)
+            return
+
+        self.signals.finished.emit(True, result, None)
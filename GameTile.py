@@ -1,57 +1,167 @@
-from typing import Optional
+import time
+from typing import Optional, NamedTuple
 from PySide6.QtWidgets import *
 from PySide6.QtCore import * # type: ignore
 from PySide6.QtGui import * # type: ignore
 
+from FrameMonitor import FrameMonitor
+
+TILE_RADIUS = 30
+'Radius of the rounded corners, in the 900px tall image'
+
+
+class TileImages(NamedTuple):
+    'Images used by a GameTile. Both should come from scaleTileImage.'
+    base: QPixmap
+    expanded: QPixmap
+
+
 class GameTile(QLabel):
     clicked = Signal()
+    imageWidthChanged = Signal(int)
 
-    def __init__(self, image: QPixmap, imageHeight: int, expandedImageHeight: int, parent: Optional[QWidget] = None) -> None:
+    paintScaling = True
+    '''
+    While animating, scale the image when the tile is painted instead of creating a new pixmap for every frame.
+    Set to False to go back to scaling the pixmap in the imageWidth setter (see benchmarks/tile_animation.py).
+    '''
+    frameMonitor: Optional[FrameMonitor] = None
+    'If set, every paint event is timed'
+
+    def __init__(self, images: TileImages, imageHeight: int, expandedImageHeight: int, parent: Optional[QWidget] = None) -> None:
         super().__init__(parent)
-        
-        # Scale the image to 600x900 (or whatever x 900) first so the rounded corners are consistent
-        image = image.scaledToHeight(900, mode=Qt.TransformationMode.SmoothTransformation)
-
-
-        # I want all images to be the same size, but I also want to animate the width instead of the height,
-        # so I convert the height to a width when the tile is created
-        ratio = image.width() / image.height()
-        # GameTile seems to actually be slightly bigger than the image,
-        # so make image smaller so GameTile is correct size
-        self.baseImageWidth = int(imageHeight * ratio - 2)
-        self.expandedImageWidth = int(expandedImageHeight * ratio - 2)
-        
-        self._imageWidth = self.baseImageWidth
-        
-
-        # Image (with rounded corners)
-        radius = 30
-        self.imagePixmap = QPixmap(image.size())
-        self.imagePixmap.fill(Qt.GlobalColor.transparent)
-        painter = QPainter(self.imagePixmap)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.setBrush(QBrush(image))
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.drawRoundedRect(image.rect(), radius, radius)
-        
-        self.setPixmap(self.imagePixmap.scaledToWidth(self._imageWidth, Qt.TransformationMode.SmoothTransformation))
+
+        self.imageHeight = imageHeight
+        self.expandedImageHeight = expandedImageHeight
+        self.index: Optional[int] = None
+        'Index of the game this tile is currently showing in the carousel'
+        self._paintSize: Optional[QSize] = None
+        'Size to paint imagePixmap at while animating with paintScaling'
+
+        self.setImage(images)
         self.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred)
-        
+
+
+    def setImage(self, images: TileImages) -> None:
+        '''
+        Replace the tile's image. The tile is reset to its base width.
+
+        Used when a tile is recycled to show a different game, or when its artwork finishes loading.
+        '''
+
+        # The images are already scaled to imageHeight and expandedImageHeight (minus a bit,
+        # because GameTile seems to actually be slightly bigger than the image),
+        # so we can just use their widths
+        self.baseImageWidth = images.base.width()
+        self.expandedImageWidth = images.expanded.width()
+
+        self._imageWidth = self.baseImageWidth
+        self._paintSize = None
+        self.baseImagePixmap = images.base
+        # Animation frames are scaled from the biggest image
+        self.imagePixmap = images.expanded
+
+        self.setPixmap(self.baseImagePixmap)
+
+    def releaseImage(self) -> None:
+        'Free the pixmaps held by the tile while it is sitting unused in a pool'
+        self.baseImagePixmap = QPixmap()
+        self.imagePixmap = QPixmap()
+        self._paintSize = None
+        self.clear()
+        self.index = None
+
 
     def mousePressEvent(self, _e: QMouseEvent) -> None:
         self.clicked.emit()
 
+    def sizeHint(self) -> QSize:
+        sizeHint = super().sizeHint()
+        if self._paintSize is None:
+            return sizeHint
+
+        # Same as the size hint for a pixmap of _paintSize
+        return sizeHint + self._paintSize - self.pixmap().size()
+
+    def paintEvent(self, e: QPaintEvent) -> None:
+        if self.frameMonitor is None:
+            self.paintTile(e)
+        else:
+            start = time.perf_counter()
+            self.paintTile(e)
+            self.frameMonitor.recordTilePaint(time.perf_counter() - start)
+
+    def paintTile(self, e: QPaintEvent) -> None:
+        if self._paintSize is None:
+            super().paintEvent(e)
+            return
+
+        painter = QPainter(self)
+        self.drawFrame(painter)
+        # Same position QLabel would draw a pixmap at
+        rect = QStyle.alignedRect(self.layoutDirection(), self.alignment(), self._paintSize, self.contentsRect())
+        painter.drawPixmap(rect, self.imagePixmap)
+        painter.end()
+
+
     @Property(int)
     def imageWidth(self) -> int:
         return self._imageWidth
-    
+
     @imageWidth.setter # type: ignore
     def imageWidth(self, value: int) -> None:
-        if value == self.baseImageWidth or self.expandedImageWidth:
-            # If the animation is over, do a higher quality transformation
-            self.setPixmap(self.imagePixmap.scaledToWidth(value, Qt.TransformationMode.SmoothTransformation))
+        if value == self.baseImageWidth:
+            # If the animation is over, use the images that were already scaled with a high quality transformation
+            self._paintSize = None
+            self.setPixmap(self.baseImagePixmap)
+        elif value == self.expandedImageWidth:
+            self._paintSize = None
+            self.setPixmap(self.imagePixmap)
+        elif self.paintScaling:
+            # Keep the current pixmap and let paintEvent draw imagePixmap at the new size
+            height = round(value * self.imagePixmap.height() / self.imagePixmap.width())
+            self._paintSize = QSize(value, height)
+            self.updateGeometry()
+            self.update()
         else:
             # Do fast transformation while animating
             self.setPixmap(self.imagePixmap.scaledToWidth(value, Qt.TransformationMode.FastTransformation))
 
-        self._imageWidth = value
\ No newline at end of file
+        self._imageWidth = value
+        self.imageWidthChanged.emit(value)
+
+
+
+def roundTileImage(image: QImage) -> QImage:
+    '''
+    Scale a game's artwork and give it rounded corners, ready to be used by a GameTile.
+
+    Only uses QImage, so it is safe to call outside the GUI thread.
+    '''
+
+    # Scale the image to 600x900 (or whatever x 900) first so the rounded corners are consistent
+    image = image.scaledToHeight(900, mode=Qt.TransformationMode.SmoothTransformation)
+
+    radius = TILE_RADIUS
+    roundedImage = QImage(image.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    roundedImage.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(roundedImage)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setBrush(QBrush(image))
+    painter.setPen(Qt.PenStyle.NoPen)
+    painter.drawRoundedRect(image.rect(), radius, radius)
+    painter.end()
+
+    return roundedImage
+
+def scaleTileImage(image: QImage, height: int) -> QImage:
+    '''
+    Scale an image from roundTileImage to the size a GameTile shows it at when its height is `height`.
+
+    Only uses QImage, so it is safe to call outside the GUI thread.
+    '''
+
+    # GameTile seems to actually be slightly bigger than the image,
+    # so make image smaller so GameTile is correct size
+    ratio = image.width() / image.height()
+    return image.scaledToWidth(int(height * ratio - 2), Qt.TransformationMode.SmoothTransformation)
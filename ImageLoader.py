@@ -0,0 +1,170 @@
+import os, time, traceback
+from typing import Optional
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QImage, QPixmap
+
+import storage
+from GameTile import TILE_RADIUS, TileImages, roundTileImage, scaleTileImage
+from PixmapCache import PixmapCache
+from startup_profile import startupProfiler
+
+
+class ImageLoader(QObject):
+    '''
+    Loads game artwork in the background.
+
+    Decoding, scaling and rounding the corners is done on a QThreadPool using QImage.
+    Only the conversion to QPixmap happens on the GUI thread, when imageLoaded is emitted.
+
+    The finished images are cached in storage.THUMBNAIL_FOLDER, so after the first time
+    the original artwork doesn't need to be decoded or repainted. The most recently used
+    images are also kept in memory, up to cacheSize bytes.
+    '''
+
+    imageLoaded = Signal(int, QPixmap, QPixmap)
+    '''
+    Emitted with the game id and the finished images at imageHeight and expandedImageHeight.
+    Not emitted for games without artwork.
+    '''
+
+    def __init__(
+        self,
+        imageHeight: int,
+        expandedImageHeight: int,
+        cacheSize: int = storage.DEFAULT_IMAGE_CACHE_SIZE,
+        threadPool: Optional[QThreadPool] = None,
+        parent: Optional[QObject] = None
+    ) -> None:
+        super().__init__(parent)
+
+        self.imageHeight = imageHeight
+        self.expandedImageHeight = expandedImageHeight
+        self.cache = PixmapCache(cacheSize)
+        self.threadPool = threadPool if threadPool is not None else QThreadPool.globalInstance()
+        self.pending: dict[int, _LoadImageTask] = {}
+        'Tasks that haven\'t finished yet, by game id'
+
+        self._signals = _LoadImageSignals(self)
+        self._signals.finished.connect(self.handleFinished)
+
+
+    def cached(self, id: int) -> Optional[TileImages]:
+        'Returns the images for a game if they are in memory. Otherwise, use load.'
+        return self.cache.get(id)
+
+    def load(self, id: int) -> None:
+        'Start loading the artwork for a game, if it isn\'t already being loaded'
+        if id in self.pending:
+            return
+
+        task = _LoadImageTask(id, self.imageHeight, self.expandedImageHeight, self._signals)
+        self.pending[id] = task
+        self.threadPool.start(task)
+
+    def cancel(self, id: int) -> None:
+        'Stop loading the artwork for a game if it hasn\'t started yet'
+        task = self.pending.get(id)
+        if task is not None and self.threadPool.tryTake(task):
+            del self.pending[id]
+
+    def invalidate(self, id: int) -> None:
+        'Forget the images for a game after its artwork has changed. Loading it again will use the new artwork.'
+        self.cache.remove(id)
+        task = self.pending.pop(id, None)
+        if task is not None:
+            # If it's already running, its result is ignored since it's no longer pending
+            self.threadPool.tryTake(task)
+
+    def cleanCache(self, ids: list[int]) -> None:
+        'Delete stale thumbnails in the background. ids are the games that are still in the library.'
+        self.threadPool.start(lambda: storage.cleanThumbnails(ids))
+
+
+    def shutdown(self) -> None:
+        'Cancel every task that hasn\'t started and wait for the running ones to finish'
+        for id in list(self.pending.keys()):
+            self.cancel(id)
+        self.threadPool.waitForDone()
+        self.pending.clear()
+
+
+    def handleFinished(self, task: '_LoadImageTask', baseImage: QImage, expandedImage: QImage) -> None:
+        id = task.id
+        if self.pending.get(id) is not task:
+            # Cancelled, or invalidated while it was running (and maybe loading again with the new artwork)
+            return
+        del self.pending[id]
+        if baseImage.isNull() or expandedImage.isNull():
+            return
+
+        images = TileImages(QPixmap.fromImage(baseImage), QPixmap.fromImage(expandedImage))
+        self.cache.put(id, images)
+        self.imageLoaded.emit(id, images.base, images.expanded)
+
+
+
+def loadThumbnail(id: int, sourcePath: str, height: int) -> QImage:
+    'Load a cached thumbnail. Returns a null image if it isn\'t cached.'
+    path = storage.getThumbnailPath(id, sourcePath, height, TILE_RADIUS)
+    if not os.path.exists(path):
+        return QImage()
+    return QImage(path)
+
+def saveThumbnail(id: int, sourcePath: str, height: int, image: QImage) -> None:
+    path = storage.getThumbnailPath(id, sourcePath, height, TILE_RADIUS)
+    # Write to a temporary file first so a half written thumbnail is never loaded
+    tempPath = path + '.tmp'
+    # For PNGs, quality is the compression level. 80 saves a lot faster than the default
+    # for only slightly bigger files
+    if image.save(tempPath, 'PNG', 80):
+        os.replace(tempPath, path)
+
+
+class _LoadImageSignals(QObject):
+    finished = Signal(object, QImage, QImage)
+    'Emitted with the task, so results of tasks that were invalidated can be told apart from newer ones'
+
+
+class _LoadImageTask(QRunnable):
+    def __init__(self, id: int, imageHeight: int, expandedImageHeight: int, signals: _LoadImageSignals) -> None:
+        super().__init__()
+
+        self.id = id
+        self.imageHeight = imageHeight
+        self.expandedImageHeight = expandedImageHeight
+        self.signals = signals
+        # ImageLoader keeps track of the task, so Qt mustn't delete it
+        self.setAutoDelete(False)
+
+    def run(self) -> None:
+        try:
+            baseImage, expandedImage = self.loadImages()
+        except Exception:
+            # e.g. the artwork was deleted while it was being loaded. ImageLoader still has to hear
+            # that the task finished, or the game would stay pending and never be loaded again
+            traceback.print_exc()
+            baseImage, expandedImage = QImage(), QImage()
+        self.signals.finished.emit(self, baseImage, expandedImage)
+
+    def loadImages(self) -> tuple[QImage, QImage]:
+        'Returns the images at both heights, or null images if the game has no artwork'
+        start = time.perf_counter()
+        sourcePath = storage.getLibraryImagePath(self.id)
+        if sourcePath is None:
+            return QImage(), QImage()
+
+        baseImage = loadThumbnail(self.id, sourcePath, self.imageHeight)
+        expandedImage = loadThumbnail(self.id, sourcePath, self.expandedImageHeight)
+
+        thumbnail = not (baseImage.isNull() or expandedImage.isNull())
+        if not thumbnail:
+            image = QImage(sourcePath)
+            if not image.isNull():
+                image = roundTileImage(image)
+                baseImage = scaleTileImage(image, self.imageHeight)
+                expandedImage = scaleTileImage(image, self.expandedImageHeight)
+                saveThumbnail(self.id, sourcePath, self.imageHeight, baseImage)
+                saveThumbnail(self.id, sourcePath, self.expandedImageHeight, expandedImage)
+
+        startupProfiler.recordImage(self.id, time.perf_counter() - start, thumbnail)
+        return baseImage, expandedImage
@@ -0,0 +1,211 @@
+import os, sys, traceback
+from functools import partial
+from typing import Callable, Optional
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+
+import storage
+from storage import Config, Library
+from steam import SteamApp, SteamLibraryScanner, STEAM_MANIFEST_CACHE_FILE, importSteamArtwork, steamGame
+from GameImporter import GameImporter
+
+
+class LibraryWatcher(QObject):
+    '''
+    Keeps the library up to date with changes made outside the launcher, without polling.
+
+    QFileSystemWatcher (inotify on Linux) is used to watch:
+    - the steamapps folder of every Steam library, so games installed while the launcher is open are added
+    - the library file, so changes made by other programs (e.g. another copy of the launcher) are loaded.
+      launcher_test.py only edits games.json, so its changes are only seen with the JSON backend
+    - ARTWORK_FOLDER, so added or changed artwork is shown
+
+    Changes come in bursts (Steam rewrites a manifest many times while installing a game),
+    so each kind of change is only handled once there haven't been any events for `delay` ms.
+    '''
+
+    libraryChanged = Signal()
+    'Emitted after games have been added, removed or changed'
+    artworkChanged = Signal(list)
+    'Emitted with the ids of the games whose artwork has been added, changed or deleted'
+
+    def __init__(self, library: Library, config: Config, delay: int = 500, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+
+        self.library = library
+        self.config = config
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.handleDirectoryChanged)
+        self.watcher.fileChanged.connect(self.handleFileChanged)
+
+        self.steamTimer = self.createTimer(delay, self.scanSteam)
+        self.libraryTimer = self.createTimer(delay, self.checkLibrary)
+        self.artworkTimer = self.createTimer(delay, self.checkArtwork)
+
+        # Scanning is done off the GUI thread, one scan at a time
+        self.steamScanner = SteamLibraryScanner(config.steamPath, STEAM_MANIFEST_CACHE_FILE)
+        self.steamImporter = GameImporter(maxThreads=1, parent=self)
+        self.steamImporter.jobFinished.connect(self.steamScanned)
+        self.steamImporter.finished.connect(self.steamScanFinished)
+        self.steamImporter.jobFailed.connect(partial(self.jobFailed, 'scan the Steam libraries'))
+        self.steamFolders: set[str] = set()
+        'steamapps folders that are being watched'
+        self.knownAppIDs: Optional[set[str]] = None
+        'Apps that were installed during the last scan. None until the first scan is done.'
+        self.rescanSteam = False
+        'Whether something changed while a scan was running'
+
+        # Copying artwork can be slow too, e.g. from a network drive
+        self.artworkImporter = GameImporter(maxThreads=1, parent=self)
+        self.artworkImporter.finished.connect(self.artworkImported)
+        self.artworkImporter.jobFailed.connect(partial(self.jobFailed, 'copy Steam artwork'))
+        self.pendingArtwork: list[tuple[str, int]] = []
+        'App id and game id of new Steam games whose artwork hasn\'t been copied yet'
+
+        self.libraryPath = library.backend.path
+        if self.libraryPath is not None:
+            self.watcher.addPath(os.path.dirname(self.libraryPath))
+            if os.path.exists(self.libraryPath):
+                self.watcher.addPath(self.libraryPath)
+
+        self.artworkStats = artworkSnapshot()
+        self.watcher.addPath(storage.ARTWORK_FOLDER)
+
+        self.scanSteam()
+
+    def createTimer(self, delay: int, callback: Callable[[], None]) -> QTimer:
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setInterval(delay)
+        timer.timeout.connect(callback)
+        return timer
+
+
+    def handleDirectoryChanged(self, path: str) -> None:
+        if path in self.steamFolders:
+            self.steamTimer.start()
+        elif path == storage.ARTWORK_FOLDER:
+            self.artworkTimer.start()
+        else:
+            # The library file's folder. Saving replaces the file, which only shows up here
+            self.libraryTimer.start()
+
+    def handleFileChanged(self, path: str) -> None:
+        if path == self.libraryPath:
+            self.libraryTimer.start()
+
+
+    def scanSteam(self) -> None:
+        if self.steamImporter.isRunning():
+            self.rescanSteam = True
+            return
+
+        self.rescanSteam = False
+        self.updateSteamFolders()
+        self.steamImporter.start([self.steamScanner.scan])
+
+    def updateSteamFolders(self) -> None:
+        'Watch the steamapps folder of every library, including ones that have just been added'
+        folders = {os.path.join(path, 'steamapps') for path in self.steamScanner.libraryPaths()}
+        folders = {folder for folder in folders if os.path.isdir(folder)}
+
+        removedFolders = self.steamFolders - folders
+        addedFolders = folders - self.steamFolders
+        if len(removedFolders) > 0:
+            self.watcher.removePaths(list(removedFolders))
+        if len(addedFolders) > 0:
+            self.watcher.addPaths(list(addedFolders))
+        self.steamFolders = folders
+
+    def steamScanned(self, libraries: dict[str, dict[str, SteamApp]]) -> None:
+        apps = {appID: app for libraryApps in libraries.values() for appID, app in libraryApps.items()}
+
+        if self.knownAppIDs is not None:
+            newApps = [
+                app for appID, app in apps.items()
+                if appID not in self.knownAppIDs and not self.library.hasExternalGame('steam', appID)
+            ]
+            if len(newApps) > 0:
+                ids = self.library.reserveIDs(len(newApps))
+                self.library.addGames([steamGame(app, id) for app, id in zip(newApps, ids)])
+                self.library.save()
+                self.libraryChanged.emit()
+
+                # The games are shown straight away. Their artwork shows up through artworkChanged once it is copied
+                self.pendingArtwork += [(app.appID, id) for app, id in zip(newApps, ids)]
+                self.importArtwork()
+
+        self.knownAppIDs = set(apps.keys())
+
+    def importArtwork(self) -> None:
+        if self.artworkImporter.isRunning() or len(self.pendingArtwork) == 0:
+            return
+
+        steamPath = self.config.steamPath
+        self.artworkImporter.start([
+            partial(importSteamArtwork, steamPath, appID, id)
+            for appID, id in self.pendingArtwork
+        ])
+        self.pendingArtwork = []
+
+    def artworkImported(self, _cancelled: bool) -> None:
+        # Games that were installed while the artwork was being copied
+        self.importArtwork()
+
+    def steamScanFinished(self, _cancelled: bool) -> None:
+        if self.rescanSteam:
+            self.scanSteam()
+        else:
+            # libraryfolders.vdf might have changed
+            self.updateSteamFolders()
+
+
+    def jobFailed(self, action: str, error: Exception) -> None:
+        # There's nowhere to show errors from the background, so at least leave a trace
+        print(f'Library watcher couldn\'t {action}:', file=sys.stderr)
+        traceback.print_exception(error)
+
+
+    def checkLibrary(self) -> None:
+        if self.libraryPath is not None and self.libraryPath not in self.watcher.files() and os.path.exists(self.libraryPath):
+            # The file was replaced, so inotify is watching the old one
+            self.watcher.addPath(self.libraryPath)
+
+        # Our own saves change the file too
+        if not self.library.hasExternalChanges():
+            return
+
+        added, changed, removed = self.library.reload()
+        if len(added) > 0 or len(changed) > 0 or len(removed) > 0:
+            self.libraryChanged.emit()
+
+
+    def checkArtwork(self) -> None:
+        stats = artworkSnapshot()
+        changedNames = {
+            name for name in stats.keys() | self.artworkStats.keys()
+            if stats.get(name) != self.artworkStats.get(name)
+        }
+        self.artworkStats = stats
+
+        ids = sorted({int(name.split('_', 1)[0]) for name in changedNames if name.split('_', 1)[0].isdigit()})
+        if len(ids) > 0:
+            self.artworkChanged.emit(ids)
+
+
+
+def artworkSnapshot() -> dict[str, tuple[int, int]]:
+    'Returns the mtime and size of every file in ARTWORK_FOLDER, by name'
+    stats: dict[str, tuple[int, int]] = {}
+    try:
+        entries = os.scandir(storage.ARTWORK_FOLDER)
+    except OSError:
+        return stats
+
+    with entries:
+        for entry in entries:
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                stats[entry.name] = (stat.st_mtime_ns, stat.st_size)
+
+    return stats
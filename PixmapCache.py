@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from typing import Optional, Any
+from PySide6.QtGui import QPixmap
+
+from GameTile import TileImages
+
+
+class PixmapCache:
+    '''
+    Least recently used cache of tile images, limited to a number of bytes.
+
+    Tiles that are evicted aren't lost, they just have to be loaded again
+    from the (much smaller) thumbnails on disk.
+    '''
+
+    def __init__(self, maxBytes: int) -> None:
+        self.maxBytes = maxBytes
+        self.currentBytes = 0
+        self.entries: OrderedDict[int, TileImages] = OrderedDict()
+        'Cached images by game id, least recently used first'
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        'Counts for tuning maxBytes (see stats), shown in the --profile-startup report and FrameOverlay'
+
+
+    def get(self, id: int) -> Optional[TileImages]:
+        images = self.entries.get(id)
+        if images is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(id)
+        return images
+
+    def put(self, id: int, images: TileImages) -> None:
+        self.remove(id)
+
+        self.entries[id] = images
+        self.currentBytes += imagesSize(images)
+
+        while self.currentBytes > self.maxBytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.currentBytes -= imagesSize(evicted)
+            self.evictions += 1
+
+    def remove(self, id: int) -> None:
+        images = self.entries.pop(id, None)
+        if images is not None:
+            self.currentBytes -= imagesSize(images)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.currentBytes = 0
+
+
+    def hitRate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'entries': len(self.entries),
+            'bytes': self.currentBytes,
+            'maxBytes': self.maxBytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hitRate': self.hitRate(),
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f'PixmapCache({len(self.entries)} entries, {self.currentBytes}/{self.maxBytes} bytes, '
+            f'{self.hits} hits, {self.misses} misses, {self.evictions} evictions)'
+        )
+
+
+
+def pixmapSize(pixmap: QPixmap) -> int:
+    'Approximate number of bytes used by a pixmap'
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+def imagesSize(images: TileImages) -> int:
+    return pixmapSize(images.base) + pixmapSize(images.expanded)
@@ -0,0 +1,201 @@
+import os, threading
+from typing import Optional, Any
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from storage import LibraryGame
+from steam import getInstallPath
+
+
+class Prefetcher(QObject):
+    '''
+    Warms up the page cache for the selected game, since it's usually launched a few seconds later.
+
+    Once the selection has stayed on a game for `settleDelay` ms, the game's executable and then the biggest
+    files in its install folder are read ahead with posix_fadvise(WILLNEED) on a background thread.
+    A native game's install folder is the one its executable is in, unless that is shared with other things
+    (see isSharedFolder), in which case only the executable is prefetched. At most `budget` bytes are
+    prefetched per game (less if the system is low on memory), and prefetching stops as soon as
+    a different game is selected.
+    '''
+
+    finished = Signal(int, int)
+    'Emitted with the game id and the number of bytes prefetched, unless it was cancelled'
+
+    def __init__(self, budget: int, settleDelay: int = 750, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+
+        self.budget = budget
+        self.game: Optional[LibraryGame] = None
+        'Game waiting for the selection to settle'
+        self.task: Optional[_PrefetchTask] = None
+
+        # Its own pool, so prefetching never holds up loading images
+        self.threadPool = QThreadPool(self)
+        self.threadPool.setMaxThreadCount(1)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(settleDelay)
+        self.timer.timeout.connect(self.start)
+
+        self._signals = _PrefetchSignals(self)
+        self._signals.finished.connect(self.handleFinished)
+
+
+    def schedule(self, game: LibraryGame) -> None:
+        'Prefetch a game once the selection has settled on it'
+        self.cancel()
+        self.game = game
+        self.timer.start()
+
+    def cancel(self) -> None:
+        self.timer.stop()
+        self.game = None
+        if self.task is not None:
+            self.task.cancelled.set()
+            self.threadPool.tryTake(self.task)
+            self.task = None
+
+    def start(self) -> None:
+        if self.game is None:
+            return
+
+        # Lazily loaded game data can only be read on the GUI thread. Working out what to prefetch from it
+        # (e.g. parsing a Steam manifest) happens on the task's thread
+        budget = min(self.budget, availableMemory() // 4)
+        self.task = _PrefetchTask(self.game['id'], self.game['source'], dict(self.game['data']), budget, self._signals)
+        self.game = None
+        self.threadPool.start(self.task)
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self.threadPool.waitForDone()
+
+
+    def handleFinished(self, id: int, prefetched: int) -> None:
+        if self.task is not None and self.task.id == id and not self.task.cancelled.is_set():
+            self.task = None
+            self.finished.emit(id, prefetched)
+
+
+
+def prefetchTargets(source: str, data: dict[str, Any]) -> tuple[list[str], list[str]]:
+    'Returns the files to prefetch first, and the folders to prefetch the biggest files from, for a game\'s source and data'
+    if source == 'native':
+        filepath = data['filepath']
+        folder = os.path.dirname(os.path.abspath(filepath))
+        return [filepath], [folder] if not isSharedFolder(folder) else []
+    elif source == 'steam' and data.get('libraryPath'):
+        installPath = getInstallPath(data['libraryPath'], data['appID'])
+        return [], [installPath] if installPath is not None else []
+    elif source == 'heroic' and data.get('installPath'):
+        return [], [data['installPath']]
+
+    return [], []
+
+def isSharedFolder(folder: str) -> bool:
+    '''
+    Whether a folder is likely to hold more than one game, or things that aren't games at all
+    (e.g. ~, ~/Games, ~/Downloads or /usr/bin), so only a native game's executable should be prefetched from it.
+    '''
+    home = os.path.expanduser('~')
+    # Don't prefetch the whole of /usr/bin for games that are installed system wide
+    systemFolders = {os.path.abspath(path) for path in os.getenv('PATH', '').split(os.pathsep) if path != ''}
+    return (
+        folder in systemFolders
+        or (home + os.sep).startswith(folder.rstrip(os.sep) + os.sep)
+        or os.path.dirname(folder) == home
+    )
+
+def availableMemory() -> int:
+    'Returns MemAvailable from /proc/meminfo in bytes, or a large number if it isn\'t available'
+    try:
+        with open('/proc/meminfo', 'r') as file:
+            for line in file:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 2 ** 62
+
+def prefetchFile(path: str, limit: int, cancelled: threading.Event, chunkSize: int = 16 * 1024 * 1024) -> int:
+    '''
+    Ask the kernel to read up to limit bytes of a file into the page cache.
+    Returns the number of bytes requested.
+    '''
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return 0
+
+    requested = 0
+    try:
+        size = min(os.fstat(fd).st_size, limit)
+        # In chunks, so cancelling doesn't have to wait for a huge file
+        while requested < size and not cancelled.is_set():
+            length = min(chunkSize, size - requested)
+            os.posix_fadvise(fd, requested, length, os.POSIX_FADV_WILLNEED)
+            requested += length
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+    return requested
+
+def biggestFiles(folders: list[str], cancelled: threading.Event, maxFiles: int = 20000) -> list[tuple[int, str]]:
+    'Returns (size, path) of the files in folders, biggest first. Only the first maxFiles files are looked at.'
+    files: list[tuple[int, str]] = []
+    stack = list(folders)
+    while len(stack) > 0 and len(files) < maxFiles and not cancelled.is_set():
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        files.append((entry.stat(follow_symlinks=False).st_size, entry.path))
+                except OSError:
+                    continue
+
+    files.sort(reverse=True)
+    return files
+
+
+class _PrefetchSignals(QObject):
+    finished = Signal(int, int)
+
+
+class _PrefetchTask(QRunnable):
+    def __init__(self, id: int, source: str, data: dict[str, Any], budget: int, signals: _PrefetchSignals) -> None:
+        super().__init__()
+
+        self.id = id
+        self.source = source
+        self.data = data
+        self.budget = budget
+        self.signals = signals
+        self.cancelled = threading.Event()
+        # Prefetcher keeps track of the task, so Qt mustn't delete it
+        self.setAutoDelete(False)
+
+    def run(self) -> None:
+        files, folders = prefetchTargets(self.source, self.data)
+        remaining = self.budget
+        done = set()
+        for path in files:
+            remaining -= prefetchFile(path, remaining, self.cancelled)
+            done.add(os.path.abspath(path))
+
+        for _size, path in biggestFiles(folders, self.cancelled):
+            if remaining <= 0 or self.cancelled.is_set():
+                break
+            if path not in done:
+                remaining -= prefetchFile(path, remaining, self.cancelled)
+
+        self.signals.finished.emit(self.id, self.budget - remaining)
@@ -0,0 +1,331 @@
+import os, time, shutil, platform, errno, ctypes
+from enum import Enum
+from functools import cache, partial
+from typing import Optional, Callable
+from PySide6.QtCore import QObject, QProcess, QProcessEnvironment, QIODevice, Signal
+
+import storage
+from storage import Config, LibraryGame, LaunchProfile, Session, getLaunchProfile, rotateLog, parseIOPriority, IO_PRIORITY_CLASSES
+from steam import getInstallPath
+from SteamLaunchTracker import SteamLaunchTracker
+
+
+class ProcessState(Enum):
+    STARTING = 'starting'
+    RUNNING = 'running'
+    EXITED = 'exited'
+    CRASHED = 'crashed'
+    'The process crashed, was killed or failed to start'
+
+
+class GameProcess:
+    'A launched game'
+
+    def __init__(self, id: int, process: QProcess, logPath: str) -> None:
+        self.id = id
+        self.process = process
+        self.logPath = logPath
+        self.state = ProcessState.STARTING
+        self.exitCode: Optional[int] = None
+        self.launchTime = time.time()
+        self.launchClock = time.monotonic()
+        'Same as launchTime, but for measuring durations'
+        self.startClock: Optional[float] = None
+        'time.monotonic() when the game started running'
+        self.stopRequested = False
+        'Whether stop was called, so being killed doesn\'t count as crashing'
+        self.tracker: Optional[SteamLaunchTracker] = None
+        'Follows the real game process for Steam and Heroic games, since the process we start exits straight away'
+
+    def isRunning(self) -> bool:
+        return self.state in (ProcessState.STARTING, ProcessState.RUNNING)
+
+    def session(self) -> Session:
+        'Returns the record of this launch. Only valid once the game has finished.'
+        endClock = time.monotonic()
+        crashed = self.state == ProcessState.CRASHED
+        return Session(
+            gameID = self.id,
+            launchTime = self.launchTime,
+            spawnTime = self.startClock - self.launchClock if self.startClock is not None else None,
+            duration = endClock - self.startClock if self.startClock is not None else 0.0,
+            exitCode = self.exitCode if not crashed else None,
+            crashed = crashed,
+        )
+
+
+class ProcessManager(QObject):
+    '''
+    Launches games and keeps track of them by game id. Any number of games can run at once.
+
+    Each game's stdout and stderr are written straight to its log file in storage.LOG_FOLDER,
+    instead of into pipes that nobody reads (which stalls the game once the pipe buffer is full).
+    Logs are rotated when a game is launched, keeping `logBackups` old logs once a log is bigger than `maxLogSize` bytes.
+
+    Steam games are started with `steamCommand`, and then followed with a SteamLaunchTracker.
+    So are Heroic games, which are started through their heroic:// link.
+
+    Native games are started with their launch profile from `config` (see storage.LaunchProfile), if it is given.
+    '''
+
+    stateChanged = Signal(int, object)
+    'Emitted with the game id and its new ProcessState'
+    sessionFinished = Signal(object)
+    'Emitted with a storage.Session when a game exits or crashes'
+
+    def __init__(
+        self,
+        maxLogSize: int = 1024 * 1024,
+        logBackups: int = 3,
+        steamCommand: str = 'steam',
+        config: Optional[Config] = None,
+        parent: Optional[QObject] = None
+    ) -> None:
+        super().__init__(parent)
+
+        self.config = config
+
+        self.maxLogSize = maxLogSize
+        self.logBackups = logBackups
+        self.steamCommand = steamCommand
+        self.processes: dict[int, GameProcess] = {}
+        'The most recent launch of each game, by game id. Finished launches are kept so their state can be shown.'
+
+
+    def launch(self, game: LibraryGame) -> bool:
+        '''
+        Start a game. Does nothing if it is already running.
+
+        Returns:
+            bool: Whether the game was started
+        '''
+        if self.isRunning(game['id']):
+            return False
+
+        program, args = launchCommand(game)
+        if game['source'] == 'steam':
+            program = self.steamCommand
+
+        logPath = getLogPath(game['id'])
+        rotateLog(logPath, self.maxLogSize, self.logBackups)
+
+        process = QProcess(self)
+        process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+        process.setStandardOutputFile(logPath, QIODevice.OpenModeFlag.Append)
+
+        gameProcess = GameProcess(game['id'], process, logPath)
+        self.processes[game['id']] = gameProcess
+
+        if game['source'] == 'native' and self.config is not None:
+            profile = getLaunchProfile(self.config, game)
+            program, args = self.applyProfile(process, profile, program, args)
+
+        tracker: Optional[SteamLaunchTracker] = None
+        if game['source'] == 'steam':
+            appID = game['data']['appID']
+            # Games added by hand might not say which library they're in. They can still be found by their app id
+            libraryPath = game['data'].get('libraryPath')
+            installPath = getInstallPath(libraryPath, appID) if libraryPath is not None else None
+            tracker = SteamLaunchTracker(appID, installPath, parent=self)
+        elif game['source'] == 'heroic':
+            # There's no Steam app id in the environment of Heroic games, so they are found by their install folder
+            tracker = SteamLaunchTracker(None, game['data'].get('installPath') or None, parent=self)
+
+        if tracker is not None:
+            tracker.gameStarted.connect(lambda: self.setState(gameProcess, ProcessState.RUNNING))
+            tracker.gameExited.connect(lambda _found: self.handleTrackerFinished(gameProcess))
+            gameProcess.tracker = tracker
+            tracker.start()
+        else:
+            process.started.connect(lambda: self.setState(gameProcess, ProcessState.RUNNING))
+        process.finished.connect(lambda exitCode, exitStatus: self.handleFinished(gameProcess, exitCode, exitStatus))
+        process.errorOccurred.connect(lambda error: self.handleError(gameProcess, error))
+
+        self.stateChanged.emit(game['id'], ProcessState.STARTING)
+        process.start(program, args)
+        return True
+
+    def applyProfile(self, process: QProcess, profile: LaunchProfile, program: str, args: list[str]) -> tuple[str, list[str]]:
+        'Set up process to use a launch profile. Returns the program and arguments to start, wrappers included.'
+        if len(profile.env) > 0:
+            environment = QProcessEnvironment.systemEnvironment()
+            for name, value in profile.env.items():
+                environment.insert(name, str(value))
+            process.setProcessEnvironment(environment)
+
+        if profile.workingDirectory is not None:
+            process.setWorkingDirectory(os.path.expanduser(profile.workingDirectory))
+
+        command, unapplied = profileCommand(profile, program, args)
+        if unapplied != LaunchProfile():
+            # The tools to do it before exec aren't installed, so do it as soon as the process exists instead.
+            # Anything the game starts before then won't get these settings
+            process.started.connect(lambda: applyToProcess(process.processId(), unapplied))
+
+        return command[0], command[1:]
+
+    def stop(self, id: int) -> None:
+        'Ask a game to close'
+        gameProcess = self.processes.get(id)
+        if gameProcess is not None and gameProcess.isRunning():
+            gameProcess.stopRequested = True
+            if gameProcess.tracker is not None:
+                # Don't close Steam itself
+                gameProcess.tracker.terminate()
+            else:
+                gameProcess.process.terminate()
+
+
+    def state(self, id: int) -> Optional[ProcessState]:
+        'Returns the state of the most recent launch of a game, or None if it hasn\'t been launched'
+        gameProcess = self.processes.get(id)
+        return gameProcess.state if gameProcess is not None else None
+
+    def isRunning(self, id: int) -> bool:
+        gameProcess = self.processes.get(id)
+        return gameProcess is not None and gameProcess.isRunning()
+
+    def runningIDs(self) -> list[int]:
+        return [id for id, gameProcess in self.processes.items() if gameProcess.isRunning()]
+
+
+    def setState(self, gameProcess: GameProcess, state: ProcessState) -> None:
+        if gameProcess.state == state:
+            return
+        gameProcess.state = state
+        if state == ProcessState.RUNNING:
+            gameProcess.startClock = time.monotonic()
+
+        self.stateChanged.emit(gameProcess.id, state)
+        if not gameProcess.isRunning():
+            self.sessionFinished.emit(gameProcess.session())
+
+    def handleFinished(self, gameProcess: GameProcess, exitCode: int, exitStatus: QProcess.ExitStatus) -> None:
+        if gameProcess.tracker is not None:
+            # Only the request to Steam has finished. The tracker decides when the game has
+            self.releaseProcess(gameProcess)
+            return
+
+        gameProcess.exitCode = exitCode
+        if exitStatus == QProcess.ExitStatus.CrashExit and not gameProcess.stopRequested:
+            self.setState(gameProcess, ProcessState.CRASHED)
+        else:
+            self.setState(gameProcess, ProcessState.EXITED)
+        self.releaseProcess(gameProcess)
+
+    def handleError(self, gameProcess: GameProcess, error: QProcess.ProcessError) -> None:
+        # Crashes are handled by handleFinished, but a game that fails to start never finishes
+        if error == QProcess.ProcessError.FailedToStart:
+            if gameProcess.tracker is not None:
+                gameProcess.tracker.stop()
+                self.releaseTracker(gameProcess)
+            self.setState(gameProcess, ProcessState.CRASHED)
+            self.releaseProcess(gameProcess)
+
+    def handleTrackerFinished(self, gameProcess: GameProcess) -> None:
+        # We can't get the exit code of a process that isn't ours
+        self.setState(gameProcess, ProcessState.EXITED)
+        self.releaseTracker(gameProcess)
+
+    def releaseTracker(self, gameProcess: GameProcess) -> None:
+        if gameProcess.tracker is not None:
+            gameProcess.tracker.deleteLater()
+
+    def releaseProcess(self, gameProcess: GameProcess) -> None:
+        gameProcess.process.deleteLater()
+
+
+
+def launchCommand(game: LibraryGame) -> tuple[str, list[str]]:
+    'Returns the program and arguments that start a game'
+    if game['source'] == 'steam':
+        return 'steam', [f'steam://rungameid/{game["data"]["appID"]}']
+    elif game['source'] == 'heroic':
+        return 'xdg-open', [f'heroic://launch?appName={game["data"]["appName"]}&runner={game["data"]["runner"]}']
+    elif game['source'] == 'native':
+        if 'args' not in game['data'].keys():
+            raise AttributeError("Entry in library file missing args")
+        return game['data']['filepath'], game['data']['args']
+
+    raise ValueError(f'Can\'t launch games from {game["source"]}')
+
+@cache
+def hasTool(name: str) -> bool:
+    return shutil.which(name) is not None
+
+def profileCommand(profile: LaunchProfile, program: str, args: list[str]) -> tuple[list[str], LaunchProfile]:
+    '''
+    Returns the command that starts program with a launch profile's priority, CPU affinity and wrappers.
+
+    They are set with a chain of small programs that each change one thing and then exec the next one,
+    so they apply from the very start and are inherited by everything the game starts.
+    Also returns the settings that couldn't be applied because the program for them isn't installed.
+    '''
+    prefix: list[str] = []
+    unapplied = LaunchProfile()
+
+    if profile.nice is not None:
+        if hasTool('nice'):
+            prefix += ['nice', '-n', str(profile.nice)]
+        else:
+            unapplied = unapplied._replace(nice=profile.nice)
+
+    if profile.ioPriority is not None:
+        if hasTool('ionice'):
+            ioClass, level = parseIOPriority(profile.ioPriority)
+            # -t: still start the game if the priority can't be set (realtime needs root)
+            prefix += ['ionice', '-t', '-c', str(ioClass)]
+            if level is not None:
+                prefix += ['-n', str(level)]
+        else:
+            unapplied = unapplied._replace(ioPriority=profile.ioPriority)
+
+    if profile.cpuAffinity is not None:
+        if hasTool('taskset'):
+            prefix += ['taskset', '-c', ','.join(str(cpu) for cpu in profile.cpuAffinity)]
+        else:
+            unapplied = unapplied._replace(cpuAffinity=profile.cpuAffinity)
+
+    for wrapper in profile.wrappers:
+        prefix += wrapper
+
+    return prefix + [program] + args, unapplied
+
+def applyToProcess(pid: int, profile: LaunchProfile) -> None:
+    'Set the nice level, I/O priority and CPU affinity of a process that is already running, as far as allowed'
+    settings: list[Callable[[], None]] = []
+    if profile.nice is not None:
+        settings.append(partial(os.setpriority, os.PRIO_PROCESS, pid, profile.nice))
+    if profile.ioPriority is not None:
+        settings.append(partial(setIOPriority, pid, *parseIOPriority(profile.ioPriority)))
+    if profile.cpuAffinity is not None:
+        settings.append(partial(os.sched_setaffinity, pid, profile.cpuAffinity))
+
+    # e.g. a realtime I/O priority needs root, but that shouldn't stop the CPU affinity being set
+    for setting in settings:
+        try:
+            setting()
+        except OSError:
+            pass
+
+SYS_IOPRIO_SET = {'x86_64': 251, 'i386': 289, 'i686': 289, 'aarch64': 30, 'armv7l': 314, 'riscv64': 30}
+'ioprio_set system call numbers, which Python has no wrapper for'
+
+def setIOPriority(pid: int, ioClass: int, level: Optional[int]) -> None:
+    'Set the I/O priority of a process the way ionice does. Raises OSError if it can\'t be set.'
+    number = SYS_IOPRIO_SET.get(platform.machine())
+    if number is None:
+        raise OSError(errno.ENOSYS, f'Don\'t know how to call ioprio_set on {platform.machine()}')
+
+    if level is None:
+        # What ionice uses. The idle class has no levels
+        level = 0 if ioClass == IO_PRIORITY_CLASSES['idle'] else 4
+
+    # IOPRIO_WHO_PROCESS, and the class in the top bits of the priority
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.syscall(number, 1, pid, (ioClass << 13) | level) != 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error))
+
+def getLogPath(id: int) -> str:
+    return os.path.join(storage.LOG_FOLDER, f'{id}.log')
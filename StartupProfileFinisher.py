@@ -0,0 +1,85 @@
+import sys, time
+from typing import Optional
+from PySide6.QtCore import QObject, QEvent, QTimer
+from PySide6.QtWidgets import QApplication
+
+from startup_profile import startupProfiler, formatReport
+from ImageLoader import ImageLoader
+
+
+class StartupProfileFinisher(QObject):
+    '''
+    Ends a --profile-startup run.
+
+    Marks the first frame once the first paint has finished, then waits for the artwork of the tiles
+    on screen to load (or for timeout ms), and saves the report.
+    '''
+
+    def __init__(
+        self,
+        app: QApplication,
+        imageLoader: ImageLoader,
+        gameCount: int,
+        reportPath: str,
+        statsPath: Optional[str] = None,
+        quitWhenDone: bool = False,
+        timeout: int = 10000,
+    ) -> None:
+        '''
+        Initialise StartupProfileFinisher. Create it just before starting the event loop.
+
+        Args:
+            app (QApplication): The application, whose events are watched for the first paint
+            imageLoader (ImageLoader): Loads the tiles' artwork
+            gameCount (int): Number of games in the library, to put in the report
+            reportPath (str): Where to write the JSON report
+            statsPath (Optional[str]): Where to write the cProfile stats, if they're being recorded. Defaults to None
+            quitWhenDone (bool): Quit once the report is saved, e.g. for tracking startup time in scripts. Defaults to False
+            timeout (int): Milliseconds to wait for artwork after the first frame. Defaults to 10000
+        '''
+        super().__init__(app)
+
+        self.app = app
+        self.imageLoader = imageLoader
+        self.gameCount = gameCount
+        self.reportPath = reportPath
+        self.statsPath = statsPath
+        self.quitWhenDone = quitWhenDone
+        self.timeout = timeout
+        self.painted = False
+        self.firstFrameTime = 0.0
+
+        self.artworkTimer = QTimer(self)
+        self.artworkTimer.setInterval(5)
+        self.artworkTimer.timeout.connect(self.checkArtwork)
+
+        app.installEventFilter(self)
+
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if not self.painted and event.type() == QEvent.Type.Paint:
+            self.painted = True
+            # Runs after the rest of this paint, so the frame is finished
+            QTimer.singleShot(0, self.firstFrame)
+        return False
+
+    def firstFrame(self) -> None:
+        startupProfiler.mark('first frame')
+        self.app.removeEventFilter(self)
+        self.firstFrameTime = time.perf_counter()
+        self.artworkTimer.start()
+
+    def checkArtwork(self) -> None:
+        timedOut = (time.perf_counter() - self.firstFrameTime) * 1000 > self.timeout
+        if len(self.imageLoader.pending) > 0 and not timedOut:
+            return
+
+        self.artworkTimer.stop()
+        startupProfiler.mark('artwork loaded' if not timedOut else 'artwork timed out')
+        startupProfiler.stop()
+        report = startupProfiler.save(self.reportPath, self.gameCount, self.statsPath, self.imageLoader.cache.stats())
+        print(formatReport(report), file=sys.stderr)
+        print(f'Startup profile saved to {self.reportPath}', file=sys.stderr)
+
+        if self.quitWhenDone:
+            self.app.quit()
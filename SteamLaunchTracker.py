@@ -0,0 +1,221 @@
+import os, signal
+from typing import Optional
+from PySide6.QtCore import QObject, QSocketNotifier, QTimer, Signal
+
+
+class SteamLaunchTracker(QObject):
+    '''
+    Follows a game launched through Steam.
+
+    `steam steam://rungameid/...` just asks the Steam client to start the game and exits straight away,
+    so the game's real processes are found by scanning /proc for processes with the app's
+    SteamAppId/SteamGameId in their environment, or running from its install folder.
+
+    Games launched through Heroic (`xdg-open heroic://launch?...`) are followed the same way, without an app id,
+    so they are only found by their install folder.
+
+    /proc is only scanned (every `searchInterval` ms) until the game is found, for up to `timeout` ms.
+    After that, each process is watched with a pidfd, so nothing is polled while the game is running.
+    On kernels without pidfd_open, the processes are polled every `pollInterval` ms instead.
+    '''
+
+    gameStarted = Signal()
+    'Emitted when the game\'s processes have been found'
+    gameExited = Signal(bool)
+    'Emitted when every one of the game\'s processes has exited. The argument is whether the game was ever found.'
+
+    def __init__(
+        self,
+        appID: Optional[str],
+        installPath: Optional[str] = None,
+        timeout: int = 120000,
+        searchInterval: int = 1000,
+        pollInterval: int = 2000,
+        parent: Optional[QObject] = None
+    ) -> None:
+        '''
+        Initialise SteamLaunchTracker. Call start after launching the game.
+
+        Args:
+            appID (Optional[str]): Steam app id of the game, or None for games from other launchers
+            installPath (Optional[str]): Folder the game is installed in, if known. Defaults to None
+            timeout (int): How long to look for the game before giving up, in ms. Defaults to 120000,
+                since Steam might have to start or update the game first
+            searchInterval (int): How often to scan /proc while looking for the game, in ms. Defaults to 1000
+            pollInterval (int): How often to check the processes are still running without pidfd, in ms. Defaults to 2000
+            parent (Optional[QObject]): Defaults to None
+        '''
+        super().__init__(parent)
+
+        self.appID = appID
+        self.installPath = installPath
+        self.pids: set[int] = set()
+        'Processes of the game that are still running'
+        self.found = False
+        self.finished = False
+        self._notifiers: dict[int, tuple[int, QSocketNotifier]] = {}
+        'pidfd and its notifier, by pid'
+
+        self.searchTimer = QTimer(self)
+        self.searchTimer.setInterval(searchInterval)
+        self.searchTimer.timeout.connect(self.search)
+        self.timeoutTimer = QTimer(self)
+        self.timeoutTimer.setSingleShot(True)
+        self.timeoutTimer.setInterval(timeout)
+        self.timeoutTimer.timeout.connect(self.handleTimeout)
+        self.pollTimer = QTimer(self)
+        self.pollTimer.setInterval(pollInterval)
+        self.pollTimer.timeout.connect(self.poll)
+
+
+    def start(self) -> None:
+        if self.appID is None and self.installPath is None:
+            # Nothing to look for, so the game can't be followed
+            QTimer.singleShot(0, self.finish)
+            return
+        self.searchTimer.start()
+        self.timeoutTimer.start()
+
+    def terminate(self) -> None:
+        'Ask the game\'s processes to close'
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.processExited(pid)
+
+    def stop(self) -> None:
+        'Stop tracking the game, without emitting gameExited'
+        self.finished = True
+        self.searchTimer.stop()
+        self.timeoutTimer.stop()
+        self.pollTimer.stop()
+        for pid in list(self._notifiers.keys()):
+            self.unwatch(pid)
+        self.pids.clear()
+
+
+    def search(self) -> None:
+        pids = findGameProcesses(self.appID, self.installPath)
+        if len(pids) == 0:
+            return
+
+        self.searchTimer.stop()
+        self.timeoutTimer.stop()
+        for pid in pids:
+            self.watch(pid)
+
+        if not self.found:
+            self.found = True
+            self.gameStarted.emit()
+
+        if len(self.pids) == 0:
+            # They all exited before we could watch them
+            self.finish()
+
+    def handleTimeout(self) -> None:
+        if not self.found:
+            self.finish()
+
+
+    def watch(self, pid: int) -> None:
+        self.pids.add(pid)
+        try:
+            fd = os.pidfd_open(pid) # type: ignore
+        except AttributeError:
+            # Not Linux, or Python was built without pidfd_open
+            self.pollTimer.start()
+            return
+        except ProcessLookupError:
+            self.pids.discard(pid)
+            return
+        except OSError:
+            # Kernel older than 5.3
+            self.pollTimer.start()
+            return
+
+        # A pidfd becomes readable when the process exits
+        notifier = QSocketNotifier(fd, QSocketNotifier.Type.Read, self)
+        notifier.activated.connect(lambda _socket, _type, pid=pid: self.processExited(pid))
+        self._notifiers[pid] = (fd, notifier)
+
+    def unwatch(self, pid: int) -> None:
+        watched = self._notifiers.pop(pid, None)
+        if watched is None:
+            return
+        fd, notifier = watched
+        notifier.setEnabled(False)
+        notifier.deleteLater()
+        os.close(fd)
+
+    def poll(self) -> None:
+        for pid in list(self.pids):
+            if pid not in self._notifiers and not processExists(pid):
+                self.processExited(pid)
+
+    def processExited(self, pid: int) -> None:
+        self.unwatch(pid)
+        self.pids.discard(pid)
+        if len(self.pids) > 0:
+            return
+
+        # Launchers often start the actual game and then exit, so check for anything new
+        for newPid in findGameProcesses(self.appID, self.installPath):
+            self.watch(newPid)
+        if len(self.pids) == 0:
+            self.finish()
+
+    def finish(self) -> None:
+        if self.finished:
+            return
+        self.stop()
+        self.gameExited.emit(self.found)
+
+
+
+def findGameProcesses(appID: Optional[str], installPath: Optional[str] = None) -> list[int]:
+    'Returns the pids of the processes that belong to a Steam game (or, without an app id, that run from installPath)'
+    appIDVariables = (f'SteamAppId={appID}'.encode(), f'SteamGameId={appID}'.encode()) if appID is not None else ()
+    if installPath is not None:
+        installPath = os.path.realpath(installPath) + os.sep
+    ownPid = os.getpid()
+
+    pids = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit() or int(name) == ownPid:
+            continue
+
+        try:
+            with open(f'/proc/{name}/environ', 'rb') as file:
+                environment = file.read().split(b'\0')
+        except OSError:
+            # Exited already, or it's someone else's process
+            continue
+
+        if any(variable in environment for variable in appIDVariables):
+            pids.append(int(name))
+        elif installPath is not None and isRunningFrom(int(name), installPath):
+            pids.append(int(name))
+
+    return pids
+
+def isRunningFrom(pid: int, path: str) -> bool:
+    'Whether a process\'s executable or working directory is inside path, which must end with a separator'
+    for link in ('exe', 'cwd'):
+        try:
+            target = os.readlink(f'/proc/{pid}/{link}')
+        except OSError:
+            continue
+        if (target + os.sep).startswith(path):
+            return True
+    return False
+
+def processExists(pid: int) -> bool:
+    'Whether a process is still running. Zombies (exited, but not yet reaped by their parent) don\'t count.'
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as file:
+            stat = file.read()
+    except OSError:
+        return False
+    # The state comes after the command name, which is in brackets and can contain spaces
+    return stat[stat.rindex(b')') + 2:][:1] != b'Z'
@@ -0,0 +1,69 @@
+from typing import Optional, Callable
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import QObject, QTimer
+
+
+class WindowRegistry(QObject):
+    '''
+    Creates secondary windows (add game, settings, etc.) the first time they are used instead of on startup.
+
+    Each window is registered with a function that builds it. Windows that haven't been used yet can
+    also be built ahead of time with prebuildWhenIdle, one per event loop iteration, so the first frame
+    isn't delayed and opening them later is still instant.
+    '''
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+
+        self.factories: dict[str, Callable[[], QWidget]] = {}
+        self.windows: dict[str, QWidget] = {}
+        'Windows that have been built, by name'
+
+        self._prebuildQueue: list[str] = []
+        self._prebuildTimer = QTimer(self)
+        self._prebuildTimer.setInterval(0)
+        self._prebuildTimer.timeout.connect(self.prebuildNext)
+
+
+    def register(self, name: str, factory: Callable[[], QWidget]) -> None:
+        if name in self.factories:
+            raise ValueError(f'A window called {name} is already registered')
+        self.factories[name] = factory
+
+    def isBuilt(self, name: str) -> bool:
+        return name in self.windows
+
+    def get(self, name: str) -> QWidget:
+        'Returns the window, building it if it hasn\'t been used yet'
+        window = self.windows.get(name)
+        if window is None:
+            window = self.windows[name] = self.factories[name]()
+        return window
+
+    def show(self, name: str) -> QWidget:
+        window = self.get(name)
+        window.show()
+        window.raise_()
+        window.activateWindow()
+        return window
+
+
+    def prebuildWhenIdle(self, delay: int = 0) -> None:
+        '''
+        Build every window that hasn't been used yet in the background, starting after delay ms.
+
+        Args:
+            delay (int): Milliseconds to wait before building the first window. Defaults to 0
+        '''
+        self._prebuildQueue = [name for name in self.factories if name not in self.windows]
+        QTimer.singleShot(delay, self._prebuildTimer.start)
+
+    def prebuildNext(self) -> None:
+        while len(self._prebuildQueue) > 0:
+            name = self._prebuildQueue.pop(0)
+            if name not in self.windows:
+                self.get(name)
+                break
+
+        if len(self._prebuildQueue) == 0:
+            self._prebuildTimer.stop()
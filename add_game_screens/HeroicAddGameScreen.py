@@ -0,0 +1,107 @@
+from functools import partial
+from typing import Callable
+from PySide6.QtWidgets import *
+from PySide6.QtCore import * # type: ignore
+from PySide6.QtGui import * # type: ignore
+
+from storage import Config, Library
+from heroic import HeroicApp, HeroicLibraryScanner, HEROIC_CACHE_FILE, HEROIC_STORES, heroicGame
+from GameImporter import GameImporter
+from add_game_screens.ImportGameScreen import ImportGameScreen
+
+class HeroicAddGameScreen(ImportGameScreen):
+    source = 'heroic'
+    importBatchSize = 50
+    'Number of games added to the library at a time, between which the GUI gets to update'
+
+    def __init__(self, library: Library, config: Config, refreshCallback: Callable[[], None]) -> None:
+        super().__init__(library, config, refreshCallback)
+
+        self.scanner = HeroicLibraryScanner(self.config.heroicPath, HEROIC_CACHE_FILE)
+
+        # Each store has its own files, so they can be parsed at the same time
+        self.scanImporter = GameImporter(maxThreads=len(HEROIC_STORES), parent=self)
+        self.scanImporter.jobFinished.connect(self.storeScanned)
+        self.scanImporter.finished.connect(self.scanFinished)
+        self.scanImporter.jobFailed.connect(partial(self.showError, 'scan a Heroic store'))
+        self.scannedApps: dict[str, HeroicApp] = {}
+
+        self.pendingApps: list[HeroicApp] = []
+        'Apps that are waiting to be added to the library'
+        self.importedCount = 0
+        self.importTotal = 0
+        self.importTimer = QTimer(self)
+        self.importTimer.setInterval(0)
+        self.importTimer.timeout.connect(self.importNextBatch)
+
+
+    def isRunning(self) -> bool:
+        return self.scanImporter.isRunning() or self.importTimer.isActive()
+
+    def scan(self) -> None:
+        if self.isRunning():
+            return
+
+        self.hasScanned = True
+        self.scannedApps = {}
+        self.setRunning(True)
+
+        self.scanImporter.start([
+            partial(self.scanner.scanStore, store)
+            for store in HEROIC_STORES
+        ])
+
+    def storeScanned(self, apps: list[HeroicApp]) -> None:
+        for app in apps:
+            self.scannedApps[app.appName] = app
+
+    def scanFinished(self, _cancelled: bool) -> None:
+        self.scanner.finishScan()
+
+        self.showApps((app.appName, app.name) for app in self.scannedApps.values())
+        self.setRunning(False)
+
+
+    def importGames(self) -> None:
+        if self.isRunning():
+            return
+
+        self.pendingApps = [self.scannedApps[appName] for appName in self.checkedApps()]
+        if len(self.pendingApps) == 0:
+            return
+
+        self.importedCount = 0
+        self.importTotal = len(self.pendingApps)
+        self.updateProgress(0, self.importTotal)
+        self.setRunning(True)
+        self.importTimer.start()
+
+    def importNextBatch(self) -> None:
+        batch = self.pendingApps[:self.importBatchSize]
+        del self.pendingApps[:self.importBatchSize]
+
+        ids = self.library.reserveIDs(len(batch))
+        self.library.addGames([heroicGame(app, id) for app, id in zip(batch, ids)])
+
+        self.removeApps({app.appName for app in batch})
+
+        self.importedCount += len(batch)
+        self.updateProgress(self.importedCount, self.importTotal)
+
+        if len(self.pendingApps) == 0:
+            self.importFinished()
+
+    def importFinished(self) -> None:
+        self.importTimer.stop()
+        self.pendingApps = []
+        # Save everything at once, instead of after every batch
+        self.library.save()
+        self.setRunning(False)
+        self.refreshCallback()
+
+
+    def cancel(self) -> None:
+        self.scanImporter.cancel()
+        if self.importTimer.isActive():
+            # Keep the games that have already been added
+            self.importFinished()
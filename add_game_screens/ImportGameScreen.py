@@ -0,0 +1,134 @@
+from abc import abstractmethod
+from typing import Callable, Iterable
+from PySide6.QtWidgets import *
+from PySide6.QtCore import * # type: ignore
+from PySide6.QtGui import * # type: ignore
+
+from storage import Config, Library
+
+class ImportGameScreen(QWidget):
+    '''
+    Base for screens that import the games installed with another launcher.
+
+    Lists the games a scan found that aren't in the library yet, with buttons to scan again,
+    import the checked games and cancel. Subclasses implement the abstract scan, importGames, cancel and isRunning.
+    The first scan starts when the screen is first shown.
+    '''
+
+    source = ''
+    'Source of the games this screen imports, so games that were already imported can be left out'
+
+    def __init__(self, library: Library, config: Config, refreshCallback: Callable[[], None]) -> None:
+        super().__init__()
+
+        self.library = library
+        self.config = config
+        self.refreshCallback = refreshCallback
+        self.hasScanned = False
+
+        self.appLabel = QLabel('Installed games')
+        self.appList = QListWidget()
+        itemHeight = int(self.appList.fontMetrics().height() * 1.5)
+        self.itemSizeHint = QSize(0, itemHeight)
+
+        self.scanButton = QPushButton(QIcon.fromTheme('view-refresh'), 'Scan')
+        self.scanButton.clicked.connect(self.scan)
+        self.importButton = QPushButton('Import')
+        self.importButton.clicked.connect(self.importGames)
+        self.cancelButton = QPushButton('Cancel')
+        self.cancelButton.clicked.connect(self.cancel)
+        self.cancelButton.setEnabled(False)
+        self.buttonLayout = QHBoxLayout()
+        self.buttonLayout.addWidget(self.scanButton)
+        self.buttonLayout.addWidget(self.importButton)
+        self.buttonLayout.addWidget(self.cancelButton)
+
+        self.progressBar = QProgressBar()
+        self.progressBar.setValue(0)
+
+        self.errorLabel = QLabel()
+        self.errorLabel.setWordWrap(True)
+        self.errorLabel.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.errorLabel.hide()
+
+        self.mainLayout = QVBoxLayout()
+        self.mainLayout.addWidget(self.appLabel)
+        self.mainLayout.addWidget(self.appList)
+        self.mainLayout.addLayout(self.buttonLayout)
+        self.mainLayout.addWidget(self.progressBar)
+        self.mainLayout.addWidget(self.errorLabel)
+
+        self.setLayout(self.mainLayout)
+
+    def showEvent(self, e: QShowEvent) -> None:
+        if not self.hasScanned:
+            self.scan()
+        super().showEvent(e)
+
+
+    # Abstract, so mypy catches subclasses that are missing one. Qt's metaclass doesn't check it at runtime
+    @abstractmethod
+    def isRunning(self) -> bool:
+        'Whether a scan or import is running'
+
+    @abstractmethod
+    def scan(self) -> None: ...
+
+    @abstractmethod
+    def importGames(self) -> None: ...
+
+    @abstractmethod
+    def cancel(self) -> None: ...
+
+
+    def showApps(self, apps: Iterable[tuple[str, str]]) -> None:
+        '''
+        Replace the list with the apps that haven't been imported yet, sorted by name.
+
+        Args:
+            apps (Iterable[tuple[str, str]]): The id each app has in its store, and its name
+        '''
+        self.appList.clear()
+        for externalID, name in sorted(apps, key = lambda app: app[1].lower()):
+            if self.library.hasExternalGame(self.source, externalID):
+                continue
+
+            item = QListWidgetItem(name)
+            item.setData(Qt.ItemDataRole.UserRole, externalID)
+            item.setCheckState(Qt.CheckState.Checked)
+            item.setSizeHint(self.itemSizeHint)
+            self.appList.addItem(item)
+
+    def checkedApps(self) -> list[str]:
+        'Returns the store ids of the apps that are checked'
+        return [
+            self.appList.item(i).data(Qt.ItemDataRole.UserRole)
+            for i in range(self.appList.count())
+            if self.appList.item(i).checkState() == Qt.CheckState.Checked
+        ]
+
+    def removeApps(self, externalIDs: set[str]) -> None:
+        'Remove apps from the list, e.g. once they have been imported'
+        for i in reversed(range(self.appList.count())):
+            if self.appList.item(i).data(Qt.ItemDataRole.UserRole) in externalIDs:
+                self.appList.takeItem(i)
+
+
+    def updateProgress(self, done: int, total: int) -> None:
+        self.progressBar.setMaximum(max(total, 1))
+        self.progressBar.setValue(done)
+
+    def showError(self, action: str, error: Exception) -> None:
+        'Show that a background job failed. Connect GameImporter.jobFailed to it, with action bound.'
+        message = f'Couldn\'t {action}: {error}'
+        self.errorLabel.setText(message if self.errorLabel.isHidden() else f'{self.errorLabel.text()}\n{message}')
+        self.errorLabel.show()
+
+    def setRunning(self, running: bool) -> None:
+        if running:
+            # Errors from the last scan or import
+            self.errorLabel.clear()
+            self.errorLabel.hide()
+        self.scanButton.setEnabled(not running)
+        self.importButton.setEnabled(not running)
+        self.cancelButton.setEnabled(running)
@@ -0,0 +1,107 @@
+from functools import partial
+from typing import Callable
+from PySide6.QtWidgets import *
+from PySide6.QtCore import * # type: ignore
+from PySide6.QtGui import * # type: ignore
+
+from storage import Config, Library, Game
+from steam import SteamApp, SteamLibraryScanner, STEAM_MANIFEST_CACHE_FILE, importSteamArtwork, steamGame
+from GameImporter import GameImporter
+from add_game_screens.ImportGameScreen import ImportGameScreen
+
+class SteamAddGameScreen(ImportGameScreen):
+    source = 'steam'
+
+    def __init__(self, library: Library, config: Config, refreshCallback: Callable[[], None]) -> None:
+        super().__init__(library, config, refreshCallback)
+
+        self.scanner = SteamLibraryScanner(self.config.steamPath, STEAM_MANIFEST_CACHE_FILE)
+
+        # Scanning libraries and copying artwork happen in the background,
+        # a few at a time so slow drives don't get swamped
+        self.scanImporter = GameImporter(maxThreads=4, parent=self)
+        self.scanImporter.jobFinished.connect(self.libraryScanned)
+        self.scanImporter.progress.connect(self.updateProgress)
+        self.scanImporter.finished.connect(self.scanFinished)
+        self.scanImporter.jobFailed.connect(partial(self.showError, 'scan a Steam library'))
+        self.scannedApps: dict[str, SteamApp] = {}
+        self.scannedManifests: set[str] = set()
+
+        self.artworkImporter = GameImporter(maxThreads=4, parent=self)
+        self.artworkImporter.jobFinished.connect(self.gameImported)
+        self.artworkImporter.progress.connect(self.updateProgress)
+        self.artworkImporter.finished.connect(self.importFinished)
+        self.artworkImporter.jobFailed.connect(partial(self.showError, 'import a game'))
+
+
+    def isRunning(self) -> bool:
+        return self.scanImporter.isRunning() or self.artworkImporter.isRunning()
+
+    def scan(self) -> None:
+        if self.isRunning():
+            return
+
+        self.hasScanned = True
+        self.scannedApps = {}
+        self.scannedManifests = set()
+        self.setRunning(True)
+
+        # Each library can be on a different drive, so scan them in parallel
+        self.scanImporter.start([
+            partial(self.scanner.scanLibrary, libraryPath)
+            for libraryPath in self.scanner.libraryPaths()
+        ])
+
+    def libraryScanned(self, result: tuple[dict[str, SteamApp], set[str]] | None) -> None:
+        if result is None:
+            return
+
+        apps, manifestPaths = result
+        self.scannedApps.update(apps)
+        self.scannedManifests |= manifestPaths
+
+    def scanFinished(self, cancelled: bool) -> None:
+        if not cancelled:
+            self.scanner.finishScan(self.scannedManifests)
+
+        self.showApps((app.appID, app.name) for app in self.scannedApps.values())
+        self.setRunning(False)
+
+
+    def importGames(self) -> None:
+        if self.isRunning():
+            return
+
+        apps = [self.scannedApps[appID] for appID in self.checkedApps()]
+        if len(apps) == 0:
+            return
+
+        ids = self.library.reserveIDs(len(apps))
+        steamPath = self.config.steamPath
+        self.setRunning(True)
+
+        self.artworkImporter.start([
+            partial(self.importGame, steamPath, app, id)
+            for app, id in zip(apps, ids)
+        ])
+
+    @staticmethod
+    def importGame(steamPath: str, app: SteamApp, id: int) -> Game:
+        'Runs on the thread pool'
+        importSteamArtwork(steamPath, app.appID, id)
+        return steamGame(app, id)
+
+    def gameImported(self, game: Game) -> None:
+        self.library.addGame(game)
+        self.removeApps({game['data']['appID']})
+
+    def importFinished(self, _cancelled: bool) -> None:
+        # Save everything at once, instead of after every game
+        self.library.save()
+        self.setRunning(False)
+        self.refreshCallback()
+
+
+    def cancel(self) -> None:
+        self.scanImporter.cancel()
+        self.artworkImporter.cancel()
@@ -0,0 +1,7 @@
+#!/bin/sh
+# Stand-in for the Steam client, used by steam_launch.py and tests/test_steam_launch_tracker.py.
+# Like the real one, it starts the game in the background (with SteamAppId set) and exits straight away.
+# The game is a sleep for $FAKE_GAME_DURATION seconds.
+appID="${1#steam://rungameid/}"
+SteamAppId="$appID" nohup sleep "$FAKE_GAME_DURATION" >/dev/null 2>&1 &
+exit 0
@@ -0,0 +1,69 @@
+'''
+Launches a fake Steam game through ProcessManager and measures how long it takes to notice
+the game starting and exiting, and how much time is spent scanning /proc.
+
+A stand-in `steam` script (fake_steam.sh) plays the part of the Steam client: like the real one,
+it starts the game in the background (with SteamAppId set) and exits straight away.
+
+Usage: python benchmarks/steam_launch.py [game duration in seconds]
+'''
+
+import os, sys, time, shutil, tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('XDG_CONFIG_HOME', tempfile.mkdtemp())
+from PySide6.QtCore import QCoreApplication
+
+import storage
+import SteamLaunchTracker
+from ProcessManager import ProcessManager, ProcessState
+
+
+FAKE_STEAM = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_steam.sh')
+
+
+def main(argv: list[str]) -> None:
+    duration = float(argv[1]) if len(argv) > 1 else 3.0
+    app = QCoreApplication(argv)
+
+    root = tempfile.mkdtemp()
+    try:
+        os.makedirs(storage.LOG_FOLDER, exist_ok=True)
+        os.environ['FAKE_GAME_DURATION'] = str(duration)
+
+        # Count the time spent scanning /proc
+        scanTimes: list[float] = []
+        findGameProcesses = SteamLaunchTracker.findGameProcesses
+        def timedFindGameProcesses(*args, **kwargs) -> list[int]:
+            start = time.perf_counter()
+            result = findGameProcesses(*args, **kwargs)
+            scanTimes.append(time.perf_counter() - start)
+            return result
+        SteamLaunchTracker.findGameProcesses = timedFindGameProcesses # type: ignore
+
+        manager = ProcessManager(steamCommand=FAKE_STEAM)
+        events: dict[ProcessState, float] = {}
+        manager.stateChanged.connect(lambda _id, state: events.setdefault(state, time.perf_counter()))
+        manager.stateChanged.connect(lambda _id, state: state == ProcessState.EXITED and app.quit())
+
+        game: storage.Game = {
+            'name': 'Fake game',
+            'id': 0,
+            'source': 'steam',
+            'tags': [],
+            'data': {'appID': '4000000', 'libraryPath': root},
+        }
+        start = time.perf_counter()
+        manager.launch(game)
+        app.exec()
+
+        print(f'{"game found after":<30} {(events[ProcessState.RUNNING] - start) * 1000:8.1f} ms')
+        print(f'{"exit noticed after":<30} {(events[ProcessState.EXITED] - start - duration) * 1000:8.1f} ms')
+        print(f'{"/proc scans":<30} {len(scanTimes):8d}')
+        print(f'{"time per scan":<30} {sum(scanTimes) / max(len(scanTimes), 1) * 1000:8.2f} ms')
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
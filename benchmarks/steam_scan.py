@@ -0,0 +1,144 @@
+'''
+Compares the old line-based Steam library parser from launcher_test.py with steam.SteamLibraryScanner.
+
+Builds a synthetic Steam install by copying the manifests in the .steam/steam/steamapps fixture
+into several library folders, with new app ids.
+
+Usage: python benchmarks/steam_scan.py [libraries] [apps per library]
+'''
+
+import os, sys, time, shutil, tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steam import SteamLibraryScanner
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.steam', 'steam', 'steamapps')
+
+
+def legacyGetSteamTitles(steam_path: str) -> dict:
+    'launcher_test.getSteamTitles before it used SteamLibraryScanner'
+    libraryfolders_path = os.path.join(steam_path, 'steamapps', 'libraryfolders.vdf')
+
+    with open(libraryfolders_path, 'r') as file:
+        app_ids: list[str] = []
+        titles: dict = {}
+        library_path = None
+
+        for line in file:
+            if line.count('"path"') > 0:
+                library_path = line[11:-2]
+                for i in range(7):
+                    file.readline()
+
+                titles[library_path] = {}
+
+                continue
+
+            if line == '\t\t}\n':
+                for appID in app_ids:
+                    with open(os.path.join(library_path, 'steamapps', 'appmanifest_' + appID + '.acf'), 'r') as app_manifest: # type: ignore
+                        for manifest_line in app_manifest:
+                            if manifest_line.count('"name"') > 0:
+                                titles[library_path][appID] = manifest_line.split('"')[3]
+
+                app_ids = []
+                library_path = None
+                continue
+
+            if library_path:
+                app_ids.append(line.split('\t')[3][1:-1])
+
+    return titles
+
+
+def buildSteamFolder(root: str, libraries: int, appsPerLibrary: int) -> str:
+    'Create a fake Steam install in root. Returns the path of the Steam folder.'
+    templates = []
+    for fileName in sorted(os.listdir(FIXTURE)):
+        if fileName.startswith('appmanifest_'):
+            appID = fileName.removeprefix('appmanifest_').removesuffix('.acf')
+            with open(os.path.join(FIXTURE, fileName), 'r') as file:
+                templates.append((appID, file.read()))
+
+    steamPath = os.path.join(root, 'steam')
+    libraryPaths = [steamPath] + [os.path.join(root, f'library{i}') for i in range(1, libraries)]
+
+    lines = ['"libraryfolders"\n', '{\n']
+    nextAppID = 10_000_000
+    for i, libraryPath in enumerate(libraryPaths):
+        os.makedirs(os.path.join(libraryPath, 'steamapps'))
+        lines += [
+            f'\t"{i}"\n', '\t{\n',
+            f'\t\t"path"\t\t"{libraryPath}"\n',
+            '\t\t"label"\t\t""\n',
+            '\t\t"contentid"\t\t"0"\n',
+            '\t\t"totalsize"\t\t"0"\n',
+            '\t\t"update_clean_bytes_tally"\t\t"0"\n',
+            '\t\t"time_last_update_corruption"\t\t"0"\n',
+            '\t\t"apps"\n', '\t\t{\n',
+        ]
+
+        for j in range(appsPerLibrary):
+            templateID, template = templates[j % len(templates)]
+            appID = str(nextAppID)
+            nextAppID += 1
+            manifest = template.replace(f'"{templateID}"', f'"{appID}"', 1)
+            with open(os.path.join(libraryPath, 'steamapps', f'appmanifest_{appID}.acf'), 'w') as file:
+                file.write(manifest)
+            lines.append(f'\t\t\t"{appID}"\t\t"0"\n')
+
+        lines += ['\t\t}\n', '\t}\n']
+    lines.append('}\n')
+
+    with open(os.path.join(steamPath, 'steamapps', 'libraryfolders.vdf'), 'w') as file:
+        file.writelines(lines)
+
+    return steamPath
+
+
+def timeIt(label: str, function, repeats: int = 5) -> None:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    print(f'{label:<40} {min(times) * 1000:8.2f} ms')
+
+
+def main(argv: list[str]) -> None:
+    libraries = int(argv[1]) if len(argv) > 1 else 8
+    appsPerLibrary = int(argv[2]) if len(argv) > 2 else 300
+
+    root = tempfile.mkdtemp()
+    try:
+        steamPath = buildSteamFolder(root, libraries, appsPerLibrary)
+        print(f'{libraries} libraries, {libraries * appsPerLibrary} apps')
+
+        legacy = legacyGetSteamTitles(steamPath)
+        scanned = SteamLibraryScanner(steamPath).scan()
+        assert {path: {appID: app.name for appID, app in apps.items()} for path, apps in scanned.items()} == legacy
+
+        timeIt('legacy parser', lambda: legacyGetSteamTitles(steamPath))
+        timeIt('SteamLibraryScanner, first scan', lambda: SteamLibraryScanner(steamPath).scan())
+
+        scanner = SteamLibraryScanner(steamPath)
+        scanner.scan()
+        timeIt('SteamLibraryScanner, nothing changed', scanner.scan)
+
+        manifests = [
+            os.path.join(dirPath, fileName)
+            for dirPath, _, fileNames in os.walk(root)
+            for fileName in fileNames if fileName.startswith('appmanifest_')
+        ]
+        def touchAndScan() -> None:
+            for path in manifests[::100]:
+                os.utime(path, ns=(time.time_ns(), time.time_ns()))
+            scanner.scan()
+        timeIt('SteamLibraryScanner, 1% changed', touchAndScan)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,86 @@
+'''
+Measures how long each frame of the tile grow/shrink animation takes.
+
+Compares GameTile.paintScaling (scaling while painting) with creating a new scaled pixmap every frame.
+
+Usage: python benchmarks/tile_animation.py [image] [frames]
+'''
+
+import os, sys, time, statistics
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtWidgets import QApplication, QWidget
+from PySide6.QtGui import QImage, QPixmap
+
+from GameTile import GameTile, TileImages, roundTileImage, scaleTileImage
+
+
+IMAGE_HEIGHT = 450
+EXPANDED_IMAGE_HEIGHT = 540
+
+
+def runAnimation(tiles: list[GameTile], container: QWidget, frames: int) -> list[float]:
+    'Shrink the first tile and grow the second one, like MainWindow.tileClicked. Returns the time of each frame'
+    shrinking, growing = tiles
+    frameTimes = []
+
+    for frame in range(frames + 1):
+        progress = frame / frames
+        start = time.perf_counter()
+
+        shrinking.imageWidth = round( # type: ignore
+            shrinking.expandedImageWidth + (shrinking.baseImageWidth - shrinking.expandedImageWidth) * progress
+        )
+        growing.imageWidth = round( # type: ignore
+            growing.baseImageWidth + (growing.expandedImageWidth - growing.baseImageWidth) * progress
+        )
+        # Carousel moves the tiles every frame
+        x = 0
+        for tile in tiles:
+            tile.setGeometry(x, 0, tile.sizeHint().width(), container.height())
+            x += tile.width() + 10
+        container.repaint()
+
+        frameTimes.append(time.perf_counter() - start)
+
+    return frameTimes
+
+
+def main(argv: list[str]) -> None:
+    imagePath = argv[1] if len(argv) > 1 else os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_image.jpg')
+    frames = int(argv[2]) if len(argv) > 2 else 60
+    repeats = 20
+
+    app = QApplication(argv)
+
+    image = roundTileImage(QImage(imagePath))
+    images = TileImages(
+        QPixmap.fromImage(scaleTileImage(image, IMAGE_HEIGHT)),
+        QPixmap.fromImage(scaleTileImage(image, EXPANDED_IMAGE_HEIGHT)),
+    )
+
+    container = QWidget()
+    container.resize(1000, EXPANDED_IMAGE_HEIGHT + 4)
+    tiles = [GameTile(images, IMAGE_HEIGHT, EXPANDED_IMAGE_HEIGHT, container) for _ in range(2)]
+    container.show()
+    app.processEvents()
+
+    for paintScaling in (False, True):
+        GameTile.paintScaling = paintScaling
+        tiles[0].imageWidth = tiles[0].expandedImageWidth # type: ignore
+        tiles[1].imageWidth = tiles[1].baseImageWidth # type: ignore
+
+        frameTimes: list[float] = []
+        for _ in range(repeats):
+            frameTimes += runAnimation(tiles, container, frames)
+            tiles.reverse()
+
+        frameTimes.sort()
+        mean = statistics.mean(frameTimes) * 1000
+        p95 = frameTimes[int(len(frameTimes) * 0.95)] * 1000
+        print(f'paintScaling={paintScaling}: mean {mean:.3f} ms/frame, p95 {p95:.3f} ms/frame')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
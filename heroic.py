@@ -0,0 +1,202 @@
+'''
+Finds the games installed with Heroic Games Launcher (Epic through legendary, GOG, and Amazon through nile).
+'''
+
+import os, json, threading
+from typing import Any, NamedTuple, Optional
+
+import storage
+
+
+HEROIC_CACHE_FILE = os.path.join(storage.CONFIG_FOLDER, 'heroic_library.json')
+_CACHE_VERSION = 1
+
+DEFAULT_HEROIC_PATH = '~/.config/heroic'
+FLATPAK_HEROIC_PATH = '~/.var/app/com.heroicgameslauncher.hgl/config/heroic'
+
+
+class HeroicApp(NamedTuple):
+    appName: str
+    'ID of the game in its store'
+    name: str
+    runner: str
+    'legendary, gog or nile'
+    installPath: str
+
+
+class HeroicStore(NamedTuple):
+    runner: str
+    installedPath: str
+    'File listing the installed games, relative to the Heroic config folder'
+    libraryPath: Optional[str]
+    'File with the titles of the games, if installedPath doesn\'t have them'
+
+
+HEROIC_STORES = [
+    HeroicStore('legendary', os.path.join('legendaryConfig', 'legendary', 'installed.json'), None),
+    HeroicStore('gog', os.path.join('gog_store', 'installed.json'), os.path.join('store_cache', 'gog_library.json')),
+    HeroicStore('nile', os.path.join('nile_config', 'nile', 'installed.json'), os.path.join('store_cache', 'nile_library.json')),
+]
+
+
+class HeroicLibraryScanner:
+    '''
+    Reads the installed games of every store Heroic supports.
+
+    Each store's result is remembered along with the mtime and size of the files it was parsed from
+    (and saved to cachePath, if it is given), so scanning again only parses stores that have changed.
+    '''
+
+    def __init__(self, heroicPath: str = DEFAULT_HEROIC_PATH, cachePath: Optional[str] = None) -> None:
+        self.heroicPath = findHeroicPath(heroicPath)
+        self.cachePath = cachePath
+
+        self._stores: dict[str, tuple[list[Optional[tuple[int, int]]], list[HeroicApp]]] = {}
+        'Apps by runner, with the stats of the files they were parsed from'
+        self.parsedStores = 0
+        'Number of stores that were parsed during the last scan'
+        self._lock = threading.Lock()
+        'Held while _stores and parsedStores are updated, since stores can be scanned in parallel'
+
+        if self.cachePath is not None:
+            self.loadCache()
+
+
+    def scan(self) -> dict[str, list[HeroicApp]]:
+        'Returns the installed apps of each store, by runner'
+        self.parsedStores = 0
+        result = {store.runner: self.scanStore(store) for store in HEROIC_STORES}
+        self.finishScan()
+        return result
+
+    def scanStore(self, store: HeroicStore) -> list[HeroicApp]:
+        '''
+        Returns the installed apps of one store, only parsing its files if they have changed.
+
+        Stores can be scanned in parallel, as long as finishScan is called afterwards.
+        '''
+        paths = [store.installedPath, store.libraryPath]
+        stats = [storage.fileFingerprint(os.path.join(self.heroicPath, path)) if path is not None else None for path in paths]
+
+        cached = self._stores.get(store.runner)
+        if cached is not None and cached[0] == stats:
+            return cached[1]
+
+        apps = parseStore(self.heroicPath, store) if stats[0] is not None else []
+        with self._lock:
+            self._stores[store.runner] = (stats, apps)
+            self.parsedStores += 1
+        return apps
+
+    def finishScan(self) -> None:
+        if self.cachePath is not None and self.parsedStores > 0:
+            self.saveCache()
+
+
+    def loadCache(self) -> None:
+        assert self.cachePath is not None
+        try:
+            with open(self.cachePath, 'r') as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            return
+        if cache.get('version') != _CACHE_VERSION or cache.get('heroicPath') != self.heroicPath:
+            return
+
+        self._stores = {
+            runner: (
+                [tuple(stat) if stat is not None else None for stat in stats],
+                [HeroicApp(*app) for app in apps],
+            )
+            for runner, (stats, apps) in cache['stores'].items()
+        }
+
+    def saveCache(self) -> None:
+        assert self.cachePath is not None
+        storage.writeJSON(self.cachePath, {
+            'version': _CACHE_VERSION,
+            'heroicPath': self.heroicPath,
+            'stores': {
+                runner: [stats, [list(app) for app in apps]]
+                for runner, (stats, apps) in self._stores.items()
+            },
+        })
+
+
+
+def findHeroicPath(heroicPath: str) -> str:
+    'Expand heroicPath, falling back to the Flatpak config folder if the default one doesn\'t exist'
+    path = os.path.expanduser(heroicPath)
+    if heroicPath == DEFAULT_HEROIC_PATH and not os.path.isdir(path):
+        flatpakPath = os.path.expanduser(FLATPAK_HEROIC_PATH)
+        if os.path.isdir(flatpakPath):
+            return flatpakPath
+    return path
+
+def loadJSON(path: str) -> Any:
+    'Returns the contents of a JSON file, or None if it can\'t be read'
+    try:
+        with open(path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def parseStore(heroicPath: str, store: HeroicStore) -> list[HeroicApp]:
+    installed = loadJSON(os.path.join(heroicPath, store.installedPath))
+    titles: dict[str, str] = {}
+    if store.libraryPath is not None:
+        titles = parseTitles(loadJSON(os.path.join(heroicPath, store.libraryPath)))
+
+    if store.runner == 'legendary':
+        # {app_name: {app_name, title, install_path, is_dlc, ...}}
+        entries = list(installed.values()) if isinstance(installed, dict) else []
+    elif store.runner == 'gog':
+        # {installed: [{appName, install_path, is_dlc, ...}]}
+        entries = installed.get('installed', []) if isinstance(installed, dict) else []
+    else:
+        # [{id, path, ...}]
+        entries = installed if isinstance(installed, list) else []
+
+    apps = []
+    for entry in entries:
+        if not isinstance(entry, dict) or entry.get('is_dlc', False):
+            continue
+
+        appName = entry.get('app_name') or entry.get('appName') or entry.get('id')
+        installPath = entry.get('install_path') or entry.get('path') or ''
+        if not isinstance(appName, str) or not isinstance(installPath, str):
+            continue
+
+        name = entry.get('title') or titles.get(appName) or appName
+        apps.append(HeroicApp(appName, str(name), store.runner, installPath))
+
+    return apps
+
+def parseTitles(library: Any) -> dict[str, str]:
+    'Returns the titles in one of Heroic\'s store_cache library files, by app name'
+    if isinstance(library, dict):
+        # gog_library.json uses games, nile_library.json uses library
+        library = library.get('games', library.get('library'))
+    if not isinstance(library, list):
+        return {}
+
+    return {
+        game['app_name']: game['title']
+        for game in library
+        if isinstance(game, dict) and isinstance(game.get('app_name'), str) and isinstance(game.get('title'), str)
+    }
+
+
+def heroicGame(app: HeroicApp, id: int) -> storage.Game:
+    return {
+        'name': app.name,
+        'id': id,
+        'source': 'heroic',
+        'tags': [],
+        'data': {
+            'appName': app.appName,
+            'runner': app.runner,
+            'installPath': app.installPath,
+        },
+    }
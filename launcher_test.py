@@ -3,10 +3,14 @@ import os, json
 import shutil
 import subprocess
 
+from steam import SteamLibraryScanner, STEAM_MANIFEST_CACHE_FILE
+
 steam_path = None
 CONFIG_FOLDER = os.path.join(os.getenv('XDG_CONFIG_HOME', os.path.expanduser('~/.config')), 'PythonGameLauncher')
 CONFIG_FILE = os.path.join(CONFIG_FOLDER, 'config.json')
 GAMES_FILE = os.path.join(CONFIG_FOLDER, 'games.json')
+GAMES_METADATA_FILE = GAMES_FILE + '.meta'
+LIBRARY_DATABASE_FILE = os.path.join(CONFIG_FOLDER, 'library.sqlite3')
 ARTWORK_FOLDER = os.path.join(CONFIG_FOLDER, 'artwork')
 
 
@@ -21,6 +25,12 @@ def readConfig():
     with open(CONFIG_FILE, 'r') as file:
         config = json.load(file)
         steam_path = config['steamPath']
+
+    if config.get('libraryBackend', 'sqlite') != 'json':
+        # games.json is only copied into the database the first time the launcher starts
+        print(f'Warning: the launcher keeps its library in {LIBRARY_DATABASE_FILE}, '
+              'so games added here won\'t show up in it. Set "libraryBackend" to "json" in the config to share games.json, '
+              'and don\'t run both at once.')
     
     return True
 
@@ -39,67 +49,58 @@ def createConfig(steam_path):
 
 
 def getSteamTitles() -> dict:
-    libraryfolders_path = os.path.join(steam_path, 'steamapps', 'libraryfolders.vdf')
-
-    with open(libraryfolders_path, 'r') as file:
-        app_ids = []
-        titles = {}
-        library_path = None
-
-        for line in file:
-            if line.count('"path"') > 0:
-                library_path = line[11:-2]
-                for i in range(7):
-                    file.readline()
-                # print(file.readline().split('\t'))
-                
-                titles[library_path] = {}
+    # Set by readConfig or createConfig before the menu is shown
+    assert steam_path is not None
+    libraries = SteamLibraryScanner(steam_path, STEAM_MANIFEST_CACHE_FILE).scan()
 
-                continue
-            
-            if line == '\t\t}\n':
-                for appID in app_ids:
-                    with open(os.path.join(library_path, 'steamapps', 'appmanifest_' + appID + '.acf'), 'r') as app_manifest:
-                        for manifest_line in app_manifest:
-                            if manifest_line.count('"name"') > 0:
-                                titles[library_path][appID] = manifest_line.split('"')[3]
-
-                app_ids = []
-                library_path = None
-                continue
-            
-            if library_path:
-                app_ids.append(line.split('\t')[3][1:-1])
-    
-    return titles
+    return {
+        library_path: {appID: app.name for appID, app in apps.items()}
+        for library_path, apps in libraries.items()
+    }
+
+
+def gameData(game) -> dict:
+    # The launcher keeps the launch details in data. Entries saved by older versions of this script have them at the top level
+    return game.get('data', game)
 
 
 def getNewID(game_library) -> int:
-    if len(game_library) == 0:
-        return 0
-    else:
-        return max([x['id'] for x in game_library]) + 1
+    # The launcher never reuses the ids of removed games, and keeps the next one in GAMES_METADATA_FILE
+    try:
+        with open(GAMES_METADATA_FILE, 'r') as file:
+            next_id = int(json.load(file)['nextID'])
+    except (OSError, ValueError, KeyError, TypeError):
+        next_id = 0
+
+    return max([next_id] + [x['id'] + 1 for x in game_library])
 
 
 def addSteamGame(game_library, name, appID, library_path, game_id = None):
     if not game_id:
         game_id = getNewID(game_library)
     
-    game_library.append({'name': name, 'appID': appID, 'libraryPath': library_path, 'id': game_id, 'source': 'steam'})
+    game_library.append(steamGame(name, appID, library_path, game_id))
 
 
 def addNativeGame(game_library, name, file_path, game_id = None):
     if not game_id:
         game_id = getNewID(game_library)
     
-    game_library.append({'name': name, 'filepath': os.path.expanduser(file_path), 'id': game_id, 'source': 'native'})
+    game_library.append({
+        'name': name, 'id': game_id, 'source': 'native', 'tags': [],
+        'data': {'filepath': os.path.expanduser(file_path), 'args': []},
+    })
+
+
+def steamGame(name, appID, library_path, game_id) -> dict:
+    return {'name': name, 'id': game_id, 'source': 'steam', 'tags': [], 'data': {'appID': appID, 'libraryPath': library_path}}
 
 
 def addSteamGames(game_library, games, library_path):
     game_id = getNewID(game_library)
 
     for appID, name in games.items():
-        game_library.append({'name': name, 'appID': appID, 'libraryPath': library_path, 'id': game_id, 'source': 'steam'})
+        game_library.append(steamGame(name, appID, library_path, game_id))
         getSteamArtwork(appID, game_id)
 
         game_id += 1
@@ -108,6 +109,8 @@ def addSteamGames(game_library, games, library_path):
 def saveLibrary(game_library):
     game_library.sort(key = lambda x: x['name'].lower().replace('the ', ''))
     
+    with open(GAMES_METADATA_FILE, 'w') as file:
+        json.dump({'nextID': getNewID(game_library)}, file, indent='\t')
     with open(GAMES_FILE, 'w') as file:
         json.dump(game_library, file, indent='\t')
 
@@ -115,12 +118,13 @@ def saveLibrary(game_library):
 def updateSteamLibrary(game_library):
     steam_titles = getSteamTitles()
     games = {}
+    existing_app_ids = {gameData(i)['appID'] for i in game_library if i['source'] == 'steam'}
 
     print('Type q to finish')
 
     for library_path, steam_games in steam_titles.items():
         for appID, name in steam_games.items():
-            if appID in [i['appID'] for i in game_library if i['source'] == 'steam']:
+            if appID in existing_app_ids:
                 continue
             
             user_input = input(f'Add {name} to library? [Y/n]')
@@ -169,16 +173,20 @@ def getSteamArtwork(appID, game_id):
 
 def getLibrarySteamArtwork(game_library):
     for game in filter(lambda x: x['source'] == 'steam', game_library):
-        getSteamArtwork(game['appID'], game['id'])
+        getSteamArtwork(gameData(game)['appID'], game['id'])
 
 
 def launchGame(game):
     print(f'Launching {game["name"]}')
 
+    data = gameData(game)
     if game['source'] == 'steam':
-        command = f'steam steam://rungameid/{game["appID"]}'
+        command = f'steam steam://rungameid/{data["appID"]}'
     elif game['source'] == 'native':
-        command = f'"{game["filepath"]}"'
+        command = f'"{data["filepath"]}"'
+    else:
+        print(f'{game["source"]} games can only be launched from the launcher')
+        return
     subprocess.Popen(command, shell=True)
 
 
@@ -208,11 +216,12 @@ def printLibrary(game_library):
 
     print(f'\n{game["name"]}')
 
+    data = gameData(game)
     if game['source'] == 'steam':
-        print(f'''appID: {game['appID']}
-Location: {game['libraryPath']}''')
+        print(f'''appID: {data['appID']}
+Location: {data.get('libraryPath')}''')
     elif game['source'] == 'native':
-        print(f'Executable: {game["filepath"]}')
+        print(f'Executable: {data["filepath"]}')
     
     print('''
 [l] Launch game
@@ -1,33 +1,72 @@
-import sys
-from typing import Optional, NamedTuple
+import os, sys, time, argparse
+# Imported first so --profile-startup can time the other imports
+from startup_profile import startupProfiler
+from functools import partial
+from typing import Optional
 from PySide6.QtWidgets import *
 from PySide6.QtCore import * # type: ignore
 from PySide6.QtGui import * # type: ignore
+startupProfiler.mark('import PySide6')
 import qdarktheme # type: ignore
+startupProfiler.mark('import qdarktheme')
 
 import storage
-from storage import Config, Library, Game
+from storage import Config, Library, LibraryGame
 from Sidebar import Sidebar, SidebarButton
-from GameTile import GameTile
+from GameTile import GameTile, TileImages, roundTileImage, scaleTileImage
+from ImageLoader import ImageLoader
+from Carousel import Carousel
 from AddGameWindow import AddGameWindow
+from LibraryWatcher import LibraryWatcher
+from ProcessManager import ProcessManager, ProcessState
+from Prefetcher import Prefetcher
+from WindowRegistry import WindowRegistry
+from search import SearchIndex
+from shelves import ShelfView
 from CoupledPropertyAnimation import CoupledPropertyAnimation
-
-
-class GameTileInfo(NamedTuple):
-    tile: GameTile
-    game: Game
-
-class RunningProcess(NamedTuple):
-    process: QProcess
-    id: int
+from StartupProfileFinisher import StartupProfileFinisher
+from FrameMonitor import FrameMonitor, FrameOverlay
+startupProfiler.mark('import launcher modules')
+
+
+def parseArguments(argv: list[str]) -> tuple[argparse.Namespace, list[str]]:
+    'Returns the launcher\'s arguments, and the rest of argv for QApplication'
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--profile-startup', nargs='?', const=os.path.join(storage.LOG_FOLDER, 'startup_profile.json'),
+        metavar='REPORT', help='time each phase of startup and save a JSON report (by default in the log folder)',
+    )
+    parser.add_argument(
+        '--profile-startup-stats', metavar='FILE',
+        help='also save cProfile stats for startup to FILE (implies --profile-startup)',
+    )
+    parser.add_argument(
+        '--profile-startup-exit', action='store_true',
+        help='quit once the startup profile is saved (implies --profile-startup)',
+    )
+    parser.add_argument(
+        '--frame-monitor', nargs='?', const=storage.FRAME_LOG_FILE, metavar='LOG',
+        help='show frame times and key latency in an overlay (F3 hides it), and log every frame to LOG',
+    )
+    arguments, qtArguments = parser.parse_known_args(argv[1:])
+    if arguments.profile_startup is None and (arguments.profile_startup_stats or arguments.profile_startup_exit):
+        arguments.profile_startup = os.path.join(storage.LOG_FOLDER, 'startup_profile.json')
+    return arguments, argv[:1] + qtArguments
 
 
 def main(argv: list[str]) -> None:
+    arguments, argv = parseArguments(argv)
+    if arguments.profile_startup is not None:
+        startupProfiler.start(useCProfile = arguments.profile_startup_stats is not None)
+
     config = Config()
-    library = Library()
+    startupProfiler.mark('Config')
+    library = Library(storage.LIBRARY_BACKENDS[config.libraryBackend]())
+    startupProfiler.mark('Library')
 
 
     app = QApplication(argv)
+    startupProfiler.mark('QApplication')
     
     qss = '''
     QPushButton {
@@ -54,68 +93,107 @@ def main(argv: list[str]) -> None:
     '''
     
     qdarktheme.setup_theme(theme='dark', additional_qss=qss)
+    startupProfiler.mark('qdarktheme.setup_theme')
 
     window = MainWindow(library, config)
     window.show()
-
+    if arguments.frame_monitor is not None:
+        window.enableFrameMonitor(arguments.frame_monitor)
+    elif config.frameMonitor:
+        window.enableFrameMonitor()
+
+    if arguments.profile_startup is not None:
+        StartupProfileFinisher(
+            app,
+            window.imageLoader,
+            len(library.games),
+            arguments.profile_startup,
+            arguments.profile_startup_stats,
+            quitWhenDone = arguments.profile_startup_exit,
+        )
     app.exec()
 
 
 
 class MainWindow(QMainWindow):
+    frameMonitor: Optional[FrameMonitor] = None
+    'Set by enableFrameMonitor'
+    frameOverlay: Optional[FrameOverlay] = None
+
     def __init__(self, library: Library, config: Config) -> None:
         super().__init__()
         
         self.MAIN_CONTENT_PADDING = 20
 
-        self.runningProcess: Optional[RunningProcess] = None
+        self.sessionLog = storage.SessionLog()
+        'Playtime and launch times of every game'
+        self.processManager = ProcessManager(config=config, parent=self)
+        self.processManager.stateChanged.connect(self.processStateChanged)
+        self.processManager.sessionFinished.connect(self.sessionLog.record)
+        self.processManager.sessionFinished.connect(self.sessionFinished)
+        self.prefetcher: Optional[Prefetcher] = None
+        if config.prefetchOnSelect:
+            self.prefetcher = Prefetcher(config.prefetchBudget, parent=self)
         self.library = library
         self.config = config
-        self.addGameWindow = AddGameWindow(self.library, self.config, self.refresh, self)
+        self.shelves = [ShelfView(shelf, library, self.sessionLog) for shelf in config.shelves]
+        self.shelf: Optional[ShelfView] = self.shelves[0] if len(self.shelves) > 0 else None
+        'Shelf selected in the sidebar. None means every game, in the order of library.games'
+        self.searchIndex = SearchIndex(library)
+        self.searchText = ''
+        self.filterTags: set[str] = set()
+        'Only games with every one of these tags are shown'
+        self.windows = WindowRegistry(self)
+        'Secondary windows, built the first time they are opened'
+        self.windows.register('addGame', lambda: AddGameWindow(self.library, self.config, self.refresh, self))
+        startupProfiler.mark('window: session log and indexes')
 
 
         # Sidebar
 
-        testButton1 = SidebarButton(
-            QStaticText('Alphabetical order'),
-            lambda: self.sortGamesByName(True),
-            icon = QIcon.fromTheme('view-sort-ascending-name'),
-        )
-        testButton2 = SidebarButton(
-            QStaticText('Alphabetical order'),
-            lambda: self.sortGamesByName(False),
-            icon = QIcon.fromTheme('view-sort-descending-name'),
-        )
-        self.sidebar = Sidebar(buttons = [testButton1, testButton2])
+        sidebarButtons = [
+            SidebarButton(
+                QStaticText(shelf.shelf.name),
+                partial(self.showShelf, shelf),
+                icon = QIcon.fromTheme(shelf.shelf.icon) if shelf.shelf.icon is not None else None,
+            )
+            for shelf in self.shelves
+        ]
+        self.sidebar = Sidebar(buttons = sidebarButtons)
         self.sidebar.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Expanding)
+        startupProfiler.mark('window: sidebar')
         
         
         # Scroll area with games
         
-        self.scrollLayout = QHBoxLayout()
-        self.scrollLayout.setContentsMargins(self.MAIN_CONTENT_PADDING, 0, self.MAIN_CONTENT_PADDING, self.MAIN_CONTENT_PADDING)
-        self.scrollLayout.setSpacing(10)
         scrollBarHeight = self.style().pixelMetric(QStyle.PixelMetric.PM_ScrollBarExtent)
-        self.tiles: list[GameTileInfo] = []
-        self.defaultImage = QPixmap(600, 900)
-        self.defaultImage.fill(Qt.GlobalColor.white)
         self.imageHeight = 450
         self.expandedImageHeight = 540
-        for i, game in enumerate(library.games):
-            image = storage.getLibraryImage(game['id'])
-            if image is None:
-                image = self.defaultImage
-
-            tile = GameTile(image, self.imageHeight, self.expandedImageHeight, self)
-            tile.clicked.connect(lambda i=i: self.tileClicked(i))
-            self.tiles.append(GameTileInfo(tile, game))
-            self.scrollLayout.addWidget(tile)
+        defaultImage = QImage(600, 900, QImage.Format.Format_RGB32)
+        defaultImage.fill(Qt.GlobalColor.white)
+        defaultImage = roundTileImage(defaultImage)
+        self.defaultImage = TileImages(
+            QPixmap.fromImage(scaleTileImage(defaultImage, self.imageHeight)),
+            QPixmap.fromImage(scaleTileImage(defaultImage, self.expandedImageHeight)),
+        )
+        self.imageLoader = ImageLoader(
+            self.imageHeight, self.expandedImageHeight, config.imageCacheSize, parent=self
+        )
+        self.imageLoader.cleanCache([game['id'] for game in library.games])
         self.selectedTile: Optional[int] = None
 
-        self.scrollWidget = QWidget()
-        self.scrollWidget.setLayout(self.scrollLayout)
         self.scrollArea = AnimatedScrollArea(self)
-        self.scrollArea.setWidget(self.scrollWidget)
+        self.carousel = Carousel(
+            self.scrollArea,
+            self.imageLoader,
+            self.defaultImage,
+            self.imageHeight,
+            self.expandedImageHeight,
+            padding = self.MAIN_CONTENT_PADDING,
+            spacing = 10,
+        )
+        self.carousel.tileClicked.connect(self.tileClicked)
+        self.scrollArea.setWidget(self.carousel)
         self.scrollArea.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
         self.scrollArea.setWidgetResizable(True)
         self.scrollArea.setFrameShape(QFrame.Shape.NoFrame)
@@ -125,6 +203,15 @@ class MainWindow(QMainWindow):
         self.scrollArea.setFixedHeight(
             int(self.expandedImageHeight + scrollBarHeight + self.MAIN_CONTENT_PADDING + 4)
         )
+        startupProfiler.mark('window: image loader and scroll area')
+        self.carousel.setGames(*self.visibleGames())
+        startupProfiler.mark('window: carousel tiles')
+
+        self.libraryWatcher: Optional[LibraryWatcher] = None
+        if config.watchLibrary:
+            self.libraryWatcher = LibraryWatcher(library, config, parent=self)
+            self.libraryWatcher.libraryChanged.connect(self.updateGames)
+            self.libraryWatcher.artworkChanged.connect(self.reloadArtwork)
         
         self.runningAnimations = QSequentialAnimationGroup(self)
         
@@ -144,7 +231,24 @@ class MainWindow(QMainWindow):
         self.addGameButton.setToolTip('Add game')
         self.addGameButton.clicked.connect(self.addGameClicked)
 
+        self.searchInput = QLineEdit()
+        self.searchInput.setPlaceholderText('Search')
+        self.searchInput.setClearButtonEnabled(True)
+        self.searchInput.setFixedHeight(settingsButtonSize)
+        self.searchInput.setMaximumWidth(400)
+        self.searchInput.textChanged.connect(self.searchChanged)
+
+        self.tagFilterMenu = QMenu(self)
+        self.tagFilterMenu.aboutToShow.connect(self.updateTagFilterMenu)
+        self.tagFilterButton = QPushButton(QIcon.fromTheme('view-filter'), '')
+        self.tagFilterButton.setFixedSize(settingsButtonSize, settingsButtonSize)
+        self.tagFilterButton.setIconSize(QSize(settingsIconSize, settingsIconSize))
+        self.tagFilterButton.setToolTip('Filter by tag')
+        self.tagFilterButton.setMenu(self.tagFilterMenu)
+
         topBar = QHBoxLayout()
+        topBar.addWidget(self.searchInput)
+        topBar.addWidget(self.tagFilterButton)
         topBar.addStretch()
         topBar.addWidget(self.addGameButton)
         topBar.addWidget(self.settingsButton)
@@ -209,12 +313,22 @@ class MainWindow(QMainWindow):
         centralWidget.setLayout(layout)
         self.setCentralWidget(centralWidget)
 
+        startupProfiler.mark('window: top bar and layout')
         self.tileClicked(0)
         self.scrollArea.setFocus(Qt.FocusReason.OtherFocusReason)
+
+        # Build the search index a bit at a time once the window is up, so the first search is quick
+        self.searchIndexTimer = QTimer(self)
+        self.searchIndexTimer.timeout.connect(self.buildSearchIndex)
+        QTimer.singleShot(1000, self.searchIndexTimer.start)
+        if config.prebuildWindows:
+            self.windows.prebuildWhenIdle(2000)
         
         self.setMinimumSize(1000, 875)
         self.resize(1200, 875)
+        startupProfiler.mark('window: select first game')
         self.showMaximized()
+        startupProfiler.mark('showMaximized')
         # self.showFullScreen()
     
     
@@ -223,15 +337,16 @@ class MainWindow(QMainWindow):
         
         if index == self.selectedTile:
             return
-        if index >= self.scrollLayout.count():
+        if index < 0 or index >= self.carousel.count():
             return
 
         currTile: Optional[GameTile]
         if self.selectedTile is not None:
-            currTile = self.tiles[self.selectedTile].tile
+            # The old tile might have been recycled if it was scrolled out of view
+            currTile = self.carousel.tileAt(self.selectedTile)
         else:
             currTile = None
-        newTile = self.tiles[index].tile
+        newTile = self.carousel.tile(index)
         
         if animate:
             animationGroup = QParallelAnimationGroup()
@@ -272,102 +387,228 @@ class MainWindow(QMainWindow):
             self.scrollArea.ensureWidgetVisible(newTile, 200, 200)
 
         self.selectedTile = index
-        self.updateGameInfo(self.tiles[index].game)
+        self.carousel.setSelectedIndex(index)
+        self.updateGameInfo(self.carousel.game(index))
+
+        if self.prefetcher is not None and not self.processManager.isRunning(self.carousel.game(index)['id']):
+            self.prefetcher.schedule(self.carousel.game(index))
 
 
-    def updateGameInfo(self, game: Game) -> None:
+    def updateGameInfo(self, game: LibraryGame) -> None:
         self.gameTitle.setText(game['name'])
         if 'description' not in game.keys() or game['description'] is None:
             self.gameDescription.setText('No description')
         else:
             self.gameDescription.setText(game['description'])
-        
-        if self.runningProcess is not None:
-            if game['id'] == self.runningProcess.id:
-                self.playButton.setText('Stop')
-            else:
-                self.playButton.setText('Play')
+
+        self.updatePlayButton(game)
+
+    def updatePlayButton(self, game: LibraryGame) -> None:
+        if self.processManager.isRunning(game['id']):
+            self.playButton.setText('Stop')
+        else:
+            self.playButton.setText('Play')
     
     
     def playButtonClicked(self) -> None:
-        if self.playButton.text() == 'Play':
-            if self.selectedTile is None:
-                return
-            
-            game = self.tiles[self.selectedTile].game
-            self.launchGame(game)
-            self.playButton.setText('Stop')
+        if self.selectedTile is None:
+            return
+
+        game = self.carousel.game(self.selectedTile)
+        if self.processManager.isRunning(game['id']):
+            self.processManager.stop(game['id'])
         else:
-            assert self.runningProcess is not None, "Tried to stop non-existent RunningProcess"
-            
-            self.runningProcess.process.terminate()
+            self.launchGame(game)
 
-    def launchGame(self, game: Game) -> None:
-        if self.runningProcess is not None:
-            QMessageBox.warning(self, 'Game already running', 'Please close the running game before you launch another game')
+    def launchGame(self, game: LibraryGame) -> None:
+        self.processManager.launch(game)
+    
+    def processStateChanged(self, id: int, state: ProcessState) -> None:
+        if self.selectedTile is None:
             return
 
-        process = QProcess()
+        game = self.carousel.game(self.selectedTile)
+        if game['id'] == id:
+            self.updatePlayButton(game)
+    
 
-        if game['source'] == 'steam':
-            process.start('steam', [f'steam://rungameid/{game["data"]["appID"]}'])
-        elif game['source'] == 'native':
-            if 'args' not in game['data'].keys():
-                raise AttributeError("Entry in library file missing args")
+    def showShelf(self, shelf: ShelfView) -> None:
+        self.shelf = shelf
+        self.refresh()
 
-            args = game['data']['args']
-            process.start(game['data']['filepath'], args)
+    def sessionFinished(self, session: storage.Session) -> None:
+        # Connected after sessionLog.record, so the game's stats are already updated
+        shelfChanged = False
+        for shelf in self.shelves:
+            if shelf.gamePlayed(session.gameID) and shelf is self.shelf:
+                shelfChanged = True
+        if shelfChanged:
+            self.updateGames()
 
-        self.runningProcess = RunningProcess(process, game['id'])
-        
-        process.finished.connect(self.processFinished)
-    
-    def processFinished(self) -> None:
-        self.playButton.setText('Play')
-        self.runningProcess = None
     
+    def visibleGames(self) -> tuple[list[LibraryGame], list[int]]:
+        '''
+        Games that should be in the carousel, with the current sort order, search and tag filter.
+        Returns the games and their ids.
+        '''
+        if self.shelf is None:
+            games, orderIDs = self.library.games, self.library.gameIDs()
+        else:
+            games, orderIDs = self.shelf.games(), self.shelf.ids()
 
-    def sortGamesByName(self, ascending: bool = True) -> None:
-        self.library.games.sort(key = lambda x: x['name'], reverse = not ascending)
-        self.refresh()
+        matches = self.searchIndex.search(self.searchText, self.filterTags)
+        if matches is None:
+            return games, orderIDs
+
+        if len(matches) * 8 < len(orderIDs):
+            # Only sort the matches instead of going through the whole shelf
+            positions = self.library.gamePositions() if self.shelf is None else self.shelf.positions()
+            ids = sorted((id for id in matches if id in positions), key = positions.__getitem__)
+        else:
+            ids = [id for id in orderIDs if id in matches]
+        gamesByID = self.library.gamesByID
+        return [gamesByID[id] for id in ids], ids
 
-    
     def refresh(self, selectedTile: int = 0) -> None:
         '''Refreshes game tiles'''
-        for gameTile in self.tiles:
-            self.scrollLayout.removeWidget(gameTile.tile)
-            gameTile.tile.deleteLater()
-        
-        self.tiles = []
-        
-        for i, game in enumerate(self.library.games):
-            image = storage.getLibraryImage(game['id'])
-            if image is None:
-                image = self.defaultImage
-
-            tile = GameTile(image, self.imageHeight, self.expandedImageHeight, self)
-            tile.clicked.connect(lambda i=i: self.tileClicked(i))
-            self.tiles.append(GameTileInfo(tile, game))
-            self.scrollLayout.addWidget(tile)
+        self.carousel.setGames(*self.visibleGames())
         
         self.selectedTile = None
-        self.tileClicked(selectedTile, animate=False)
+        if self.carousel.count() == 0:
+            self.showNoGames()
+        else:
+            self.playButton.setEnabled(True)
+            self.tileClicked(selectedTile, animate=False)
 
-        self.scrollLayout.update()
-        self.scrollWidget.update()
         self.scrollArea.update()
 
+    def updateGames(self) -> None:
+        'Show changes to the library, keeping the selected game selected'
+        selectedID: Optional[int] = None
+        if self.selectedTile is not None and self.selectedTile < self.carousel.count():
+            selectedID = self.carousel.game(self.selectedTile)['id']
+
+        games, ids = self.visibleGames()
+        self.runningAnimations.stop()
+        self.carousel.setGames(games, ids)
+
+        selectedTile = ids.index(selectedID) if selectedID in ids else 0
+        self.selectedTile = None
+        if len(games) == 0:
+            self.showNoGames()
+        else:
+            self.playButton.setEnabled(True)
+            self.tileClicked(selectedTile, animate=False)
+
+    def showNoGames(self) -> None:
+        self.gameTitle.setText('No games found')
+        self.gameDescription.setText('')
+        self.playButton.setEnabled(False)
+        if self.prefetcher is not None:
+            self.prefetcher.cancel()
+
+    def buildSearchIndex(self) -> None:
+        # Around 10 ms at a time, so it doesn't get in the way of animations
+        if not self.searchIndex.buildSome(500):
+            self.searchIndexTimer.stop()
+
+    def searchChanged(self, text: str) -> None:
+        self.searchText = text
+        self.updateGames()
+
+    def updateTagFilterMenu(self) -> None:
+        'Tags can be added while the launcher is open, so the menu is remade every time it is opened'
+        self.tagFilterMenu.clear()
+        for tag in self.config.tags:
+            action = self.tagFilterMenu.addAction(tag)
+            action.setCheckable(True)
+            action.setChecked(tag in self.filterTags)
+            action.toggled.connect(lambda checked, tag=tag: self.tagFilterToggled(tag, checked))
+
+    def tagFilterToggled(self, tag: str, checked: bool) -> None:
+        if checked:
+            self.filterTags.add(tag)
+        else:
+            self.filterTags.discard(tag)
+        self.updateGames()
+
+    def reloadArtwork(self, ids: list[int]) -> None:
+        for id in ids:
+            self.imageLoader.invalidate(id)
+            self.carousel.reloadImage(id)
+
     
     def addGameClicked(self) -> None:
-        self.addGameWindow.show()
+        self.windows.show('addGame')
     
 
+    def closeEvent(self, e: QCloseEvent) -> None:
+        self.imageLoader.shutdown()
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+        if self.frameMonitor is not None:
+            self.frameMonitor.close()
+        super().closeEvent(e)
+
+
+    def enableFrameMonitor(self, logPath: Optional[str] = storage.FRAME_LOG_FILE) -> None:
+        '''
+        Start measuring paint times, dropped frames, the animation queue and key press latency,
+        and show them in an overlay. F3 hides and shows the overlay.
+
+        Args:
+            logPath (Optional[str]): File to log every frame to. Defaults to storage.FRAME_LOG_FILE
+        '''
+        if self.frameMonitor is not None:
+            return
+
+        screen = self.screen()
+        self.frameMonitor = FrameMonitor(
+            self.animationQueueDepth,
+            lambda: self.runningAnimations.state() == QAbstractAnimation.State.Running,
+            screen.refreshRate() if screen is not None else 60.0,
+            logPath,
+            parent = self,
+        )
+        GameTile.frameMonitor = self.frameMonitor
+        Carousel.frameMonitor = self.frameMonitor
+        AnimatedScrollArea.frameMonitor = self.frameMonitor
+        self.frameOverlay = FrameOverlay(self.frameMonitor, self, self.imageLoader.cache.stats)
+        self.frameOverlay.show()
+
+    def event(self, e: QEvent) -> bool:
+        if self.frameMonitor is None or e.type() != QEvent.Type.UpdateRequest:
+            return super().event(e)
+
+        # The whole window is repainted while handling UpdateRequest
+        start = time.perf_counter()
+        result = super().event(e)
+        self.frameMonitor.recordFrame(start, time.perf_counter())
+        return result
+
+    def animationQueueDepth(self) -> int:
+        'Number of selection animations that are running or queued'
+        if self.runningAnimations.state() == QAbstractAnimation.State.Stopped:
+            return 0
+        return numAnimationsLeft(self.runningAnimations)
+
+    def animationQueueFull(self) -> bool:
+        'Whether to ignore a key press instead of queueing another animation, so holding a key doesn\'t queue a bunch of them'
+        full = numAnimationsLeft(self.runningAnimations) > 1
+        if full and self.frameMonitor is not None:
+            self.frameMonitor.keyIgnored()
+        return full
+
+
     def keyPressEvent(self, e: QKeyEvent) -> None:
+        if self.frameMonitor is not None and e.key() in (Qt.Key.Key_Left, Qt.Key.Key_Right):
+            self.frameMonitor.keyPressed()
+
         match e.key():
             case Qt.Key.Key_Left:
                 if not self.sidebar.hasFocus():
                     # Don't queue a bunch of animations at once
-                    if numAnimationsLeft(self.runningAnimations) > 1:
+                    if self.animationQueueFull():
                         return
 
                     if self.selectedTile == 0 or self.selectedTile is None:
@@ -381,7 +622,7 @@ class MainWindow(QMainWindow):
                     self.tileClicked(0)
                 else:
                     # Don't queue a bunch of animations at once
-                    if numAnimationsLeft(self.runningAnimations) > 1:
+                    if self.animationQueueFull():
                         return
                     
                     self.tileClicked(self.selectedTile + 1)
@@ -397,6 +638,9 @@ class MainWindow(QMainWindow):
                     self.playButton.click()
             case Qt.Key.Key_L:
                 self.playButton.setFocus(Qt.FocusReason.OtherFocusReason)
+            case Qt.Key.Key_F3:
+                if self.frameOverlay is not None:
+                    self.frameOverlay.setVisible(not self.frameOverlay.isVisible())
             case Qt.Key.Key_K:
                 print(self.playButton.hasFocus())
                 print(self.keyboardGrabber())
@@ -428,6 +672,9 @@ class PlayButton(QPushButton):
 
 
 class AnimatedScrollArea(QScrollArea):
+    frameMonitor: Optional[FrameMonitor] = None
+    'If set, every paint of the viewport is timed'
+
     def __init__(self, parent: Optional[QWidget] = None) -> None:
         super().__init__(parent)
         
@@ -468,6 +715,15 @@ class AnimatedScrollArea(QScrollArea):
     
     def keyPressEvent(self, e: QKeyEvent) -> None:
         e.ignore()
+
+    def viewportEvent(self, e: QEvent) -> bool:
+        if self.frameMonitor is None or e.type() != QEvent.Type.Paint:
+            return super().viewportEvent(e)
+
+        start = time.perf_counter()
+        result = super().viewportEvent(e)
+        self.frameMonitor.recordScrollAreaPaint(time.perf_counter() - start)
+        return result
         
 
 
@@ -0,0 +1,188 @@
+'''
+Searching the library by name and filtering it by tag.
+'''
+
+from typing import Iterable, Optional
+
+from storage import Library, LibraryGame
+
+
+def normalise(text: str) -> str:
+    return text.casefold()
+
+def trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def shortPrefixes(name: str) -> set[str]:
+    'The first one and two characters of every word, for searching with fewer than 3 characters'
+    return {word[:length] for word in name.split() for length in (1, 2)}
+
+
+class SearchIndex:
+    '''
+    Indexes the games in a Library so they can be searched and filtered quickly.
+
+    Keeps an inverted index from each tag to the ids of the games that have it, and from each trigram
+    (three character substring) of every game's name to the ids of the games whose name contains it.
+    A name search intersects the sets for the query's trigrams, and then only has to check those games.
+    Queries shorter than 3 characters match the start of a word in the name instead.
+
+    When a query just adds characters to the previous one (i.e. while typing),
+    only the games that matched the previous query are checked.
+
+    The index can be built a bit at a time with buildSome (e.g. while the GUI is idle). Whatever is left
+    is built the first time it is used. After that, it is kept up to date through Library.listeners.
+    '''
+
+    def __init__(self, library: Library) -> None:
+        self.library = library
+        self.built = False
+        self._unindexed: Optional[list[LibraryGame]] = None
+        'Games that still need to be indexed while the index is being built'
+
+        self.names: dict[int, str] = {}
+        'Normalised names by game id'
+        self.tags: dict[int, list[str]] = {}
+        self.tagIndex: dict[str, set[int]] = {}
+        self.trigramIndex: dict[str, set[int]] = {}
+        self.prefixIndex: dict[str, set[int]] = {}
+
+        self._lastQuery: Optional[tuple[str, frozenset[str]]] = None
+        self._lastResult: Optional[set[int]] = None
+
+        library.listeners.append(self.update)
+
+
+    def build(self) -> None:
+        self.buildSome(None)
+
+    def buildSome(self, count: Optional[int]) -> bool:
+        '''
+        Index up to count more games (or all of them, if count is None).
+
+        Returns:
+            bool: Whether there are still games left to index
+        '''
+        if self.built:
+            return False
+        if self._unindexed is None:
+            # Indexed from the end, so taking games off the list is cheap
+            self._unindexed = self.library.games[::-1]
+
+        gamesByID = self.library.gamesByID
+        for _ in range(count if count is not None else len(self._unindexed)):
+            if len(self._unindexed) == 0:
+                break
+            game = self._unindexed.pop()
+            # Skip games that were removed, or already indexed by update, since we started
+            if game['id'] not in self.names and gamesByID.get(game['id']) is game:
+                self.addGame(game)
+
+        if len(self._unindexed) == 0:
+            self._unindexed = None
+            self.built = True
+        return not self.built
+
+    def update(self, changed: list[LibraryGame], removed: list[int]) -> None:
+        'Library listener'
+        if not self.built and self._unindexed is None:
+            # Hasn't started being built, so there's nothing to update
+            return
+
+        for id in removed:
+            self.removeGame(id)
+        for game in changed:
+            self.removeGame(game['id'])
+            self.addGame(game)
+
+        self._lastQuery = None
+        self._lastResult = None
+
+    def addGame(self, game: LibraryGame) -> None:
+        id = game['id']
+        name = normalise(game['name'])
+        self.names[id] = name
+        self.tags[id] = list(game['tags'])
+
+        for tag in game['tags']:
+            self.tagIndex.setdefault(tag, set()).add(id)
+        for trigram in trigrams(name):
+            self.trigramIndex.setdefault(trigram, set()).add(id)
+        for prefix in shortPrefixes(name):
+            self.prefixIndex.setdefault(prefix, set()).add(id)
+
+    def removeGame(self, id: int) -> None:
+        name = self.names.pop(id, None)
+        if name is None:
+            return
+
+        for tag in self.tags.pop(id):
+            discard(self.tagIndex, tag, id)
+        for trigram in trigrams(name):
+            discard(self.trigramIndex, trigram, id)
+        for prefix in shortPrefixes(name):
+            discard(self.prefixIndex, prefix, id)
+
+
+    def search(self, text: str = '', tags: Iterable[str] = ()) -> Optional[set[int]]:
+        '''
+        Returns the ids of the games whose name contains text and that have every one of tags.
+        Returns None if there is nothing to filter by, meaning every game matches.
+        '''
+        query = normalise(text).strip()
+        requiredTags = frozenset(tags)
+        if query == '' and len(requiredTags) == 0:
+            return None
+
+        if not self.built:
+            self.build()
+
+        result: Optional[set[int]]
+        if (
+            self._lastQuery is not None and self._lastResult is not None
+            and self._lastQuery[1] == requiredTags and query.startswith(self._lastQuery[0])
+            and len(self._lastQuery[0]) >= 3
+        ):
+            # Typing another character can only remove matches
+            result = {id for id in self._lastResult if query in self.names[id]}
+        else:
+            result = self.filterByTags(requiredTags)
+            if query != '':
+                result = self.filterByName(query, result)
+
+        self._lastQuery = (query, requiredTags)
+        self._lastResult = result
+        return result
+
+    def filterByTags(self, tags: frozenset[str]) -> Optional[set[int]]:
+        'Returns the ids of the games with every tag, or None if tags is empty'
+        if len(tags) == 0:
+            return None
+
+        # Start with the smallest set, so every intersection is as cheap as possible
+        sets = sorted((self.tagIndex.get(tag, set()) for tag in tags), key = len)
+        return sets[0].intersection(*sets[1:])
+
+    def filterByName(self, query: str, candidates: Optional[set[int]]) -> set[int]:
+        'Returns the ids of the games whose name contains query. Only candidates are checked, if it isn\'t None.'
+        if len(query) < 3:
+            matches = set(self.prefixIndex.get(query, set()))
+            if candidates is not None:
+                matches &= candidates
+            return matches
+
+        sets = sorted((self.trigramIndex.get(trigram, set()) for trigram in trigrams(query)), key = len)
+        if candidates is not None:
+            sets.insert(0, candidates)
+            sets.sort(key = len)
+        possible = sets[0].intersection(*sets[1:])
+        # Having every trigram doesn't always mean the query is in the name, e.g. 'abcab' and 'cabc'
+        return {id for id in possible if query in self.names[id]}
+
+
+def discard(index: dict[str, set[int]], key: str, id: int) -> None:
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(id)
+        if len(ids) == 0:
+            del index[key]
@@ -0,0 +1,163 @@
+'''
+Shelves: user-defined views of the library that are filtered by tag and sorted, shown in the sidebar.
+'''
+
+from bisect import bisect_left
+from typing import Any, Callable, Optional
+
+from storage import LibraryGame, Library, SessionLog, Shelf, gameTitle
+
+
+SORT_KEYS: dict[str, Callable[[LibraryGame, SessionLog], Any]] = {
+    'name': lambda game, _sessionLog: gameTitle(game),
+    'recent': lambda game, sessionLog: sessionLog.lastPlayed(game['id']) or 0.0,
+    'playtime': lambda game, sessionLog: sessionLog.playtime(game['id']),
+    'id': lambda game, _sessionLog: game['id'],
+}
+'Keys a Shelf can be sorted by. All of them but name are numbers.'
+
+
+class ShelfView:
+    '''
+    The ordered games on a Shelf.
+
+    The order is worked out the first time the shelf is shown. After that, it is kept up to date one game
+    at a time through Library.listeners (and gamePlayed, since playing a game can change its position),
+    so switching between shelves never has to sort the library again.
+
+    Games are kept sorted by (sort key, title, id), so every game has a unique position that
+    can be found with a binary search. Descending shelves negate the sort key, so games with the same key
+    (e.g. ones that have never been played) are still in title order. Descending name shelves are
+    the ascending list reversed instead.
+    '''
+
+    def __init__(self, shelf: Shelf, library: Library, sessionLog: SessionLog) -> None:
+        if shelf.sortKey not in SORT_KEYS:
+            raise ValueError(f'Unknown sort key {shelf.sortKey!r} for shelf {shelf.name!r}')
+
+        self.shelf = shelf
+        self.library = library
+        self.sessionLog = sessionLog
+        self.requiredTags = frozenset(shelf.tags)
+        self.reversed = not shelf.ascending and shelf.sortKey == 'name'
+        'Whether the shelf is _keys reversed. Other descending shelves negate their sort key instead.'
+
+        self._keys: Optional[list[tuple[Any, str, int]]] = None
+        'Key of every game on the shelf in ascending order, or None if the shelf hasn\'t been built'
+        self._ids: list[int] = []
+        'Id of the game for each key in _keys'
+        self._gameKeys: dict[int, tuple[Any, str, int]] = {}
+        'Key of every game on the shelf, by id'
+        self._orderedIDs: Optional[list[int]] = None
+        'Cached result of ids'
+        self._orderedGames: Optional[list[LibraryGame]] = None
+        '''
+        Cached result of games. Also cleared when a game on the shelf changes without moving,
+        since Library.reload replaces the game with a new object.
+        '''
+        self._positions: Optional[dict[int, int]] = None
+
+        library.listeners.append(self.update)
+
+
+    def matches(self, game: LibraryGame) -> bool:
+        return self.requiredTags.issubset(game['tags'])
+
+    def key(self, game: LibraryGame) -> tuple[Any, str, int]:
+        value = SORT_KEYS[self.shelf.sortKey](game, self.sessionLog)
+        if not self.shelf.ascending and not self.reversed:
+            value = -value
+        return (value, gameTitle(game), game['id'])
+
+    def build(self) -> None:
+        self._keys = sorted(self.key(game) for game in self.library.games if self.matches(game))
+        self._ids = [key[-1] for key in self._keys]
+        self._gameKeys = dict(zip(self._ids, self._keys))
+        self._orderedIDs = None
+        self._orderedGames = None
+        self._positions = None
+
+
+    def games(self) -> list[LibraryGame]:
+        'Games on the shelf, in order. Cached until the shelf changes, so it mustn\'t be modified.'
+        if self._orderedGames is None:
+            gamesByID = self.library.gamesByID
+            self._orderedGames = [gamesByID[id] for id in self.ids()]
+        return self._orderedGames
+
+    def ids(self) -> list[int]:
+        'Ids of the games on the shelf, in order. Cached until the shelf changes, so it mustn\'t be modified.'
+        if self._keys is None:
+            self.build()
+        if self._orderedIDs is None:
+            self._orderedIDs = self._ids[::-1] if self.reversed else list(self._ids)
+        return self._orderedIDs
+
+    def positions(self) -> dict[int, int]:
+        'Index of every game in ids(), by id'
+        if self._positions is None:
+            ids = self.ids()
+            self._positions = dict(zip(ids, range(len(ids))))
+        return self._positions
+
+
+    def update(self, changed: list[LibraryGame], removed: list[int]) -> None:
+        'Library listener. Moves the games that changed to their new positions.'
+        self.moveGames(changed, removed)
+
+    def moveGames(self, changed: list[LibraryGame], removed: list[int]) -> bool:
+        '''
+        Move games that changed to their new positions, and remove the ones that were removed.
+
+        Returns:
+            bool: Whether the shelf changed
+        '''
+        if self._keys is None:
+            # Hasn't been shown yet, so it will be up to date when it is built
+            return False
+
+        shelfChanged = False
+        for id in removed:
+            shelfChanged |= self.removeGame(id)
+        for game in changed:
+            newKey = self.key(game) if self.matches(game) else None
+            if newKey == self._gameKeys.get(game['id']):
+                # Something that doesn't affect the shelf changed, e.g. the description
+                if newKey is not None:
+                    self._orderedGames = None
+                continue
+            self.removeGame(game['id'])
+            if newKey is not None:
+                self.insertGame(newKey)
+            shelfChanged = True
+
+        if shelfChanged:
+            self._orderedIDs = None
+            self._orderedGames = None
+            self._positions = None
+        return shelfChanged
+
+    def gamePlayed(self, id: int) -> bool:
+        'Call after a session is added to the session log. Returns whether the shelf changed.'
+        game = self.library.getGame(id)
+        if game is None:
+            return False
+        return self.moveGames([game], [])
+
+    def insertGame(self, key: tuple[Any, str, int]) -> None:
+        assert self._keys is not None
+        index = bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._ids.insert(index, key[-1])
+        self._gameKeys[key[-1]] = key
+
+    def removeGame(self, id: int) -> bool:
+        'Returns whether the game was on the shelf'
+        assert self._keys is not None
+        key = self._gameKeys.pop(id, None)
+        if key is None:
+            return False
+        index = bisect_left(self._keys, key)
+        del self._keys[index]
+        del self._ids[index]
+        return True
@@ -0,0 +1,195 @@
+'''
+Timing for `python main.py --profile-startup`: when each phase of startup finished, and what the first tiles cost.
+
+Only uses the standard library, so main.py can import it before anything else and time the other imports.
+'''
+
+import os, sys, json, time, platform, cProfile
+from typing import Optional, NamedTuple, Any
+
+
+class TileCost(NamedTuple):
+    'Time Carousel.createTile took for one tile'
+    id: int
+    seconds: float
+    created: bool
+    'Whether a new GameTile was constructed, instead of reusing one from the pool'
+    cached: bool
+    'Whether the artwork was already in memory'
+
+
+class ImageCost(NamedTuple):
+    'Time ImageLoader took to load one game\'s artwork, on its thread pool'
+    id: int
+    seconds: float
+    thumbnail: bool
+    'Whether the cached thumbnails were used, instead of decoding and scaling the original artwork'
+
+
+class StartupProfiler:
+    '''
+    Records when each phase of startup finished.
+
+    mark is always cheap enough to leave in the startup code. Tile and image costs, and the cProfile
+    dump, are only recorded between start and stop (i.e. when --profile-startup is used).
+    '''
+
+    REPORT_VERSION = 1
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        'When this module was imported, which is before main.py imports anything else'
+        self.interpreterStartup = processAge()
+        'Seconds between the process starting and this module being imported, if it is known'
+        self.marks: list[tuple[str, float]] = []
+        'Name of each phase and when it finished'
+        self.recording = False
+        self.stopped = False
+        self.tiles: list[TileCost] = []
+        self.images: list[ImageCost] = []
+        self.profile: Optional[cProfile.Profile] = None
+
+
+    def start(self, useCProfile: bool = False) -> None:
+        '''
+        Start recording tile and image costs.
+
+        Args:
+            useCProfile (bool): Also run cProfile on the GUI thread until stop. Defaults to False
+        '''
+        self.recording = True
+        if useCProfile:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def stop(self) -> None:
+        self.recording = False
+        self.stopped = True
+        if self.profile is not None:
+            self.profile.disable()
+
+    def mark(self, phase: str) -> None:
+        'Record that a phase of startup has finished. It started when the previous phase finished.'
+        if not self.stopped:
+            self.marks.append((phase, time.perf_counter()))
+
+    def recordTile(self, id: int, seconds: float, created: bool, cached: bool) -> None:
+        if self.recording:
+            self.tiles.append(TileCost(id, seconds, created, cached))
+
+    def recordImage(self, id: int, seconds: float, thumbnail: bool) -> None:
+        # Called from ImageLoader's threads, but list.append is atomic
+        if self.recording:
+            self.images.append(ImageCost(id, seconds, thumbnail))
+
+
+    def phases(self) -> list[dict[str, Any]]:
+        'Start and duration of each phase in seconds, relative to when this module was imported'
+        phases = []
+        previous = self.origin
+        for name, finished in self.marks:
+            phases.append({'name': name, 'start': previous - self.origin, 'duration': finished - previous})
+            previous = finished
+        return phases
+
+    def timeTo(self, phase: str) -> Optional[float]:
+        'Seconds from this module being imported until a phase finished'
+        for name, finished in self.marks:
+            if name == phase:
+                return finished - self.origin
+        return None
+
+    def report(self, gameCount: int, imageCache: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+        return {
+            'version': self.REPORT_VERSION,
+            'time': time.time(),
+            'python': sys.version,
+            'platform': platform.platform(),
+            'games': gameCount,
+            'interpreterStartup': self.interpreterStartup,
+            'timeToFirstFrame': self.timeTo('first frame'),
+            'phases': self.phases(),
+            'tiles': summarise(self.tiles) | {'created': sum(tile.created for tile in self.tiles)},
+            'images': summarise(self.images) | {'thumbnails': sum(image.thumbnail for image in self.images)},
+            'imageCache': imageCache,
+        }
+
+    def save(
+        self,
+        reportPath: str,
+        gameCount: int,
+        statsPath: Optional[str] = None,
+        imageCache: Optional[dict[str, Any]] = None
+    ) -> dict[str, Any]:
+        '''
+        Write the JSON report, and the cProfile stats if they were recorded. Returns the report.
+
+        Args:
+            reportPath (str): Where to write the report
+            gameCount (int): Number of games in the library, to put in the report
+            statsPath (Optional[str]): Where to write the cProfile stats, which can be read with pstats.
+                Defaults to None
+            imageCache (Optional[dict[str, Any]]): PixmapCache.stats() of the tile image cache,
+                to put in the report. Defaults to None
+        '''
+        report = self.report(gameCount, imageCache)
+        with open(reportPath, 'w') as file:
+            json.dump(report, file, indent='\t')
+        if statsPath is not None and self.profile is not None:
+            self.profile.dump_stats(statsPath)
+        return report
+
+
+def summarise(costs: list[Any]) -> dict[str, Any]:
+    'Totals for a list of TileCost or ImageCost, along with every item'
+    seconds = [cost.seconds for cost in costs]
+    return {
+        'count': len(costs),
+        'total': sum(seconds),
+        'mean': sum(seconds) / len(seconds) if len(seconds) > 0 else None,
+        'max': max(seconds, default=None),
+        'items': [cost._asdict() for cost in costs],
+    }
+
+def formatReport(report: dict[str, Any]) -> str:
+    'A table of the phases in a report, for printing'
+    lines = [f'{phase["name"]:<40} {phase["duration"] * 1000:8.1f} ms' for phase in report['phases']]
+    if report['interpreterStartup'] is not None:
+        lines.insert(0, f'{"interpreter startup (approx.)":<40} {report["interpreterStartup"] * 1000:8.1f} ms')
+    if report['timeToFirstFrame'] is not None:
+        lines.append(f'{"time to first frame":<40} {report["timeToFirstFrame"] * 1000:8.1f} ms')
+    tiles = report['tiles']
+    if tiles['count'] > 0:
+        lines.append(
+            f'{"tiles":<40} {tiles["count"]:8d}, mean {tiles["mean"] * 1000:.2f} ms, max {tiles["max"] * 1000:.2f} ms, '
+            f'{tiles["created"]} constructed'
+        )
+    images = report['images']
+    if images['count'] > 0:
+        lines.append(
+            f'{"images":<40} {images["count"]:8d}, mean {images["mean"] * 1000:.2f} ms, max {images["max"] * 1000:.2f} ms, '
+            f'{images["thumbnails"]} from cached thumbnails'
+        )
+    imageCache = report.get('imageCache')
+    if imageCache is not None:
+        lookups = imageCache['hits'] + imageCache['misses']
+        lines.append(
+            f'{"image cache":<40} {imageCache["hitRate"] * 100:7.1f}% of {lookups} lookups hit, '
+            f'{imageCache["evictions"]} evictions, {imageCache["bytes"] / 2**20:.1f}/{imageCache["maxBytes"] / 2**20:.0f} MiB'
+        )
+    return '\n'.join(lines)
+
+def processAge() -> Optional[float]:
+    'Seconds since this process started, from /proc (so only to the nearest clock tick). None if it isn\'t available.'
+    try:
+        with open('/proc/self/stat', 'r') as file:
+            # The command name can contain spaces, so split after it
+            fields = file.read().rsplit(')', 1)[1].split()
+        startTicks = int(fields[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - startTicks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+startupProfiler = StartupProfiler()
+'Used by main.py, Carousel and ImageLoader'
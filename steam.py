@@ -0,0 +1,251 @@
+'''
+Finds the games installed in the user's Steam libraries.
+'''
+
+import os, json, threading
+from typing import NamedTuple, Optional
+
+import storage
+import vdf
+
+
+STEAM_MANIFEST_CACHE_FILE = os.path.join(storage.CONFIG_FOLDER, 'steam_manifests.json')
+_CACHE_VERSION = 1
+
+
+class SteamApp(NamedTuple):
+    appID: str
+    name: str
+    installDir: str
+    libraryPath: str
+
+
+class SteamLibraryScanner:
+    '''
+    Finds the apps in every Steam library listed in libraryfolders.vdf.
+
+    The mtime and size of every manifest are remembered (and saved to cachePath, if it is given),
+    so scanning again only parses the manifests that have changed.
+    '''
+
+    def __init__(self, steamPath: str, cachePath: Optional[str] = None) -> None:
+        self.steamPath = os.path.expanduser(steamPath)
+        self.cachePath = cachePath
+
+        self._manifests: dict[str, tuple[int, int, Optional[SteamApp]]] = {}
+        'Parsed manifests by path, with the mtime and size they had when they were parsed'
+        self._libraryFolders: Optional[tuple[int, int, list[str]]] = None
+        'Parsed libraryfolders.vdf, with its mtime and size'
+        self.parsedManifests = 0
+        'Number of manifests that were parsed during the last scan'
+        self._lock = threading.Lock()
+        'Held while _manifests and parsedManifests are updated, since libraries can be scanned in parallel'
+
+        if self.cachePath is not None:
+            self.loadCache()
+
+
+    def libraryPaths(self) -> list[str]:
+        'Paths of every Steam library, including the one in the Steam folder itself'
+        vdfPath = os.path.join(self.steamPath, 'steamapps', 'libraryfolders.vdf')
+        paths = [self.steamPath]
+
+        try:
+            stat = os.stat(vdfPath)
+        except OSError:
+            return paths
+
+        if self._libraryFolders is None or self._libraryFolders[:2] != (stat.st_mtime_ns, stat.st_size):
+            self._libraryFolders = (stat.st_mtime_ns, stat.st_size, parseLibraryFolders(vdfPath))
+
+        # The Steam folder is usually listed too, so get rid of duplicates
+        seen = {os.path.realpath(self.steamPath)}
+        for path in self._libraryFolders[2]:
+            realPath = os.path.realpath(path)
+            if realPath not in seen:
+                seen.add(realPath)
+                paths.append(path)
+
+        return paths
+
+    def scan(self) -> dict[str, dict[str, SteamApp]]:
+        'Returns the apps in each library, by library path and then app id'
+        self.parsedManifests = 0
+        libraries: dict[str, dict[str, SteamApp]] = {}
+        seen: set[str] = set()
+
+        for libraryPath in self.libraryPaths():
+            result = self.scanLibrary(libraryPath)
+            if result is not None:
+                libraries[libraryPath], manifestPaths = result
+                seen |= manifestPaths
+
+        self.finishScan(seen)
+        return libraries
+
+    def scanLibrary(self, libraryPath: str) -> Optional[tuple[dict[str, SteamApp], set[str]]]:
+        '''
+        Returns the apps in one library by app id, and the paths of its manifests.
+        Returns None if the library can't be read.
+
+        Libraries can be scanned in parallel, as long as finishScan is called afterwards.
+        '''
+        try:
+            entries = os.scandir(os.path.join(libraryPath, 'steamapps'))
+        except OSError:
+            return None
+
+        apps: dict[str, SteamApp] = {}
+        manifestPaths: set[str] = set()
+        with entries:
+            for entry in entries:
+                if not (entry.name.startswith('appmanifest_') and entry.name.endswith('.acf')):
+                    continue
+
+                manifestPaths.add(entry.path)
+                app = self.manifest(entry.path, entry.stat(), libraryPath)
+                if app is not None:
+                    apps[app.appID] = app
+
+        return apps, manifestPaths
+
+    def finishScan(self, manifestPaths: set[str]) -> None:
+        'Forget about manifests that have been deleted, and save the cache. manifestPaths are the manifests that were found.'
+        for path in self._manifests.keys() - manifestPaths:
+            del self._manifests[path]
+
+        if self.cachePath is not None and self.parsedManifests > 0:
+            self.saveCache()
+
+    def manifest(self, path: str, stat: os.stat_result, libraryPath: str) -> Optional[SteamApp]:
+        'Returns the app in a manifest, only parsing it if it has changed since last time'
+        cached = self._manifests.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            app = cached[2]
+            if app is None or app.libraryPath == libraryPath:
+                return app
+
+        app = parseManifest(path, libraryPath)
+        with self._lock:
+            self._manifests[path] = (stat.st_mtime_ns, stat.st_size, app)
+            self.parsedManifests += 1
+        return app
+
+
+    def loadCache(self) -> None:
+        assert self.cachePath is not None
+        try:
+            with open(self.cachePath, 'r') as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            return
+        if cache.get('version') != _CACHE_VERSION:
+            return
+
+        self._manifests = {
+            path: (mtime, size, SteamApp(*app) if app is not None else None)
+            for path, (mtime, size, app) in cache['manifests'].items()
+        }
+
+    def saveCache(self) -> None:
+        assert self.cachePath is not None
+        storage.writeJSON(self.cachePath, {
+            'version': _CACHE_VERSION,
+            'manifests': {
+                path: [mtime, size, list(app) if app is not None else None]
+                for path, (mtime, size, app) in self._manifests.items()
+            },
+        })
+
+
+
+def parseLibraryFolders(path: str) -> list[str]:
+    'Returns the library paths in a libraryfolders.vdf file'
+    try:
+        root = vdf.load(path)
+    except (OSError, vdf.VDFError):
+        return []
+
+    folders = vdf.get(root, 'libraryfolders')
+    if not isinstance(folders, dict):
+        return []
+
+    paths = []
+    for key, value in folders.items():
+        if not key.isdigit():
+            # e.g. TimeNextStatsReport
+            continue
+
+        if isinstance(value, dict):
+            libraryPath = vdf.get(value, 'path')
+        else:
+            # Old format, where the value is just the path
+            libraryPath = value
+
+        if isinstance(libraryPath, str):
+            paths.append(libraryPath)
+
+    return paths
+
+def parseManifest(path: str, libraryPath: str) -> Optional[SteamApp]:
+    'Returns the app in an appmanifest_*.acf file, or None if it isn\'t valid'
+    try:
+        # Only reads as far as the keys we need, which is the slow part of a first scan
+        appState = vdf.loadKeys(path, 'AppState', ('appid', 'name', 'installdir'))
+    except (OSError, vdf.VDFError):
+        return None
+    if appState is None:
+        return None
+
+    appID = appState.get('appid')
+    name = appState.get('name')
+    if appID is None or name is None:
+        return None
+
+    return SteamApp(appID, name, appState.get('installdir', ''), libraryPath)
+
+
+def getInstallPath(libraryPath: str, appID: str) -> Optional[str]:
+    'Returns the folder an app is installed in, or None if its manifest can\'t be read'
+    app = parseManifest(os.path.join(libraryPath, 'steamapps', f'appmanifest_{appID}.acf'), libraryPath)
+    if app is None or app.installDir == '':
+        return None
+    return os.path.join(libraryPath, 'steamapps', 'common', app.installDir)
+
+
+def findSteamArtwork(steamPath: str, appID: str) -> dict[str, str]:
+    '''
+    Returns the paths of the artwork Steam has cached for an app, by kind ('library_image' or 'library_banner')
+    '''
+    cachePath = os.path.join(os.path.expanduser(steamPath), 'appcache', 'librarycache')
+    names = {
+        'library_image': 'library_600x900.jpg',
+        'library_banner': 'library_hero.jpg',
+    }
+
+    artwork = {}
+    for kind, name in names.items():
+        # Newer versions of Steam put each app's artwork in its own folder
+        for path in (os.path.join(cachePath, f'{appID}_{name}'), os.path.join(cachePath, appID, name)):
+            if os.path.exists(path):
+                artwork[kind] = path
+                break
+
+    return artwork
+
+def importSteamArtwork(steamPath: str, appID: str, gameID: int) -> None:
+    'Copy the artwork for an app into the launcher\'s artwork folder'
+    for kind, path in findSteamArtwork(steamPath, appID).items():
+        storage.linkOrCopyFile(path, os.path.join(storage.ARTWORK_FOLDER, f'{gameID}_{kind}.jpg'))
+
+def steamGame(app: SteamApp, id: int) -> storage.Game:
+    return {
+        'name': app.name,
+        'id': id,
+        'source': 'steam',
+        'tags': [],
+        'data': {
+            'appID': app.appID,
+            'libraryPath': app.libraryPath,
+        },
+    }
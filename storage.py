@@ -1,11 +1,25 @@
-import os, json
-from typing import Optional, TypedDict, NotRequired, Any
+import os, json, sqlite3, pickle, threading, shutil, fcntl, tempfile
+from bisect import insort
+from collections.abc import MutableMapping
+from typing import Optional, TypedDict, NotRequired, NamedTuple, Any, Iterable, Iterator, Callable, Sequence
 from PySide6.QtGui import QPixmap
 
 CONFIG_FOLDER = os.path.join(os.getenv('XDG_CONFIG_HOME', os.path.expanduser('~/.config')), 'PythonGameLauncher')
 CONFIG_FILE = os.path.join(CONFIG_FOLDER, 'config.json')
 GAMES_FILE = os.path.join(CONFIG_FOLDER, 'games.json')
+LIBRARY_DATABASE_FILE = os.path.join(CONFIG_FOLDER, 'library.sqlite3')
 ARTWORK_FOLDER = os.path.join(CONFIG_FOLDER, 'artwork')
+THUMBNAIL_FOLDER = os.path.join(ARTWORK_FOLDER, 'thumbnails')
+LOG_FOLDER = os.path.join(CONFIG_FOLDER, 'logs')
+SESSIONS_FILE = os.path.join(CONFIG_FOLDER, 'sessions.jsonl')
+SESSION_STATS_FILE = os.path.join(CONFIG_FOLDER, 'session_stats.json')
+FRAME_LOG_FILE = os.path.join(LOG_FOLDER, 'frames.jsonl')
+
+DEFAULT_IMAGE_CACHE_SIZE = 256 * 1024 * 1024
+DEFAULT_PREFETCH_BUDGET = 512 * 1024 * 1024
+
+FICLONE = 0x40049409
+'ioctl request for cloning a file on Linux (reflink), from linux/fs.h'
 
 
 class Config:
@@ -16,6 +30,12 @@ class Config:
         if not os.path.exists(ARTWORK_FOLDER):
             os.mkdir(ARTWORK_FOLDER)
 
+        if not os.path.exists(THUMBNAIL_FOLDER):
+            os.mkdir(THUMBNAIL_FOLDER)
+
+        if not os.path.exists(LOG_FOLDER):
+            os.mkdir(LOG_FOLDER)
+
         if not os.path.exists(CONFIG_FILE):
             with open(CONFIG_FILE, 'w'):
                 pass
@@ -30,15 +50,52 @@ class Config:
         
         self.steamPath: str = config['steamPath']
         self.tags: list[str] = config['tags']
+        self.imageCacheSize: int = config.get('imageCacheSize', DEFAULT_IMAGE_CACHE_SIZE)
+        'Maximum number of bytes of tile images to keep in memory'
+        self.libraryBackend: str = config.get('libraryBackend', 'sqlite')
+        'Where the library is stored, one of LIBRARY_BACKENDS'
+        self.watchLibrary: bool = config.get('watchLibrary', True)
+        'Whether to watch for games being installed and the library or artwork being changed by other programs'
+        self.prefetchOnSelect: bool = config.get('prefetchOnSelect', False)
+        'Whether to start reading the selected game\'s files into the page cache, so it launches faster'
+        self.prefetchBudget: int = config.get('prefetchBudget', DEFAULT_PREFETCH_BUDGET)
+        'Maximum number of bytes to prefetch for a game'
+        self.launchProfiles: dict[str, dict[str, Any]] = config.get('launchProfiles', {})
+        'Named launch profiles (see LaunchProfile) that native games can use through game[\'data\'][\'launchProfile\']'
+        for name, settings in self.launchProfiles.items():
+            try:
+                LaunchProfile.fromDict(settings)
+            except ValueError as error:
+                raise ValueError(f'Launch profile {name!r} in {CONFIG_FILE}: {error}') from error
+        self.defaultLaunchProfile: Optional[str] = config.get('defaultLaunchProfile')
+        'Launch profile every native game starts from, if any'
+        self.heroicPath: str = config.get('heroicPath', '~/.config/heroic')
+        'Heroic Games Launcher\'s config folder'
+        self.shelves: list[Shelf] = [Shelf.fromDict(shelf) for shelf in config.get('shelves') or DEFAULT_SHELVES]
+        'Filtered and sorted views of the library, shown in the sidebar in this order'
+        self.prebuildWindows: bool = config.get('prebuildWindows', True)
+        'Whether to build secondary windows (e.g. add game) in the background after startup, so they open instantly'
+        self.frameMonitor: bool = config.get('frameMonitor', False)
+        'Whether to measure frame times and key latency, show them in an overlay and log them to FRAME_LOG_FILE'
     
     def save(self) -> None:
         config = {
             'steamPath': self.steamPath,
             'tags': self.tags,
+            'imageCacheSize': self.imageCacheSize,
+            'libraryBackend': self.libraryBackend,
+            'heroicPath': self.heroicPath,
+            'watchLibrary': self.watchLibrary,
+            'prefetchOnSelect': self.prefetchOnSelect,
+            'prefetchBudget': self.prefetchBudget,
+            'launchProfiles': self.launchProfiles,
+            'defaultLaunchProfile': self.defaultLaunchProfile,
+            'shelves': [shelf._asdict() for shelf in self.shelves],
+            'prebuildWindows': self.prebuildWindows,
+            'frameMonitor': self.frameMonitor,
         }
         
-        with open(CONFIG_FILE, 'w') as file:
-            json.dump(config, file, indent='\t')
+        writeJSON(CONFIG_FILE, config)
     
     def updateTags(self, tags: list[str]) -> None:
         self.tags = tags
@@ -54,26 +111,591 @@ class Game(TypedDict):
     data: dict[str, Any]
     
 
-class Library:
-    def __init__(self) -> None:
-        self.games: list[Game]
-        
-        if os.path.getsize(GAMES_FILE) > 0:
-            with open(GAMES_FILE, 'r') as file:
-                game_library = json.load(file)
-            
-            self.games = game_library
+class LazyGame(MutableMapping):
+    '''
+    A Game that only loads its name, id, source and tags up front.
+    The description and data are loaded the first time they are used, e.g. when the game is selected.
+
+    Supports the same dict operations as Game, so code that takes a LibraryGame can use either.
+    '''
+
+    __slots__ = ('id', 'name', 'source', 'tags', '_details', '_loadDetails')
+
+    EAGER_KEYS = ('name', 'id', 'source', 'tags')
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        source: str,
+        tags: list[str],
+        loadDetails: Callable[[int], dict[str, Any]]
+    ) -> None:
+        '''
+        Initialise LazyGame
+
+        Args:
+            loadDetails (Callable[[int], dict[str, Any]]):
+                Returns the rest of the game's fields (data, and description if it has one) given its id
+        '''
+        self.id = id
+        self.name = name
+        self.source = source
+        self.tags = tags
+        self._details: Optional[dict[str, Any]] = None
+        self._loadDetails: Optional[Callable[[int], dict[str, Any]]] = loadDetails
+
+    def isLoaded(self) -> bool:
+        return self._details is not None
+
+    def details(self) -> dict[str, Any]:
+        if self._details is None:
+            assert self._loadDetails is not None
+            self._details = self._loadDetails(self.id)
+            # Don't keep the backend alive just for this game
+            self._loadDetails = None
+        return self._details
+
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.EAGER_KEYS:
+            return getattr(self, key)
+        return self.details()[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self.EAGER_KEYS:
+            setattr(self, key, value)
         else:
-            with open(GAMES_FILE, 'w') as file:
-                json.dump([], file, indent='\t')
+            self.details()[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in self.EAGER_KEYS:
+            raise KeyError(f'Can\'t delete {key}')
+        del self.details()[key]
+
+    def __contains__(self, key: object) -> bool:
+        if key in self.EAGER_KEYS:
+            return True
+        return key in self.details()
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.EAGER_KEYS
+        yield from self.details()
+
+    def __len__(self) -> int:
+        return len(self.EAGER_KEYS) + len(self.details())
+
+    def __repr__(self) -> str:
+        return f'LazyGame(id={self.id}, name={self.name!r}, loaded={self.isLoaded()})'
+
+
+LibraryGame = Game | LazyGame
+'A game in a Library. Backends that load the details later (e.g. SQLite) give LazyGames instead of Games.'
+
+
+class LaunchProfile(NamedTuple):
+    '''
+    How to start a native game. Stored as a dict with the same keys, in Config.launchProfiles or
+    game['data']['launchProfile'] (either the name of a profile, or a dict of settings that override the default profile).
+    '''
+    env: dict[str, str] = {}
+    'Environment variables to set, on top of the launcher\'s environment'
+    cpuAffinity: Optional[list[int]] = None
+    'CPUs the game may run on'
+    nice: Optional[int] = None
+    ioPriority: Optional[str] = None
+    'I/O scheduling class: idle, best-effort or realtime, optionally followed by :level (0-7), e.g. best-effort:0'
+    wrappers: list[list[str]] = []
+    'Commands to run the game through, outermost first, e.g. [[\'gamemoderun\'], [\'prlimit\', \'--nofile=524288\']]'
+    workingDirectory: Optional[str] = None
+
+    @staticmethod
+    def fromDict(settings: dict[str, Any]) -> 'LaunchProfile':
+        'Raises ValueError if ioPriority isn\'t valid, so a typo doesn\'t only show up when a game is launched'
+        profile = LaunchProfile(**{key: value for key, value in settings.items() if key in LaunchProfile._fields})
+        if profile.ioPriority is not None:
+            parseIOPriority(profile.ioPriority)
+        return profile
+
+
+IO_PRIORITY_CLASSES = {'realtime': 1, 'best-effort': 2, 'idle': 3}
+'Linux I/O scheduling class numbers, as used by ionice and ioprio_set'
+
+def parseIOPriority(ioPriority: str) -> tuple[int, Optional[int]]:
+    '''
+    Returns the class number and level (None for the default) of a LaunchProfile's ioPriority.
+    Raises ValueError if the class isn't one of IO_PRIORITY_CLASSES or the level isn't 0-7.
+    '''
+    ioClass, _, level = ioPriority.partition(':')
+    if ioClass not in IO_PRIORITY_CLASSES:
+        raise ValueError(f'Unknown I/O priority class {ioClass!r}, expected one of {", ".join(IO_PRIORITY_CLASSES)}')
+    if level == '' or ioClass == 'idle':
+        return IO_PRIORITY_CLASSES[ioClass], None
+    if not level.isdigit() or int(level) > 7:
+        raise ValueError(f'I/O priority level must be 0-7, not {level!r}')
+    return IO_PRIORITY_CLASSES[ioClass], int(level)
+
+
+class Shelf(NamedTuple):
+    '''
+    A view of the library shown in the sidebar: the games with every one of tags, sorted by sortKey.
+    Stored as a dict with the same keys in Config.shelves.
+    '''
+    name: str
+    tags: list[str] = []
+    sortKey: str = 'name'
+    'One of shelves.SORT_KEYS: name, recent (last played), playtime or id'
+    ascending: bool = True
+    icon: Optional[str] = None
+    'Name of a theme icon to show next to the name'
+
+    @staticmethod
+    def fromDict(settings: dict[str, Any]) -> 'Shelf':
+        return Shelf(**{key: value for key, value in settings.items() if key in Shelf._fields})
+
+
+DEFAULT_SHELVES: list[dict[str, Any]] = [
+    {'name': 'Alphabetical order', 'sortKey': 'name', 'ascending': True, 'icon': 'view-sort-ascending-name'},
+    {'name': 'Alphabetical order', 'sortKey': 'name', 'ascending': False, 'icon': 'view-sort-descending-name'},
+    {'name': 'Recently played', 'sortKey': 'recent', 'ascending': False, 'icon': 'document-open-recent'},
+]
+'Shelves used when the config doesn\'t have any'
+
+
+def getLaunchProfile(config: Config, game: LibraryGame) -> LaunchProfile:
+    '''
+    Returns the launch profile for a game.
+
+    Settings from the game override the ones from the default profile,
+    except env, where the variables from both are used.
+    '''
+    settings: dict[str, Any] = dict(config.launchProfiles.get(config.defaultLaunchProfile or '', {}))
+
+    gameSettings = game['data'].get('launchProfile')
+    if isinstance(gameSettings, str):
+        gameSettings = config.launchProfiles.get(gameSettings)
+    if isinstance(gameSettings, dict):
+        env = {**settings.get('env', {}), **gameSettings.get('env', {})}
+        settings.update(gameSettings)
+        settings['env'] = env
+
+    return LaunchProfile.fromDict(settings)
+
+
+def gameTitle(game: LibraryGame) -> str:
+    'Key that sorts games by name, ignoring case and "the"'
+    return game['name'].lower().replace('the ', '')
+
+EXTERNAL_ID_KEYS: dict[str, str] = {
+    'steam': 'appID',
+    'heroic': 'appName',
+}
+'Key in game[\'data\'] that identifies a game in the store it was imported from, by source'
+
+
+LEGACY_DATA_KEYS = ('appID', 'libraryPath', 'filepath', 'args')
+'Keys that games.json entries written by launcher_test.py have at the top level instead of in data'
+
+
+def normaliseGame(game: dict[str, Any]) -> Game:
+    '''
+    Fill in the fields that games.json entries written by launcher_test.py don't have.
+    Those entries have no tags, and keep their launch data (e.g. a Steam game's appID and libraryPath)
+    at the top level instead of in data. The entry is changed in place and returned.
+    '''
+    game.setdefault('tags', [])
+    if 'data' not in game:
+        game['data'] = {key: game.pop(key) for key in LEGACY_DATA_KEYS if key in game}
+    return game # type: ignore
+
+
+def getExternalID(game: LibraryGame) -> Optional[str]:
+    'Returns the id a game has in the store it was imported from, or None for other games'
+    key = EXTERNAL_ID_KEYS.get(game['source'])
+    if key is None:
+        return None
+    return game.get('data', {}).get(key)
+
+
+class LibraryBackend:
+    '''
+    Where a Library is stored. Subclasses must implement load and save.
+    '''
+
+    path: Optional[str] = None
+    'File the library is stored in, if there is one'
+
+    def load(self) -> tuple[list[LibraryGame], Optional[int]]:
+        '''
+        Returns every game and the next id to use,
+        or None for the id if the backend doesn't store it.
+        '''
+        raise NotImplementedError
+
+    def save(self, games: list[LibraryGame], changed: list[LibraryGame], removed: list[int], nextID: int) -> None:
+        '''
+        Save the library.
+
+        Args:
+            games (list[LibraryGame]): Every game in the library
+            changed (list[LibraryGame]): Games that were added or edited since the last save
+            removed (list[int]): IDs of games that were removed since the last save
+            nextID (int): The next id to use
+        '''
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def fingerprint(self) -> Optional[tuple[int, int]]:
+        '''
+        Returns something that changes whenever the stored library changes (e.g. the mtime and size of its file),
+        so changes made by other programs can be noticed. Returns None if the backend can't tell.
+        '''
+        return None
+
+    def loadExternalIDs(self) -> Optional[list[tuple[int, str, str]]]:
+        '''
+        Returns (id, source, external id) for every imported game, if the backend can do it
+        faster than reading every game's data. Returns None otherwise.
+        '''
+        return None
+
+
+class JSONLibraryBackend(LibraryBackend):
+    '''
+    Stores the whole library in games.json. Every save rewrites the whole file.
+
+    games.json is just the list of games (so older versions can still read it),
+    and the next id is kept in a small file next to it.
+
+    To make startup faster, a pickled copy of the library is kept next to games.json.
+    games.json is always the source of truth: the snapshot is only used if it was made
+    from the current version of games.json, and it is remade in the background when it isn't.
+    '''
+
+    SNAPSHOT_VERSION = 2
+    'Version 2: games are normalised (see normaliseGame) before the snapshot is made'
+
+    def __init__(
+        self,
+        path: str = GAMES_FILE,
+        snapshotPath: Optional[str] = None,
+        metadataPath: Optional[str] = None
+    ) -> None:
+        self.path: str = path
+        self.snapshotPath = snapshotPath if snapshotPath is not None else path + '.snapshot'
+        self.metadataPath = metadataPath if metadataPath is not None else path + '.meta'
+        'Where the next id is stored'
+        self._snapshotLock = threading.Lock()
+
+    def load(self) -> tuple[list[LibraryGame], Optional[int]]:
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            writeJSON(self.path, [])
+            return [], self.loadNextID()
+
+        stat = os.stat(self.path)
+        games = self.loadSnapshot(stat)
+        if games is None:
+            with open(self.path, 'r') as file:
+                games = [normaliseGame(game) for game in json.load(file)]
+            self.saveSnapshotInBackground(games, stat)
+
+        return games, self.loadNextID()
+
+    def save(self, games: list[LibraryGame], changed: list[LibraryGame], removed: list[int], nextID: int) -> None:
+        # Written first, so a crash in between can only skip ids, not reuse them
+        writeJSON(self.metadataPath, {'nextID': nextID})
+        writeJSON(self.path, games)
+        self.saveSnapshotInBackground(games, os.stat(self.path))
+
+    def fingerprint(self) -> Optional[tuple[int, int]]:
+        return fileFingerprint(self.path)
+
+
+    def loadNextID(self) -> Optional[int]:
+        try:
+            with open(self.metadataPath, 'r') as file:
+                return int(json.load(file)['nextID'])
+        except (OSError, ValueError, KeyError, TypeError):
+            # Saved by a version that didn't store it
+            return None
+
+    def loadSnapshot(self, stat: os.stat_result) -> Optional[list[LibraryGame]]:
+        'Returns the games in the snapshot, or None if there is no up to date snapshot'
+        try:
+            with open(self.snapshotPath, 'rb') as file:
+                version, mtime, size, games = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            return None
+
+        if version != self.SNAPSHOT_VERSION or (mtime, size) != (stat.st_mtime_ns, stat.st_size):
+            return None
+        return games
+
+    def saveSnapshotInBackground(self, games: list[LibraryGame], stat: os.stat_result) -> None:
+        'Write a snapshot of games, which were loaded from or saved to games.json when it had this stat'
+        # Copy the list so adding games while the snapshot is being written doesn't break it
+        thread = threading.Thread(target=self.saveSnapshot, args=(list(games), stat), name='Library snapshot')
+        thread.start()
+
+    def saveSnapshot(self, games: list[LibraryGame], stat: os.stat_result) -> None:
+        with self._snapshotLock:
+            tempPath = self.snapshotPath + '.tmp'
+            try:
+                with open(tempPath, 'wb') as file:
+                    pickle.dump(
+                        (self.SNAPSHOT_VERSION, stat.st_mtime_ns, stat.st_size, games),
+                        file,
+                        protocol=pickle.HIGHEST_PROTOCOL
+                    )
+                os.replace(tempPath, self.snapshotPath)
+            except (OSError, RuntimeError, pickle.PicklingError):
+                # A game was edited while we were pickling it. games.json is still fine,
+                # so the snapshot will just be remade next time
+                pass
+
+
+class SQLiteLibraryBackend(LibraryBackend):
+    '''
+    Stores the library in an SQLite database, one row per game,
+    so saving only writes the games that changed.
+
+    The first time the database is created, the games in games.json are copied into it.
+    '''
+
+    def __init__(self, path: str = LIBRARY_DATABASE_FILE, migrateFrom: Optional[str] = GAMES_FILE) -> None:
+        self.path: str = path
+        self.connection = sqlite3.connect(path)
+
+        with self.connection:
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS games (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    tags TEXT NOT NULL,
+                    description TEXT,
+                    data TEXT NOT NULL
+                )
+            ''')
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS metadata (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            ''')
+
+        if migrateFrom is not None and self.getMetadata('migrated') is None:
+            self.migrate(migrateFrom)
+
+
+    def migrate(self, jsonPath: str) -> None:
+        'Copy the games from a games.json file. games.json is left alone, as a backup.'
+        games: list[Game] = []
+        if os.path.exists(jsonPath) and os.path.getsize(jsonPath) > 0:
+            with open(jsonPath, 'r') as file:
+                games = [normaliseGame(game) for game in json.load(file)]
+
+        with self.connection:
+            self.upsertGames(games)
+            self.setMetadata('migrated', jsonPath)
+
+    def load(self) -> tuple[list[LibraryGame], Optional[int]]:
+        # Descriptions and data can be big and are only needed once a game is selected,
+        # so they are left in the database until then
+        games: list[LibraryGame] = [
+            LazyGame(id, name, source, json.loads(tags), self.loadDetails)
+            for id, name, source, tags in self.connection.execute('SELECT id, name, source, tags FROM games')
+        ]
+        nextID = self.getMetadata('nextID')
+
+        return games, int(nextID) if nextID is not None else None
+
+    def loadDetails(self, id: int) -> dict[str, Any]:
+        'Load the fields LazyGame doesn\'t load up front'
+        row = self.connection.execute('SELECT description, data FROM games WHERE id = ?', (id,)).fetchone()
+        if row is None:
+            # Removed from the database since the library was loaded
+            return {'data': {}}
+
+        description, data = row
+        details: dict[str, Any] = {'data': json.loads(data)}
+        if description is not None:
+            details['description'] = description
+
+        return details
+
+    def save(self, games: list[LibraryGame], changed: list[LibraryGame], removed: list[int], nextID: int) -> None:
+        # Everything is saved in one transaction, so a crash can't leave the library half saved
+        with self.connection:
+            self.upsertGames(changed)
+            self.connection.executemany('DELETE FROM games WHERE id = ?', [(id,) for id in removed])
+            self.setMetadata('nextID', str(nextID))
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def fingerprint(self) -> Optional[tuple[int, int]]:
+        return fileFingerprint(self.path)
+
+    def loadExternalIDs(self) -> Optional[list[tuple[int, str, str]]]:
+        # Reading them in one query means LazyGame doesn't have to load every game's data
+        result: list[tuple[int, str, str]] = []
+        try:
+            for source, key in EXTERNAL_ID_KEYS.items():
+                result.extend(self.connection.execute(
+                    'SELECT id, source, json_extract(data, ?) FROM games WHERE source = ? AND json_extract(data, ?) IS NOT NULL',
+                    (f'$.{key}', source, f'$.{key}')
+                ))
+        except sqlite3.OperationalError:
+            # SQLite was built without JSON support
+            return None
+
+        return result
 
-            self.games = []
+
+    def upsertGames(self, games: Sequence[LibraryGame]) -> None:
+        self.connection.executemany(
+            '''
+            INSERT INTO games (id, name, source, tags, description, data) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                name = excluded.name,
+                source = excluded.source,
+                tags = excluded.tags,
+                description = excluded.description,
+                data = excluded.data
+            ''',
+            [gameToRow(game) for game in games]
+        )
+
+    def getMetadata(self, key: str) -> Optional[str]:
+        row = self.connection.execute('SELECT value FROM metadata WHERE key = ?', (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def setMetadata(self, key: str, value: str) -> None:
+        self.connection.execute(
+            'INSERT INTO metadata (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+            (key, value)
+        )
+
+
+def gameToRow(game: LibraryGame) -> tuple[int, str, str, str, Optional[str], str]:
+    return (
+        game['id'],
+        game['name'],
+        game['source'],
+        json.dumps(game['tags']),
+        game.get('description'),
+        json.dumps(game['data']),
+    )
+
+
+LIBRARY_BACKENDS: dict[str, Callable[[], LibraryBackend]] = {
+    'sqlite': SQLiteLibraryBackend,
+    'json': JSONLibraryBackend,
+}
+
+
+class Library:
+    '''
+    The games in the library, indexed by id (gamesByID), with a counter for the next id to give a game.
+
+    Sorted views of the library are shelves.ShelfView, one per shelf in the sidebar. Each one is sorted
+    the first time it is shown and then kept up to date through listeners, so they take the place of
+    a cache of sorted copies of the library that would have to be thrown away whenever it changes.
+    '''
+
+    def __init__(self, backend: Optional[LibraryBackend] = None) -> None:
+        self.backend = backend if backend is not None else SQLiteLibraryBackend()
+
+        games, nextID = self.backend.load()
+        # Games are kept in title order, like they used to be saved in games.json
+        self.games: list[LibraryGame] = sorted(games, key = gameTitle)
+
+        self.gamesByID: dict[int, LibraryGame] = {game['id']: game for game in self.games}
+        self.nextID = max(self.gamesByID.keys(), default=-1) + 1
+        'IDs are never reused, even if a game is removed'
+        if nextID is not None:
+            self.nextID = max(self.nextID, nextID)
+        self._gameOrder: Optional[tuple[list[int], dict[int, int]]] = None
+        'Cached results of gameIDs and gamePositions. Cleared whenever the library changes.'
+
+        self._changed: dict[int, LibraryGame] = {}
+        'Games that need to be saved, by id'
+        self._removed: set[int] = set()
+        'IDs of games that need to be deleted when saving'
+        self._externalIDs: Optional[dict[tuple[str, str], int]] = None
+        '''
+        IDs of imported games, by source and the id the game has in that store (see EXTERNAL_ID_KEYS).
+        Built the first time it is needed, then kept up to date as games are added and removed.
+        '''
+        self._externalIDsByGame: dict[int, tuple[str, str]] = {}
+        'Reverse of _externalIDs, so games can be removed from it'
+        self.savedFingerprint = self.backend.fingerprint()
+        'Fingerprint of the backend the last time the library was loaded or saved'
+        self.listeners: list[Callable[[list[LibraryGame], list[int]], None]] = []
+        '''
+        Called with the games that were added or changed and the ids of the games that were removed,
+        whenever the library changes. Used to keep indexes of the library up to date.
+        '''
 
     def save(self) -> None:
-        self.games.sort(key = lambda x: x['name'].lower().replace('the ', ''))
-        
-        with open(GAMES_FILE, 'w') as file:
-            json.dump(self.games, file, indent='\t')
+        'Save the games that have changed since the last save'
+        self.backend.save(self.games, list(self._changed.values()), list(self._removed), self.nextID)
+        self._changed.clear()
+        self._removed.clear()
+        self.savedFingerprint = self.backend.fingerprint()
+
+    def hasExternalChanges(self) -> bool:
+        'Whether another program has changed the stored library since it was loaded or saved'
+        fingerprint = self.backend.fingerprint()
+        return fingerprint is not None and fingerprint != self.savedFingerprint
+
+    def reload(self) -> tuple[list[LibraryGame], list[LibraryGame], list[int]]:
+        '''
+        Load the library again, after another program has changed it.
+        Games with unsaved changes are left alone.
+
+        Returns:
+            tuple[list[LibraryGame], list[LibraryGame], list[int]]: The games that were added, the games that changed,
+            and the ids of the games that were removed
+        '''
+        games, nextID = self.backend.load()
+        self.savedFingerprint = self.backend.fingerprint()
+        loaded = {game['id']: game for game in games}
+
+        added: list[LibraryGame] = []
+        changed: list[LibraryGame] = []
+        for id, game in loaded.items():
+            if id in self._changed or id in self._removed:
+                continue
+            oldGame = self.gamesByID.get(id)
+            if oldGame is None:
+                added.append(game)
+            elif gameChanged(oldGame, game):
+                changed.append(game)
+
+        removed = [id for id in self.gamesByID.keys() if id not in loaded and id not in self._changed]
+
+        if len(added) == 0 and len(changed) == 0 and len(removed) == 0:
+            return added, changed, removed
+
+        for id in removed:
+            del self.gamesByID[id]
+            self.unindexExternalID(id)
+        for game in added + changed:
+            self.gamesByID[game['id']] = game
+            if self._externalIDs is not None:
+                self.unindexExternalID(game['id'])
+                self.indexExternalID(game['id'], game['source'], getExternalID(game))
+
+        self.games = sorted(self.gamesByID.values(), key = gameTitle)
+        self.nextID = max(self.nextID, max(self.gamesByID.keys(), default=-1) + 1, nextID or 0)
+        self.invalidate()
+        self.notifyListeners(added + changed, removed)
+
+        return added, changed, removed
 
     def addNativeGame(
         self,
@@ -100,25 +722,450 @@ class Library:
             },
         }
         
-        self.games.append(game)
+        self.addGame(game)
+
+    def addGame(self, game: LibraryGame) -> None:
+        if game['id'] in self.gamesByID:
+            raise ValueError(f'Game with id {game["id"]} is already in the library')
+
+        insort(self.games, game, key = gameTitle)
+        self.gamesByID[game['id']] = game
+        self.nextID = max(self.nextID, game['id'] + 1)
+        self._markChanged(game)
+        self.notifyListeners([game], [])
+
+    def addGames(self, games: Sequence[LibraryGame]) -> None:
+        '''
+        Add a batch of games, e.g. from an importer.
+        Faster than calling addGame for each one, since the library is only re-sorted once.
+        '''
+        for game in games:
+            if game['id'] in self.gamesByID:
+                raise ValueError(f'Game with id {game["id"]} is already in the library')
+
+        self.games.extend(games)
+        # self.games was already sorted, so this is close to linear
+        self.games.sort(key = gameTitle)
+        for game in games:
+            self.gamesByID[game['id']] = game
+            self.nextID = max(self.nextID, game['id'] + 1)
+            self._markChanged(game)
+        self.notifyListeners(list(games), [])
+
+    def removeGame(self, id: int) -> LibraryGame:
+        game = self.gamesByID.pop(id)
+        self.games.remove(game)
+        self.unindexExternalID(id)
+        self._changed.pop(id, None)
+        self._removed.add(id)
+        self.invalidate()
+        self.notifyListeners([], [id])
+        return game
+
+    def markChanged(self, game: LibraryGame) -> None:
+        'Call after editing a game, so it gets saved'
+        self._markChanged(game)
+        self.notifyListeners([game], [])
+
+    def _markChanged(self, game: LibraryGame) -> None:
+        self._changed[game['id']] = game
+        self._removed.discard(game['id'])
+        if self._externalIDs is not None:
+            self.unindexExternalID(game['id'])
+            self.indexExternalID(game['id'], game['source'], getExternalID(game))
+        self.invalidate()
+
+    def notifyListeners(self, changed: list[LibraryGame], removed: list[int]) -> None:
+        if len(changed) == 0 and len(removed) == 0:
+            return
+        for listener in self.listeners:
+            listener(changed, removed)
+
+    def getGame(self, id: int) -> Optional[LibraryGame]:
+        return self.gamesByID.get(id)
 
     def getNewID(self) -> int:
-        if len(self.games) == 0:
-            return 0
+        return self.nextID
+
+    def findExternalGame(self, source: str, externalID: str) -> Optional[LibraryGame]:
+        '''
+        Find an imported game by the id it has in the store it came from,
+        e.g. findExternalGame('steam', appID). Used to skip games that have already been imported.
+        '''
+        if self._externalIDs is None:
+            self.buildExternalIDIndex()
+            assert self._externalIDs is not None
+
+        id = self._externalIDs.get((source, externalID))
+        return self.gamesByID[id] if id is not None else None
+
+    def hasExternalGame(self, source: str, externalID: str) -> bool:
+        return self.findExternalGame(source, externalID) is not None
+
+    def buildExternalIDIndex(self) -> None:
+        self._externalIDs = {}
+        self._externalIDsByGame = {}
+
+        saved = self.backend.loadExternalIDs()
+        rows: Iterable[tuple[int, str, Optional[str]]]
+        if saved is None:
+            rows = [(game['id'], game['source'], getExternalID(game)) for game in self.games if game['source'] in EXTERNAL_ID_KEYS]
+        elif len(self._changed) > 0 or len(self._removed) > 0:
+            # The backend doesn't know about unsaved changes
+            rows = [row for row in saved if row[0] in self.gamesByID and row[0] not in self._changed]
+            rows += [(game['id'], game['source'], getExternalID(game)) for game in self._changed.values()]
         else:
-            return max([x['id'] for x in self.games]) + 1
+            rows = saved
 
+        for id, source, externalID in rows:
+            self.indexExternalID(id, source, externalID)
 
-def getLibraryImage(id: int) -> Optional[QPixmap]:
+    def indexExternalID(self, id: int, source: str, externalID: Optional[str]) -> None:
+        if externalID is None or self._externalIDs is None:
+            return
+        # The backend might return numbers, but external ids are always compared as strings
+        key = (source, str(externalID))
+        self._externalIDs[key] = id
+        self._externalIDsByGame[id] = key
+
+    def unindexExternalID(self, id: int) -> None:
+        key = self._externalIDsByGame.pop(id, None)
+        if key is not None and self._externalIDs is not None and self._externalIDs.get(key) == id:
+            del self._externalIDs[key]
+
+    def reserveIDs(self, count: int) -> range:
+        'Get ids for games that will be added later, e.g. once they have finished importing'
+        ids = range(self.nextID, self.nextID + count)
+        self.nextID += count
+        return ids
+
+
+    def gameIDs(self) -> list[int]:
+        '''
+        Returns the ids of the games in the order of self.games.
+
+        Cached until the library changes, so it mustn't be modified.
+        '''
+        return self._order()[0]
+
+    def gamePositions(self) -> dict[int, int]:
+        'Returns the index of every game in gameIDs(), by id'
+        return self._order()[1]
+
+    def _order(self) -> tuple[list[int], dict[int, int]]:
+        if self._gameOrder is None:
+            ids = [game['id'] for game in self.games]
+            self._gameOrder = (ids, {id: i for i, id in enumerate(ids)})
+        return self._gameOrder
+
+    def invalidate(self) -> None:
+        '''
+        Clear the cached order of the games.
+        Called automatically when games are added, removed or marked as changed.
+        '''
+        self._gameOrder = None
+
+
+class Session(NamedTuple):
+    'One time a game was played'
+    gameID: int
+    launchTime: float
+    'When the game was launched, as a Unix timestamp'
+    spawnTime: Optional[float]
+    'Seconds between launching the game and its process starting, or None if it never started'
+    duration: float
+    'Seconds the game was running for'
+    exitCode: Optional[int]
+    'None if the game crashed, or if the exit code isn\'t known (e.g. Steam games)'
+    crashed: bool
+
+
+class GameStats:
+    'Totals for every session of a game, updated one session at a time'
+
+    __slots__ = ('launches', 'crashes', 'playtime', 'lastPlayed', 'totalSpawnTime', 'spawnCount')
+
+    def __init__(
+        self,
+        launches: int = 0,
+        crashes: int = 0,
+        playtime: float = 0.0,
+        lastPlayed: Optional[float] = None,
+        totalSpawnTime: float = 0.0,
+        spawnCount: int = 0
+    ) -> None:
+        self.launches = launches
+        self.crashes = crashes
+        self.playtime = playtime
+        'Total seconds played'
+        self.lastPlayed = lastPlayed
+        'Unix timestamp of the most recent launch'
+        self.totalSpawnTime = totalSpawnTime
+        self.spawnCount = spawnCount
+
+    def add(self, session: Session) -> None:
+        self.launches += 1
+        if session.crashed:
+            self.crashes += 1
+        self.playtime += session.duration
+        if self.lastPlayed is None or session.launchTime > self.lastPlayed:
+            self.lastPlayed = session.launchTime
+        if session.spawnTime is not None:
+            self.totalSpawnTime += session.spawnTime
+            self.spawnCount += 1
+
+    def averageSpawnTime(self) -> Optional[float]:
+        return self.totalSpawnTime / self.spawnCount if self.spawnCount > 0 else None
+
+    def toList(self) -> list[Any]:
+        return [self.launches, self.crashes, self.playtime, self.lastPlayed, self.totalSpawnTime, self.spawnCount]
+
+
+class SessionLog:
+    '''
+    Every session of every game, appended one JSON object per line to SESSIONS_FILE.
+
+    Totals for each game are kept in SESSION_STATS_FILE along with how much of the session log
+    they include, so loading only has to read the sessions that were added since then.
+    '''
+
+    STATS_VERSION = 1
+
+    def __init__(self, path: str = SESSIONS_FILE, statsPath: str = SESSION_STATS_FILE) -> None:
+        self.path = path
+        self.statsPath = statsPath
+        self.stats: dict[int, GameStats] = {}
+        'Totals by game id'
+        self.offset = 0
+        'How many bytes of the session log are included in stats'
+
+        self.load()
+
+
+    def load(self) -> None:
+        try:
+            with open(self.statsPath, 'r') as file:
+                saved = json.load(file)
+            if saved['version'] != self.STATS_VERSION:
+                raise ValueError('Old stats version')
+            self.offset = saved['offset']
+            self.stats = {int(id): GameStats(*values) for id, values in saved['games'].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            self.offset = 0
+            self.stats = {}
+
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size < self.offset:
+            # The log was deleted or replaced, so the totals are wrong
+            self.offset = 0
+            self.stats = {}
+
+        if size > self.offset:
+            self.readNewSessions()
+            self.saveStats()
+
+    def readNewSessions(self) -> None:
+        with open(self.path, 'rb') as file:
+            file.seek(self.offset)
+            for line in file:
+                if not line.endswith(b'\n'):
+                    # Still being written
+                    break
+                self.offset += len(line)
+                try:
+                    session = Session(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue
+                self.addToStats(session)
+
+    def record(self, session: Session) -> None:
+        'Add a session to the log and update the totals'
+        line = (json.dumps(session._asdict()) + '\n').encode()
+        with open(self.path, 'ab') as file:
+            start = file.tell()
+            file.write(line)
+            file.flush()
+            os.fsync(file.fileno())
+
+        if start == self.offset:
+            self.offset += len(line)
+            self.addToStats(session)
+        else:
+            if start < self.offset:
+                # The log was replaced
+                self.offset = 0
+                self.stats = {}
+            # Another launcher has added sessions since we last read the log. This reads ours too.
+            self.readNewSessions()
+        self.saveStats()
+
+    def saveStats(self) -> None:
+        writeJSON(self.statsPath, {
+            'version': self.STATS_VERSION,
+            'offset': self.offset,
+            'games': {str(id): stats.toList() for id, stats in self.stats.items()},
+        })
+
+    def addToStats(self, session: Session) -> None:
+        stats = self.stats.get(session.gameID)
+        if stats is None:
+            stats = self.stats[session.gameID] = GameStats()
+        stats.add(session)
+
+
+    def gameStats(self, id: int) -> GameStats:
+        'Returns the totals for a game. Games that have never been played get empty totals.'
+        return self.stats.get(id) or GameStats()
+
+    def playtime(self, id: int) -> float:
+        return self.gameStats(id).playtime
+
+    def lastPlayed(self, id: int) -> Optional[float]:
+        return self.gameStats(id).lastPlayed
+
+
+def gameChanged(oldGame: LibraryGame, newGame: LibraryGame) -> bool:
+    'Whether a game is different after loading it again'
+    if isinstance(oldGame, LazyGame) and not oldGame.isLoaded():
+        # The details haven't been loaded yet, so they'll be up to date when they are
+        return (
+            (oldGame.name, oldGame.id, oldGame.source, oldGame.tags)
+            != (newGame['name'], newGame['id'], newGame['source'], newGame['tags'])
+        )
+    return dict(oldGame) != dict(newGame)
+
+def fileFingerprint(path: str) -> Optional[tuple[int, int]]:
+    'Returns the mtime and size of a file, or None if it doesn\'t exist'
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def writeJSON(path: str, data: Any) -> None:
+    '''
+    Write a JSON file atomically.
+
+    The data is written to a temporary file which then replaces the old file,
+    so a crash while saving can't leave a half written file. Each write gets its own temporary file,
+    so threads writing the same file (e.g. two scanners saving the manifest cache) can't clobber each other's.
+    '''
+    fd, tempPath = tempfile.mkstemp(prefix = os.path.basename(path) + '.', suffix = '.tmp', dir = os.path.dirname(path))
+    try:
+        with open(fd, 'w') as file:
+            json.dump(data, file, indent='\t')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tempPath, path)
+    except BaseException:
+        try:
+            os.remove(tempPath)
+        except OSError:
+            pass
+        raise
+
+
+def rotateLog(path: str, maxSize: int, backups: int) -> None:
+    'If the log at path is bigger than maxSize, rename it to path.1 (and path.1 to path.2, and so on)'
+    try:
+        if os.path.getsize(path) <= maxSize:
+            return
+    except OSError:
+        return
+
+    if backups <= 0:
+        os.remove(path)
+        return
+
+    for i in range(backups - 1, 0, -1):
+        if os.path.exists(f'{path}.{i}'):
+            os.replace(f'{path}.{i}', f'{path}.{i + 1}')
+    os.replace(path, f'{path}.1')
+
+
+def linkOrCopyFile(source: str, destination: str) -> None:
+    '''
+    Copy a file, without copying its contents if the filesystem allows it.
+
+    Tries a reflink (copy-on-write clone) first, then a hard link, and then falls back to copying.
+    '''
+    if os.path.exists(destination):
+        if os.path.samefile(source, destination):
+            return
+        os.remove(destination)
+
+    try:
+        with open(source, 'rb') as sourceFile, open(destination, 'wb') as destinationFile:
+            fcntl.ioctl(destinationFile.fileno(), FICLONE, sourceFile.fileno())
+        return
+    except OSError:
+        # Not supported by this filesystem (or between these filesystems)
+        if os.path.exists(destination):
+            os.remove(destination)
+
+    try:
+        os.link(source, destination)
+        return
+    except OSError:
+        pass
+
+    shutil.copyfile(source, destination)
+
+
+def getLibraryImagePath(id: int) -> Optional[str]:
     if os.path.exists(os.path.join(ARTWORK_FOLDER, f'{id}_library_image.jpg')):
-        path = os.path.join(ARTWORK_FOLDER, f'{id}_library_image.jpg')
+        return os.path.join(ARTWORK_FOLDER, f'{id}_library_image.jpg')
     elif os.path.exists(os.path.join(ARTWORK_FOLDER, f'{id}_library_image.png')):
-        path = os.path.join(ARTWORK_FOLDER, f'{id}_library_image.png')
+        return os.path.join(ARTWORK_FOLDER, f'{id}_library_image.png')
     else:
         return None
 
+def getLibraryImage(id: int) -> Optional[QPixmap]:
+    path = getLibraryImagePath(id)
+    if path is None:
+        return None
+
     return QPixmap(path)
 
 
+def getThumbnailPath(id: int, sourcePath: str, height: int, radius: int) -> str:
+    '''
+    Path of the cached tile thumbnail for a game's artwork.
+
+    The file name includes the mtime and size of the source image,
+    so changing the artwork means the old thumbnail is no longer used.
+    '''
+    stat = os.stat(sourcePath)
+    return os.path.join(THUMBNAIL_FOLDER, f'{id}_{height}_{radius}_{stat.st_mtime_ns}_{stat.st_size}.png')
 
+def cleanThumbnails(ids: Iterable[int]) -> None:
+    '''
+    Delete cached thumbnails for games that aren't in ids, or whose artwork has changed or been deleted.
+    '''
+    ids = set(ids)
+    sourceStats: dict[int, Optional[tuple[int, int]]] = {}
 
+    for fileName in os.listdir(THUMBNAIL_FOLDER):
+        parts = fileName.removesuffix('.png').split('_')
+        if not fileName.endswith('.png') or len(parts) != 5 or not all(part.isdigit() for part in parts):
+            # Not one of ours (or still being written)
+            continue
+        id, _height, _radius, mtime, size = (int(part) for part in parts)
+
+        if id in ids and id not in sourceStats:
+            sourcePath = getLibraryImagePath(id)
+            if sourcePath is None:
+                sourceStats[id] = None
+            else:
+                stat = os.stat(sourcePath)
+                sourceStats[id] = (stat.st_mtime_ns, stat.st_size)
+
+        if id not in ids or sourceStats[id] != (mtime, size):
+            try:
+                os.remove(os.path.join(THUMBNAIL_FOLDER, fileName))
+            except FileNotFoundError:
+                pass
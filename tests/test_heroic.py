@@ -0,0 +1,47 @@
+import os, sys, subprocess
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from heroic import HeroicLibraryScanner, heroicGame
+from storage import Library, JSONLibraryBackend
+from SteamLaunchTracker import findGameProcesses
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.config', 'heroic')
+
+
+def test_scan_fixture_stores(tmp_path):
+    scanner = HeroicLibraryScanner(FIXTURE, str(tmp_path / 'heroic_library.json'))
+    stores = scanner.scan()
+
+    # DLC is left out, and titles missing from installed.json come from the store cache
+    assert [app.name for app in stores['legendary']] == ['Fortnite', 'Hades']
+    assert sorted(app.name for app in stores['gog']) == ['Disco Elysium - The Final Cut', 'Stardew Valley']
+    assert [app.name for app in stores['nile']] == ['Quake']
+    assert scanner.parsedStores == 3
+
+    scanner = HeroicLibraryScanner(FIXTURE, str(tmp_path / 'heroic_library.json'))
+    assert scanner.scan() == stores
+    assert scanner.parsedStores == 0
+
+
+def test_import_fixture_games(tmp_path):
+    library = Library(JSONLibraryBackend(str(tmp_path / 'games.json')))
+    apps = [app for apps in HeroicLibraryScanner(FIXTURE).scan().values() for app in apps]
+    library.addGames([heroicGame(app, id) for app, id in zip(apps, library.reserveIDs(len(apps)))])
+
+    hades = library.findExternalGame('heroic', 'Sugar')
+    assert hades is not None
+    assert hades['name'] == 'Hades'
+    assert hades['data'] == {'appName': 'Sugar', 'runner': 'legendary', 'installPath': '/home/user/Games/Heroic/Hades'}
+    assert len(library.games) == 5
+
+
+def test_find_processes_by_install_folder(tmp_path):
+    # How Heroic games are followed after xdg-open has exited
+    process = subprocess.Popen(['sleep', '10'], cwd=tmp_path)
+    try:
+        assert process.pid in findGameProcesses(None, str(tmp_path))
+        assert process.pid not in findGameProcesses(None, str(tmp_path / 'other'))
+    finally:
+        process.kill()
+        process.wait()
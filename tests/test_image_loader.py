@@ -0,0 +1,50 @@
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QThreadPool
+from PySide6.QtGui import QGuiApplication, QImage, QColor
+
+import ImageLoader as imageLoaderModule
+from ImageLoader import ImageLoader, _LoadImageTask
+
+
+app = QGuiApplication.instance() or QGuiApplication([])
+
+
+def makeImage(color: str) -> QImage:
+    image = QImage(4, 4, QImage.Format.Format_ARGB32)
+    image.fill(QColor(color))
+    return image
+
+
+def test_ignores_results_of_invalidated_tasks():
+    loader = ImageLoader(4, 8, threadPool = QThreadPool())
+    loaded = []
+    loader.imageLoaded.connect(lambda id, base, expanded: loaded.append((id, base.toImage().pixelColor(0, 0).name())))
+
+    # The artwork changed while the first task was running, and it is being loaded again
+    oldTask = _LoadImageTask(0, 4, 8, loader._signals)
+    newTask = _LoadImageTask(0, 4, 8, loader._signals)
+    loader.pending[0] = newTask
+    loader.handleFinished(oldTask, makeImage('#ff0000'), makeImage('#ff0000'))
+    assert loader.pending[0] is newTask
+    assert loader.cached(0) is None
+
+    loader.handleFinished(newTask, makeImage('#00ff00'), makeImage('#00ff00'))
+    assert loaded == [(0, '#00ff00')]
+    assert 0 not in loader.pending
+
+
+def test_failed_tasks_still_finish(tmp_path, monkeypatch):
+    loader = ImageLoader(4, 8, threadPool = QThreadPool())
+    def deleted(id, sourcePath, height, radius):
+        raise FileNotFoundError(sourcePath)
+    monkeypatch.setattr(imageLoaderModule.storage, 'getLibraryImagePath', lambda id: str(tmp_path / 'deleted.png'))
+    monkeypatch.setattr(imageLoaderModule.storage, 'getThumbnailPath', deleted)
+
+    task = _LoadImageTask(0, 4, 8, loader._signals)
+    loader.pending[0] = task
+    task.run()
+    assert 0 not in loader.pending
+    assert loader.cached(0) is None
@@ -0,0 +1,50 @@
+import os, sys, json
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import launcher_test
+from storage import Library, JSONLibraryBackend
+
+
+def test_reads_games_saved_by_the_launcher(tmp_path, monkeypatch):
+    # Legacy entries are moved into data when the launcher saves games.json
+    gamesPath = str(tmp_path / 'games.json')
+    game_library = []
+    launcher_test.addSteamGame(game_library, 'Portal 2', '620', '/games/steam', 1)
+    launcher_test.addNativeGame(game_library, 'test', '/games/test/run.sh', 3)
+    game_library.append({'name': 'Braid', 'filepath': '/games/braid', 'id': 5, 'source': 'native'})
+    with open(gamesPath, 'w') as file:
+        json.dump(game_library, file)
+
+    library = Library(JSONLibraryBackend(gamesPath))
+    library.addNativeGame('Celeste', '/games/celeste')
+    library.save()
+    monkeypatch.setattr(launcher_test, 'GAMES_FILE', gamesPath)
+    monkeypatch.setattr(launcher_test, 'GAMES_METADATA_FILE', gamesPath + '.meta')
+    game_library = launcher_test.getLibrary()
+
+    commands = []
+    monkeypatch.setattr(launcher_test.subprocess, 'Popen', lambda command, shell: commands.append(command))
+    for game in game_library:
+        launcher_test.launchGame(game)
+    assert commands == ['"/games/braid"', '"/games/celeste"', 'steam steam://rungameid/620', '"/games/test/run.sh"']
+    assert launcher_test.getNewID(game_library) == 7
+
+def test_never_reuses_the_launchers_ids(tmp_path, monkeypatch):
+    gamesPath = str(tmp_path / 'games.json')
+    monkeypatch.setattr(launcher_test, 'GAMES_FILE', gamesPath)
+    monkeypatch.setattr(launcher_test, 'GAMES_METADATA_FILE', gamesPath + '.meta')
+
+    library = Library(JSONLibraryBackend(gamesPath))
+    library.addNativeGame('First', '/games/first')
+    library.addNativeGame('Second', '/games/second')
+    library.removeGame(1)
+    library.save()
+
+    game_library = launcher_test.getLibrary()
+    launcher_test.addNativeGame(game_library, 'Third', '/games/third')
+    launcher_test.saveLibrary(game_library)
+    assert [game['id'] for game in game_library] == [0, 2]
+
+    library = Library(JSONLibraryBackend(gamesPath))
+    assert library.getGame(2) is not None
+    assert library.getNewID() == 3
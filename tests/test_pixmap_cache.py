@@ -0,0 +1,53 @@
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtGui import QGuiApplication, QPixmap
+
+from GameTile import TileImages
+from PixmapCache import PixmapCache, imagesSize
+
+
+app = QGuiApplication.instance() or QGuiApplication([])
+
+
+def makeImages(height: int = 10) -> TileImages:
+    return TileImages(QPixmap(10, height), QPixmap(20, height * 2))
+
+
+def test_evicts_least_recently_used_first():
+    images = makeImages()
+    cache = PixmapCache(imagesSize(images) * 3)
+    for id in range(3):
+        cache.put(id, makeImages())
+
+    assert cache.get(0) is not None
+    cache.put(3, makeImages())
+    assert list(cache.entries) == [2, 0, 3]
+    assert cache.get(1) is None
+    assert cache.stats() == {
+        'entries': 3, 'bytes': imagesSize(images) * 3, 'maxBytes': imagesSize(images) * 3,
+        'hits': 1, 'misses': 1, 'evictions': 1, 'hitRate': 0.5,
+    }
+
+def test_stays_within_byte_budget():
+    small = makeImages(10)
+    cache = PixmapCache(imagesSize(small) * 4)
+    for id in range(4):
+        cache.put(id, makeImages(10))
+
+    # Takes the space of two small ones
+    cache.put(4, makeImages(20))
+    assert list(cache.entries) == [2, 3, 4]
+    assert cache.currentBytes == imagesSize(small) * 4
+    assert cache.evictions == 2
+
+    cache.remove(3)
+    cache.put(2, makeImages(10))
+    assert cache.currentBytes == imagesSize(small) * 3
+
+def test_keeps_an_image_bigger_than_the_budget():
+    cache = PixmapCache(1)
+    cache.put(0, makeImages())
+    cache.put(1, makeImages())
+    assert list(cache.entries) == [1]
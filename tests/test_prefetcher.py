@@ -0,0 +1,23 @@
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Prefetcher import prefetchTargets
+
+
+def nativeData(filepath: str) -> dict:
+    return {'filepath': filepath, 'args': []}
+
+
+def test_native_game_in_its_own_folder(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    filepath = str(tmp_path / 'Games' / 'Game' / 'run.sh')
+    assert prefetchTargets('native', nativeData(filepath)) == ([filepath], [str(tmp_path / 'Games' / 'Game')])
+
+def test_native_game_in_shared_folder(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('PATH', '/usr/bin')
+    for filepath in (tmp_path / 'game.AppImage', tmp_path / 'Games' / 'game.AppImage', '/usr/bin/game', '/game'):
+        assert prefetchTargets('native', nativeData(str(filepath))) == ([str(filepath)], [])
+
+def test_steam_game_without_library_path():
+    assert prefetchTargets('steam', {'appID': '620'}) == ([], [])
@@ -0,0 +1,27 @@
+import os, sys, json
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import Library, JSONLibraryBackend
+from search import SearchIndex
+
+
+def test_search_legacy_json_library(tmp_path):
+    # Entries written by launcher_test.py have no tags or data
+    gamesPath = str(tmp_path / 'games.json')
+    with open(gamesPath, 'w') as file:
+        json.dump([
+            {'name': 'Portal 2', 'appID': '620', 'libraryPath': '/games/steam', 'id': 0, 'source': 'steam'},
+            {'name': 'test', 'filepath': '/games/test/run.sh', 'id': 3, 'source': 'native'},
+        ], file)
+
+    library = Library(JSONLibraryBackend(gamesPath))
+    index = SearchIndex(library)
+    assert index.search('portal') == {0}
+    assert index.search('', ['Puzzle']) == set()
+
+    game = library.getGame(3)
+    assert game is not None
+    assert game['data'] == {'filepath': '/games/test/run.sh'}
+    game['tags'].append('Puzzle')
+    library.markChanged(game)
+    assert index.search('', ['Puzzle']) == {3}
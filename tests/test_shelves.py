@@ -0,0 +1,68 @@
+import os, sys, json
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import Library, JSONLibraryBackend, SessionLog, Session, Shelf
+from shelves import ShelfView
+
+
+def makeLibrary(tmp_path, names: list[str]) -> Library:
+    library = Library(JSONLibraryBackend(str(tmp_path / 'games.json')))
+    for name in names:
+        library.addNativeGame(name, f'/games/{name}')
+    return library
+
+def playedAt(id: int, launchTime: float) -> Session:
+    return Session(gameID=id, launchTime=launchTime, spawnTime=None, duration=60.0, exitCode=0, crashed=False)
+
+
+def test_recently_played_keeps_ties_in_title_order(tmp_path):
+    library = makeLibrary(tmp_path, ['Celeste', 'Anodyne', 'Braid', 'Dusk'])
+    sessionLog = SessionLog(str(tmp_path / 'sessions.jsonl'), str(tmp_path / 'stats.json'))
+    sessionLog.record(playedAt(3, 100.0))
+    sessionLog.record(playedAt(0, 200.0))
+
+    shelf = ShelfView(Shelf('Recently played', sortKey='recent', ascending=False), library, sessionLog)
+    assert [game['name'] for game in shelf.games()] == ['Celeste', 'Dusk', 'Anodyne', 'Braid']
+
+    sessionLog.record(playedAt(2, 300.0))
+    assert shelf.gamePlayed(2)
+    assert not shelf.gamePlayed(2)
+    assert [game['name'] for game in shelf.games()] == ['Braid', 'Celeste', 'Dusk', 'Anodyne']
+
+def test_descending_names(tmp_path):
+    library = makeLibrary(tmp_path, ['Celeste', 'The Anodyne', 'Braid'])
+    sessionLog = SessionLog(str(tmp_path / 'sessions.jsonl'), str(tmp_path / 'stats.json'))
+    shelf = ShelfView(Shelf('Z-A', ascending=False), library, sessionLog)
+    assert [game['name'] for game in shelf.games()] == ['Celeste', 'Braid', 'The Anodyne']
+
+    library.addNativeGame('Dusk', '/games/Dusk')
+    assert shelf.ids() == [3, 0, 2, 1]
+
+def test_legacy_games_without_tags(tmp_path):
+    gamesPath = str(tmp_path / 'games.json')
+    with open(gamesPath, 'w') as file:
+        json.dump([{'name': 'test', 'filepath': '/games/test/run.sh', 'id': 0, 'source': 'native'}], file)
+
+    library = Library(JSONLibraryBackend(gamesPath))
+    sessionLog = SessionLog(str(tmp_path / 'sessions.jsonl'), str(tmp_path / 'stats.json'))
+    assert ShelfView(Shelf('All'), library, sessionLog).ids() == [0]
+    assert ShelfView(Shelf('Puzzle', tags=['Puzzle']), library, sessionLog).ids() == []
+
+def test_reload_replaces_games_that_dont_move(tmp_path):
+    library = makeLibrary(tmp_path, ['Anodyne', 'Braid'])
+    library.save()
+    sessionLog = SessionLog(str(tmp_path / 'sessions.jsonl'), str(tmp_path / 'stats.json'))
+    shelf = ShelfView(Shelf('All'), library, sessionLog)
+    assert shelf.games()[0]['data']['filepath'] == '/games/Anodyne'
+
+    # Edited by another program, e.g. launcher_test.py
+    with open(tmp_path / 'games.json') as file:
+        games = json.load(file)
+    games[0]['data']['filepath'] = '/new/Anodyne'
+    with open(tmp_path / 'games.json', 'w') as file:
+        json.dump(games, file)
+    library.reload()
+
+    assert shelf.ids() == [0, 1]
+    assert shelf.games()[0] is library.gamesByID[0]
+    assert shelf.games()[0]['data']['filepath'] == '/new/Anodyne'
@@ -0,0 +1,62 @@
+import os, sys, time, subprocess
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PySide6.QtCore import QCoreApplication
+
+from SteamLaunchTracker import SteamLaunchTracker
+
+
+FAKE_STEAM = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fake_steam.sh')
+
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+def launchFakeGame(appID: str, duration: float) -> None:
+    'Run the stand-in for the Steam client, which starts the game in the background and exits'
+    environment = os.environ | {'FAKE_GAME_DURATION': str(duration)}
+    subprocess.run([FAKE_STEAM, f'steam://rungameid/{appID}'], env = environment, check = True)
+
+def followGame(appID: str, timeout: float = 10.0) -> list[tuple[str, float]]:
+    'Returns when the game was found and when its exit was reported, in seconds since tracking started'
+    events: list[tuple[str, float]] = []
+    tracker = SteamLaunchTracker(appID, searchInterval = 50, pollInterval = 50)
+    start = time.perf_counter()
+    tracker.gameStarted.connect(lambda: events.append(('started', time.perf_counter() - start)))
+    tracker.gameExited.connect(lambda found: events.append((f'exited, found: {found}', time.perf_counter() - start)))
+    tracker.start()
+
+    while len(events) < 2 and time.perf_counter() - start < timeout:
+        app.processEvents()
+        time.sleep(0.01)
+    tracker.stop()
+    return events
+
+
+@pytest.mark.parametrize('pidfd', [True, False])
+def test_follows_game_started_by_steam(monkeypatch, pidfd):
+    if not pidfd:
+        # Kernels older than 5.3, where the processes are polled instead
+        def pidfdOpen(pid):
+            raise OSError('pidfd_open not supported')
+        monkeypatch.setattr(os, 'pidfd_open', pidfdOpen, raising = False)
+
+    appID = f'40{os.getpid()}{int(pidfd)}'
+    launchFakeGame(appID, 0.5)
+    events = followGame(appID)
+
+    assert [name for name, _time in events] == ['started', 'exited, found: True']
+    # The game ran for about 0.5s, and its exit is noticed quickly either way
+    assert 0.3 < events[1][1] < 2.0
+
+def test_gives_up_on_games_that_never_start():
+    tracker = SteamLaunchTracker(f'41{os.getpid()}', timeout = 200, searchInterval = 50)
+    exited: list[bool] = []
+    tracker.gameExited.connect(exited.append)
+    tracker.start()
+
+    start = time.perf_counter()
+    while len(exited) == 0 and time.perf_counter() - start < 5.0:
+        app.processEvents()
+        time.sleep(0.01)
+    assert exited == [False]
@@ -0,0 +1,106 @@
+import os, sys, json, threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from storage import Library, JSONLibraryBackend, SQLiteLibraryBackend, LazyGame, LaunchProfile, gameChanged, writeJSON
+
+
+LEGACY_GAMES = [
+    {'name': 'Portal 2', 'appID': '620', 'libraryPath': '/games/steam', 'id': 0, 'source': 'steam'},
+    {'name': 'test', 'filepath': '/games/test/run.sh', 'id': 3, 'source': 'native'},
+]
+'Entries written by launcher_test.py, which have no tags and keep their launch data at the top level'
+
+
+def writeGames(path: str, games: list) -> None:
+    with open(path, 'w') as file:
+        json.dump(games, file, indent='\t')
+
+
+def test_migrate_legacy_games(tmp_path):
+    gamesPath = str(tmp_path / 'games.json')
+    writeGames(gamesPath, LEGACY_GAMES)
+
+    backend = SQLiteLibraryBackend(str(tmp_path / 'library.sqlite3'), gamesPath)
+    library = Library(backend)
+
+    portal = library.getGame(0)
+    assert portal is not None
+    assert portal['tags'] == []
+    assert portal['data'] == {'appID': '620', 'libraryPath': '/games/steam'}
+    assert library.findExternalGame('steam', '620') is portal
+
+    native = library.getGame(3)
+    assert native is not None
+    assert native['data'] == {'filepath': '/games/test/run.sh'}
+    assert library.getNewID() == 4
+    backend.close()
+
+
+def test_migrate_only_once(tmp_path):
+    gamesPath = str(tmp_path / 'games.json')
+    databasePath = str(tmp_path / 'library.sqlite3')
+    writeGames(gamesPath, LEGACY_GAMES)
+    SQLiteLibraryBackend(databasePath, gamesPath).close()
+
+    writeGames(gamesPath, [])
+    backend = SQLiteLibraryBackend(databasePath, gamesPath)
+    assert len(Library(backend).games) == 2
+    backend.close()
+
+
+def test_json_backend_never_reuses_ids(tmp_path):
+    gamesPath = str(tmp_path / 'games.json')
+    library = Library(JSONLibraryBackend(gamesPath))
+    library.addNativeGame('First', '/games/first')
+    library.addNativeGame('Second', '/games/second')
+    library.removeGame(1)
+    library.save()
+
+    library = Library(JSONLibraryBackend(gamesPath))
+    assert library.getNewID() == 2
+
+
+def test_game_changed_leaves_lazy_details_alone():
+    loads = []
+    def loadDetails(id: int) -> dict:
+        loads.append(id)
+        return {'data': {}}
+
+    oldGame = LazyGame(0, 'Portal 2', 'steam', [], loadDetails)
+    newGame = LazyGame(0, 'Portal 2', 'steam', [], loadDetails)
+    assert not gameChanged(oldGame, newGame)
+    assert gameChanged(oldGame, LazyGame(0, 'Portal 2', 'steam', ['Puzzle'], loadDetails))
+    assert loads == []
+
+
+def test_launch_profile_io_priority():
+    assert LaunchProfile.fromDict({'ioPriority': 'best-effort:0'}).ioPriority == 'best-effort:0'
+    for ioPriority in ('besteffort', 'best-effort:8', 'realtime:high'):
+        with pytest.raises(ValueError):
+            LaunchProfile.fromDict({'ioPriority': ioPriority})
+
+
+def test_write_json_from_several_threads(tmp_path):
+    # e.g. the library watcher and the add game screen both saving the Steam manifest cache
+    path = str(tmp_path / 'cache.json')
+    data = {str(i): list(range(100)) for i in range(100)}
+    errors = []
+    def write():
+        try:
+            for _ in range(20):
+                writeJSON(path, data)
+        except OSError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target = write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with open(path) as file:
+        assert json.load(file) == data
+    assert os.listdir(tmp_path) == ['cache.json']
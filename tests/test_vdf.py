@@ -0,0 +1,55 @@
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import vdf
+from steam import SteamLibraryScanner
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.steam', 'steam')
+
+MANIFEST = '''
+"AppState"
+{
+	"appid"		"620"
+	"InstalledDepots"
+	{
+		"621"
+		{
+			"name"		"not this one"
+		}
+	}
+	"Name"		"Portal \\"2\\""
+	"installdir"		"Portal 2"
+	"name"		"not this one either"
+}
+'''
+
+
+def test_find_keys_skips_nested_sections():
+    assert vdf.findKeys(MANIFEST, 'AppState', ('appid', 'name', 'installdir')) == {
+        'appid': '620',
+        'name': 'Portal "2"',
+        'installdir': 'Portal 2',
+    }
+
+def test_find_keys_stops_once_every_key_is_found():
+    # Everything after installdir is invalid, but never looked at
+    assert vdf.findKeys(MANIFEST.replace('"name"\t\t"not this one either"', '{{{'), 'AppState', ('installdir',)) == {
+        'installdir': 'Portal 2',
+    }
+
+def test_find_keys_missing_keys_and_section():
+    assert vdf.findKeys(MANIFEST, 'AppState', ('appid', 'LastOwner')) == {'appid': '620'}
+    assert vdf.findKeys(MANIFEST, 'libraryfolders', ('appid',)) is None
+    with pytest.raises(vdf.VDFError):
+        vdf.findKeys('"AppState" { "appid" ', 'AppState', ('name',))
+
+
+def test_scan_fixture_library():
+    libraries = SteamLibraryScanner(FIXTURE).scan()
+    apps = libraries[FIXTURE]
+    assert len(apps) == 18
+    assert apps['774181'].name == 'Rhythm Doctor'
+    assert apps['774181'].installDir == 'Rhythm Doctor'
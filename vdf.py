@@ -0,0 +1,177 @@
+'''
+Parser for Valve's KeyValues text format, used by Steam's .vdf and .acf files.
+'''
+
+import re
+from typing import Iterable, Optional, Union
+
+
+VDFDict = dict[str, Union[str, 'VDFDict']]
+
+
+class VDFError(ValueError):
+    pass
+
+
+_TOKEN_RE = re.compile(r'''
+      ("(?:[^"\\]|\\.)*")   # Quoted string (including the quotes, so "" isn't empty)
+    | ([{}])                # Brace
+    | //[^\n]*              # Comment
+    | ([^\s{}"]+)           # Unquoted string
+    | (\S)                  # Anything else is an error
+''', re.VERBOSE | re.DOTALL)
+
+_ESCAPES = {'n': '\n', 't': '\t', '\\': '\\', '"': '"'}
+_ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+
+
+def unescape(value: str) -> str:
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(0)), value)
+
+
+def loads(text: str) -> VDFDict:
+    'Parse a KeyValues document. If a key is repeated, the last value is used.'
+    root: VDFDict = {}
+    stack = [root]
+    current = root
+    key = None
+
+    # findall does the scanning in C, which is a lot faster than matching one token at a time.
+    # Whitespace doesn't match anything, so findall skips over it
+    for quoted, brace, unquoted, error in _TOKEN_RE.findall(text):
+        if quoted:
+            value = quoted[1:-1]
+            if '\\' in value:
+                value = unescape(value)
+        elif unquoted:
+            if unquoted.startswith('[') and unquoted.endswith(']'):
+                # Conditional, e.g. [$WIN32]
+                continue
+            value = unquoted
+        elif brace == '{':
+            if key is None:
+                raise VDFError('Section without a name')
+            section: VDFDict = {}
+            current[key] = section
+            stack.append(section)
+            current = section
+            key = None
+            continue
+        elif brace == '}':
+            if key is not None:
+                raise VDFError(f'Key {key!r} has no value')
+            if len(stack) == 1:
+                raise VDFError('Unexpected }')
+            stack.pop()
+            current = stack[-1]
+            continue
+        elif error:
+            raise VDFError(f'Unexpected character {error!r}')
+        else:
+            # Comment
+            continue
+
+        if key is None:
+            key = value
+        else:
+            current[key] = value
+            key = None
+
+    if key is not None:
+        raise VDFError(f'Key {key!r} has no value')
+    if len(stack) != 1:
+        raise VDFError('Missing }')
+
+    return root
+
+def findKeys(text: str, section: str, keys: Iterable[str]) -> Optional[dict[str, str]]:
+    '''
+    Returns the values of keys in section, which must be the first section in the document,
+    without parsing the rest of it (e.g. appid and name from the AppState section of an appmanifest).
+
+    Section and key names are matched ignoring case. Only keys directly in section are looked at,
+    and if a key is repeated, the first value is used. Keys that aren't found are left out.
+    Returns None if the document doesn't start with section.
+    '''
+    wanted = {key.lower(): key for key in keys}
+    found: dict[str, str] = {}
+    depth = 0
+    key = None
+
+    # Unlike loads, this matches one token at a time, so it can stop once every key has been found.
+    # The keys Steam needs are near the top of every manifest, so this skips most of the file
+    for match in _TOKEN_RE.finditer(text):
+        quoted, brace, unquoted, error = match.groups()
+        if quoted:
+            value = quoted[1:-1]
+            if '\\' in value:
+                value = unescape(value)
+        elif unquoted:
+            if unquoted.startswith('[') and unquoted.endswith(']'):
+                continue
+            value = unquoted
+        elif brace == '{':
+            if key is None:
+                raise VDFError('Section without a name')
+            if depth == 0 and key.lower() != section.lower():
+                return None
+            depth += 1
+            key = None
+            continue
+        elif brace == '}':
+            if key is not None:
+                raise VDFError(f'Key {key!r} has no value')
+            depth -= 1
+            if depth < 0:
+                raise VDFError('Unexpected }')
+            if depth == 0:
+                # End of section
+                return found
+            continue
+        elif error:
+            raise VDFError(f'Unexpected character {error!r}')
+        else:
+            # Comment
+            continue
+
+        if key is None:
+            key = value
+        elif depth == 0:
+            # A value outside of any section
+            return None
+        else:
+            if depth == 1:
+                name = wanted.get(key.lower())
+                if name is not None and name not in found:
+                    found[name] = value
+                    if len(found) == len(wanted):
+                        return found
+            key = None
+
+    if key is not None:
+        raise VDFError(f'Key {key!r} has no value')
+    if depth > 0:
+        raise VDFError('Missing }')
+    return None
+
+
+def load(path: str) -> VDFDict:
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        return loads(file.read())
+
+def loadKeys(path: str, section: str, keys: Iterable[str]) -> Optional[dict[str, str]]:
+    'findKeys for a file'
+    with open(path, 'rb') as file:
+        return findKeys(file.read().decode('utf-8', errors='replace'), section, keys)
+
+
+def get(section: VDFDict, key: str, default: Union[str, VDFDict, None] = None) -> Union[str, VDFDict, None]:
+    'Look up a key ignoring case, since Steam isn\'t consistent about it'
+    if key in section:
+        return section[key]
+
+    key = key.lower()
+    for k, value in section.items():
+        if k.lower() == key:
+            return value
+    return default